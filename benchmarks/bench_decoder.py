@@ -0,0 +1,89 @@
+"""
+行解码器基准测试
+
+比较 parse_line（json.loads）与 parse_line_fast（schema 快速路径）的吞吐量。
+
+用法：
+    python -m benchmarks.bench_decoder --lines 200000
+"""
+
+import argparse
+import random
+import sys
+import time
+from typing import Callable, List, Optional
+
+from src.fastpath import parse_line_fast
+from src.parser import parse_line
+
+SERVICES = ['auth', 'payment', 'db', 'user', 'cache']
+LEVELS = ['INFO', 'INFO', 'INFO', 'WARN', 'ERROR']
+
+
+def make_lines(count: int, seed: int = 42) -> List[bytes]:
+    """
+    生成固定 schema 的日志行。
+
+    Args:
+        count: 行数
+        seed: 随机种子
+
+    Returns:
+        字节串行列表
+    """
+    rng = random.Random(seed)
+    return [
+        (f'{{"timestamp": "2025-01-15T10:{i // 60 % 60:02d}:{i % 60:02d}", '
+         f'"level": "{rng.choice(LEVELS)}", "service": "{rng.choice(SERVICES)}", '
+         f'"latency_ms": {rng.randint(1, 5000)}, "msg": "request_{i % 100}"}}\n').encode()
+        for i in range(count)
+    ]
+
+
+def measure(decoder: Callable, lines: List[bytes], repeat: int = 3) -> float:
+    """
+    测量解码器的吞吐量。
+
+    Args:
+        decoder: 行解码函数
+        lines: 输入行
+        repeat: 重复次数，取最快一次
+
+    Returns:
+        每秒解码记录数
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            decoder(line)
+        best = min(best, time.perf_counter() - start)
+    return len(lines) / best
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    基准测试入口。
+
+    Args:
+        argv: 命令行参数列表
+
+    Returns:
+        退出码
+    """
+    parser = argparse.ArgumentParser(description='行解码器吞吐量基准测试')
+    parser.add_argument('--lines', type=int, default=200000, help='测试行数')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数')
+    args = parser.parse_args(argv)
+
+    lines = make_lines(args.lines)
+    baseline = measure(parse_line, lines, args.repeat)
+    fast = measure(parse_line_fast, lines, args.repeat)
+
+    print(f'parse_line       {baseline:>12,.0f} records/s')
+    print(f'parse_line_fast  {fast:>12,.0f} records/s  ({fast / baseline:.2f}x)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
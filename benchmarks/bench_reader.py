@@ -0,0 +1,107 @@
+"""
+行读取基准测试
+
+比较普通缓冲读取与 mmap 读取的行吞吐量（不含 JSON 解码）。
+
+用法：
+    python -m benchmarks.bench_reader --lines 1000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, List, Optional
+
+from src.reader import open_lines
+
+from .bench_decoder import make_lines
+
+
+def read_buffered(filepath: str) -> int:
+    """
+    使用缓冲文件迭代读取所有行。
+
+    Args:
+        filepath: 文件路径
+
+    Returns:
+        行数
+    """
+    count = 0
+    with open(filepath, 'rb') as f:
+        for _ in f:
+            count += 1
+    return count
+
+
+def read_mapped(filepath: str) -> int:
+    """
+    使用 open_lines（mmap）读取所有行。
+
+    Args:
+        filepath: 文件路径
+
+    Returns:
+        行数
+    """
+    count = 0
+    with open_lines(filepath) as lines:
+        for _ in lines:
+            count += 1
+    return count
+
+
+def measure(reader: Callable[[str], int], filepath: str, repeat: int = 3) -> float:
+    """
+    测量读取函数的吞吐量。
+
+    Args:
+        reader: 读取函数
+        filepath: 文件路径
+        repeat: 重复次数，取最快一次
+
+    Returns:
+        每秒读取行数
+    """
+    best = float('inf')
+    lines = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        lines = reader(filepath)
+        best = min(best, time.perf_counter() - start)
+    return lines / best
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    基准测试入口。
+
+    Args:
+        argv: 命令行参数列表
+
+    Returns:
+        退出码
+    """
+    parser = argparse.ArgumentParser(description='行读取吞吐量基准测试')
+    parser.add_argument('--lines', type=int, default=1000000, help='测试行数')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数')
+    args = parser.parse_args(argv)
+
+    fd, path = tempfile.mkstemp(suffix='.jsonl')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.writelines(make_lines(args.lines))
+        buffered = measure(read_buffered, path, args.repeat)
+        mapped = measure(read_mapped, path, args.repeat)
+    finally:
+        os.unlink(path)
+
+    print(f'buffered  {buffered:>14,.0f} lines/s')
+    print(f'mmap      {mapped:>14,.0f} lines/s  ({mapped / buffered:.2f}x)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+合成日志生成器
+
+按固定随机种子生成接近真实分布的 JSONL 日志，相同参数总是产生相同内容。
+
+用法：
+    python -m benchmarks.generator --lines 1000000 --output logs.jsonl
+"""
+
+import argparse
+import random
+import sys
+from typing import Callable, Dict, Iterator, List, Optional
+
+MESSAGES = ('request handled', 'cache miss', 'upstream timeout',
+            'retrying request', 'connection reset', 'slow query')
+LATENCY_DISTRIBUTIONS = ('uniform', 'lognormal', 'pareto')
+
+
+def _latency_sampler(rng: random.Random, distribution: str) -> Callable[[], float]:
+    """
+    返回延迟采样函数（毫秒）。
+
+    Args:
+        rng: 随机数生成器
+        distribution: 分布名称，见 LATENCY_DISTRIBUTIONS
+
+    Returns:
+        无参数的采样函数
+
+    Raises:
+        ValueError: 未知分布名称时抛出
+    """
+    if distribution == 'uniform':
+        return lambda: rng.uniform(1, 1000)
+    if distribution == 'lognormal':
+        # 中位数约 60ms，带长尾
+        return lambda: rng.lognormvariate(4.1, 0.9)
+    if distribution == 'pareto':
+        return lambda: 10 * rng.paretovariate(1.5)
+    raise ValueError(f'未知的延迟分布: {distribution}')
+
+
+def _corrupt_line(rng: random.Random, timestamp: str) -> str:
+    """
+    生成一条损坏的日志行，覆盖解析器处理的几类错误。
+
+    Args:
+        rng: 随机数生成器
+        timestamp: 时间戳
+
+    Returns:
+        不含换行符的行内容
+    """
+    kind = rng.randrange(3)
+    if kind == 0:
+        return f'{{"timestamp": "{timestamp}", "level": "ERROR", "serv'
+    if kind == 1:
+        return f'{{"timestamp": "{timestamp}", "level": "INFO", "msg": "no service"}}'
+    return '["not", "an", "object"]'
+
+
+def generate_lines(count: int, services: int = 8, error_ratio: float = 0.05,
+                   warn_ratio: float = 0.1, corrupt_ratio: float = 0.0,
+                   latency: str = 'lognormal', seed: int = 42) -> Iterator[bytes]:
+    """
+    逐行生成合成日志。
+
+    服务按 Zipf 风格加权，使少数服务占据大部分流量；时间戳每条递增 10ms。
+
+    Args:
+        count: 行数
+        services: 服务数量
+        error_ratio: ERROR 级别所占比例
+        warn_ratio: WARN 级别所占比例
+        corrupt_ratio: 损坏行所占比例
+        latency: 延迟分布，取值见 LATENCY_DISTRIBUTIONS
+        seed: 随机种子
+
+    Yields:
+        以换行符结尾的字节串
+
+    Raises:
+        ValueError: 参数超出取值范围时抛出
+    """
+    if services < 1:
+        raise ValueError(f'services 必须为正数: {services}')
+    if error_ratio + warn_ratio > 1 or min(error_ratio, warn_ratio, corrupt_ratio) < 0:
+        raise ValueError('级别比例必须为非负数且之和不超过 1')
+
+    rng = random.Random(seed)
+    sample_latency = _latency_sampler(rng, latency)
+    names = [f'service-{i:02d}' for i in range(services)]
+    weights = [1 / (i + 1) for i in range(services)]
+
+    for i in range(count):
+        millis = i * 10
+        seconds, millis = divmod(millis, 1000)
+        minutes, seconds = divmod(seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        timestamp = f'2025-01-15T{hours % 24:02d}:{minutes:02d}:{seconds:02d}.{millis:03d}'
+
+        if rng.random() < corrupt_ratio:
+            line = _corrupt_line(rng, timestamp)
+        else:
+            roll = rng.random()
+            level = 'ERROR' if roll < error_ratio else (
+                'WARN' if roll < error_ratio + warn_ratio else 'INFO')
+            service = rng.choices(names, weights)[0]
+            line = (f'{{"timestamp": "{timestamp}", "level": "{level}", '
+                    f'"service": "{service}", "latency_ms": {sample_latency():.1f}, '
+                    f'"msg": "{rng.choice(MESSAGES)}"}}')
+        yield (line + '\n').encode()
+
+
+def write_logs(filepath: str, count: int, **options) -> int:
+    """
+    将合成日志写入文件。
+
+    Args:
+        filepath: 输出路径
+        count: 行数
+        **options: 传给 generate_lines 的其余参数
+
+    Returns:
+        写入的字节数
+    """
+    written = 0
+    with open(filepath, 'wb') as f:
+        for line in generate_lines(count, **options):
+            written += f.write(line)
+    return written
+
+
+def add_generator_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    为解析器添加生成器参数。
+
+    Args:
+        parser: 参数解析器
+    """
+    parser.add_argument('--lines', type=int, default=200000, help='生成行数')
+    parser.add_argument('--services', type=int, default=8, help='服务数量')
+    parser.add_argument('--error-ratio', type=float, default=0.05, help='ERROR 比例')
+    parser.add_argument('--corrupt-ratio', type=float, default=0.001, help='损坏行比例')
+    parser.add_argument('--latency', choices=LATENCY_DISTRIBUTIONS, default='lognormal',
+                        help='延迟分布')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+
+
+def generator_options(args: argparse.Namespace) -> Dict:
+    """
+    从解析结果中提取 generate_lines 的参数。
+
+    Args:
+        args: add_generator_arguments 添加的参数
+
+    Returns:
+        关键字参数字典
+    """
+    return {
+        'services': args.services,
+        'error_ratio': args.error_ratio,
+        'corrupt_ratio': args.corrupt_ratio,
+        'latency': args.latency,
+        'seed': args.seed,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    生成器入口。
+
+    Args:
+        argv: 命令行参数列表
+
+    Returns:
+        退出码
+    """
+    parser = argparse.ArgumentParser(description='生成合成 JSONL 日志')
+    add_generator_arguments(parser)
+    parser.add_argument('--output', '-o', required=True, help='输出文件路径')
+    args = parser.parse_args(argv)
+
+    written = write_logs(args.output, args.lines, **generator_options(args))
+    print(f'已写入 {args.lines} 行（{written} 字节）到 {args.output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
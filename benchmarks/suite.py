@@ -0,0 +1,343 @@
+"""
+端到端基准测试套件
+
+在合成日志上测量解析、分析、报告生成和 CLI 全流程的吞吐量与峰值内存，
+结果写入 JSON 文件，并可与保存的基线比较以发现性能回退。
+
+用法：
+    python -m benchmarks.suite --lines 200000 --output results.json
+    python -m benchmarks.suite --compare baseline.json --threshold 0.15
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.analyzer import LogAnalyzer
+from src.batch import DEFAULT_BATCH_SIZE, RecordBatch, iter_batches
+from src.cli import main as cli_main
+from src.diagnostics import ParseDiagnostics
+from src.filters import RecordFilter
+from src.parser import iter_records, parse_line
+from src.reporter import generate_report
+
+from .generator import add_generator_arguments, generator_options, generate_lines
+
+RESULTS_VERSION = 2
+DEFAULT_THRESHOLD = 0.10
+
+# 基准函数不接受参数，返回本次处理的记录数
+Benchmark = Callable[[], int]
+
+
+class Workload:
+    """
+    基准测试共享的输入数据。
+
+    同一份合成日志同时以内存行列表和临时文件的形式提供，
+    预解析的记录与统计结果供下游阶段的基准直接使用。
+    """
+
+    def __init__(self, directory: str, lines: int, **options):
+        """
+        生成输入数据。
+
+        Args:
+            directory: 存放临时文件的目录
+            lines: 行数
+            **options: 传给 generate_lines 的其余参数
+        """
+        self.lines: List[bytes] = list(generate_lines(lines, **options))
+        self.path = os.path.join(directory, 'bench.jsonl')
+        self.report_path = os.path.join(directory, 'bench.html')
+        with open(self.path, 'wb') as f:
+            f.writelines(self.lines)
+
+        quiet = ParseDiagnostics(stream=None)
+        self.records: List[Dict] = [r for r in (parse_line(l, quiet) for l in self.lines) if r]
+        self.batches: List[RecordBatch] = [
+            RecordBatch.from_records(self.records[i:i + DEFAULT_BATCH_SIZE], keep_messages=True)
+            for i in range(0, len(self.records), DEFAULT_BATCH_SIZE)
+        ]
+        self.analyzer = LogAnalyzer()
+        for record in self.records:
+            self.analyzer.add_record(record)
+        self.stats = self.analyzer.get_stats()
+
+    def benchmarks(self) -> Dict[str, Benchmark]:
+        """
+        返回按名称索引的基准函数。
+
+        Returns:
+            {名称: 基准函数}
+        """
+        return {
+            'parse_line': self.bench_parse_line,
+            'iter_records': self.bench_iter_records,
+            'parse_filtered': self.bench_parse_filtered,
+            'parse_batches': self.bench_parse_batches,
+            'add_record': self.bench_add_record,
+            'add_batch': self.bench_add_batch,
+            'get_stats': self.bench_get_stats,
+            'generate_report': self.bench_generate_report,
+            'cli_main': self.bench_cli_main,
+        }
+
+    def bench_parse_line(self) -> int:
+        """逐行调用 parse_line。"""
+        diagnostics = ParseDiagnostics(stream=None)
+        for line in self.lines:
+            parse_line(line, diagnostics)
+        return len(self.lines)
+
+    def bench_iter_records(self) -> int:
+        """从文件流式解析（iter_records，不保留记录列表）。"""
+        for _ in iter_records(self.path, diagnostics=ParseDiagnostics(stream=None)):
+            pass
+        return len(self.lines)
+
+    def bench_parse_filtered(self) -> int:
+        """从文件流式解析，只保留一个服务（原始行预筛）。"""
+        decoder = RecordFilter(services=['service-00']).wrap(parse_line)
+        for _ in iter_records(self.path, decoder=decoder,
+                              diagnostics=ParseDiagnostics(stream=None)):
+            pass
+        return len(self.lines)
+
+    def bench_parse_batches(self) -> int:
+        """从文件直接解码为列式批次（快速路径，含默认分析器需要的消息列）。"""
+        for _ in iter_batches(self.path, fast=True, diagnostics=ParseDiagnostics(stream=None),
+                              keep_messages=True):
+            pass
+        return len(self.lines)
+
+    def bench_add_record(self) -> int:
+        """将预解析的记录加入新分析器。"""
+        analyzer = LogAnalyzer()
+        for record in self.records:
+            analyzer.add_record(record)
+        return len(self.records)
+
+    def bench_add_batch(self) -> int:
+        """将预构造的列式批次加入新分析器。"""
+        analyzer = LogAnalyzer()
+        for batch in self.batches:
+            analyzer.add_batch(batch)
+        return len(self.records)
+
+    def bench_get_stats(self) -> int:
+        """在未缓存排序结果的分析器上计算统计。"""
+        analyzer = LogAnalyzer.from_state(self.analyzer.to_state())
+        analyzer.get_stats()
+        return len(self.records)
+
+    def bench_generate_report(self) -> int:
+        """根据统计结果生成 HTML 报告。"""
+        generate_report(self.stats, self.report_path)
+        return len(self.records)
+
+    def bench_cli_main(self) -> int:
+        """运行完整的 CLI 流程（丢弃终端输出）。"""
+        sink = io.StringIO()
+        with contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+            code = cli_main(['--input', self.path, '--output', self.report_path])
+        if code != 0:
+            raise RuntimeError(f'cli.main 返回 {code}')
+        return len(self.lines)
+
+
+def measure(benchmark: Benchmark, repeat: int = 3) -> Dict[str, Any]:
+    """
+    测量基准函数的吞吐量与峰值内存。
+
+    计时取多次运行中最快的一次；峰值内存在额外一次运行中用 tracemalloc
+    测量，避免跟踪开销影响计时。
+
+    Args:
+        benchmark: 基准函数
+        repeat: 计时重复次数
+
+    Returns:
+        包含 records、seconds、records_per_sec、peak_memory_bytes 的字典
+    """
+    best = float('inf')
+    records = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        records = benchmark()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        benchmark()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'records': records,
+        'seconds': best,
+        'records_per_sec': records / best if best > 0 else 0.0,
+        'peak_memory_bytes': peak,
+    }
+
+
+def run_suite(lines: int, repeat: int = 3, only: Optional[List[str]] = None,
+              **options) -> Dict[str, Any]:
+    """
+    运行基准测试套件。
+
+    Args:
+        lines: 合成日志行数
+        repeat: 计时重复次数
+        only: 只运行这些名称的基准，None 表示全部
+        **options: 传给 generate_lines 的其余参数
+
+    Returns:
+        可 JSON 序列化的结果字典
+
+    Raises:
+        ValueError: only 中包含未知名称时抛出
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        workload = Workload(directory, lines, **options)
+        benchmarks = workload.benchmarks()
+        unknown = set(only or ()) - set(benchmarks)
+        if unknown:
+            raise ValueError(f'未知的基准: {", ".join(sorted(unknown))}')
+        results = {
+            name: measure(benchmark, repeat)
+            for name, benchmark in benchmarks.items()
+            if only is None or name in only
+        }
+
+    return {
+        'version': RESULTS_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'workload': dict(options, lines=lines),
+        'results': results,
+    }
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any],
+                    threshold: float = DEFAULT_THRESHOLD) -> List[Tuple[str, str, float]]:
+    """
+    与基线比较，找出性能回退。
+
+    吞吐量下降或峰值内存上升超过 threshold（比例）即视为回退；
+    只比较两边都存在的基准。
+
+    Args:
+        current: 本次运行结果
+        baseline: 基线结果
+        threshold: 允许的相对变化
+
+    Returns:
+        [(基准名, 指标名, 相对变化)]，变化为正表示变差
+
+    Raises:
+        ValueError: 结果版本或工作负载（行数、生成参数）不同时抛出，
+            此时吞吐量比值没有意义
+    """
+    if current.get('version') != baseline.get('version'):
+        raise ValueError(f'结果版本不同: {current.get("version")} != {baseline.get("version")}')
+    if current.get('workload') != baseline.get('workload'):
+        raise ValueError(f'工作负载不同: {current.get("workload")} != {baseline.get("workload")}')
+    regressions = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        if base['records_per_sec'] > 0:
+            change = 1 - result['records_per_sec'] / base['records_per_sec']
+            if change > threshold:
+                regressions.append((name, 'records_per_sec', change))
+        if base['peak_memory_bytes'] > 0:
+            change = result['peak_memory_bytes'] / base['peak_memory_bytes'] - 1
+            if change > threshold:
+                regressions.append((name, 'peak_memory_bytes', change))
+    return regressions
+
+
+def format_results(results: Dict[str, Any],
+                   baseline: Optional[Dict[str, Any]] = None) -> str:
+    """
+    格式化结果表格。
+
+    Args:
+        results: run_suite 的结果
+        baseline: 可选的基线结果，提供时附带吞吐量倍数
+
+    Returns:
+        多行文本
+    """
+    rows = []
+    for name, result in results['results'].items():
+        row = (f'{name:<16} {result["records_per_sec"]:>14,.0f} records/s  '
+               f'{result["peak_memory_bytes"] / 1048576:>9.1f} MiB peak')
+        base = (baseline or {}).get('results', {}).get(name)
+        if base and base['records_per_sec'] > 0:
+            row += f'  ({result["records_per_sec"] / base["records_per_sec"]:.2f}x)'
+        rows.append(row)
+    return '\n'.join(rows)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    基准测试套件入口。
+
+    Args:
+        argv: 命令行参数列表
+
+    Returns:
+        退出码：成功 0，存在回退 1，基线不可比较 2
+    """
+    parser = argparse.ArgumentParser(description='端到端基准测试套件')
+    add_generator_arguments(parser)
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数')
+    parser.add_argument('--only', nargs='+', help='只运行指定名称的基准')
+    parser.add_argument('--output', '-o', help='结果 JSON 输出路径')
+    parser.add_argument('--compare', metavar='BASELINE', help='与基线 JSON 比较')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='判定回退的相对变化（默认 0.10）')
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.lines, args.repeat, args.only, **generator_options(args))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    if baseline is None:
+        print(format_results(results))
+        return 0
+    try:
+        regressions = compare_results(results, baseline, args.threshold)
+    except ValueError as e:
+        # 不同工作负载的倍数没有意义，只输出本次结果
+        print(format_results(results))
+        print(f'[ERROR] 无法与基线比较: {e}', file=sys.stderr)
+        return 2
+
+    print(format_results(results, baseline))
+    for name, metric, change in regressions:
+        print(f'[REGRESSION] {name} {metric} 变差 {change:.1%}', file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
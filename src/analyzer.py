@@ -1,28 +1,60 @@
 """
 流式分析引擎模块
 
-计算统计指标：错误率、各服务 P99 延迟、日志总数。
+计算统计指标：错误率、各服务 P99 延迟与错误/警告率、日志总数，
+有界内存的高频 (服务, 级别, 消息) 组合，以及可选的按时间间隔的延迟序列。
+安装了 NumPy 时，列式批次的按服务分组和延迟排序使用向量化实现；
+否则使用标准库实现，两者的统计结果逐位一致。
 """
 
-from collections import defaultdict
-from typing import Dict, List, Any
+from array import array
+from collections import Counter, defaultdict
+from functools import partial
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Sequence
 
+try:
+    import numpy
+except ImportError:  # NumPy 是可选依赖
+    numpy = None
 
-def percentile(data: List[float], p: float) -> float:
+from .heavy_hitters import SpaceSaving, message_label
+from .series import LatencySeries
+from .sketch import LogBucketSketch, DEFAULT_RELATIVE_ACCURACY, quantile_key
+from .window import TimeWindow
+
+if TYPE_CHECKING:
+    from .batch import RecordBatch
+
+# 精度模式：exact 保存全部延迟，sketch 使用常量内存的对数分桶草图
+MODE_EXACT = 'exact'
+MODE_SKETCH = 'sketch'
+
+
+DEFAULT_QUANTILES = (50.0, 99.0)
+
+# 计入警告率的级别
+WARN_LEVELS = ('WARN', 'WARNING')
+
+# 默认报告的高频消息数；每个报告项分配 MESSAGE_COUNTERS_PER_ENTRY 个计数器，
+# 计数器越多，近似计数越准确
+DEFAULT_TOP_MESSAGES = 20
+MESSAGE_COUNTERS_PER_ENTRY = 50
+
+# 少于该数量的数据使用标准库实现，NumPy 的调用开销不划算
+NUMPY_MIN_SIZE = 1024
+
+
+def _interpolate(sorted_data: Sequence[float], p: float) -> float:
     """
-    计算百分位数。
+    在已排序数据上按线性插值取百分位数。
 
     Args:
-        data: 已排序的数据列表
+        sorted_data: 已排序的非空数据列表
         p: 百分位数（0-100）
 
     Returns:
         对应百分位的值
     """
-    if not data:
-        return 0.0
-
-    sorted_data = sorted(data)
     n = len(sorted_data)
 
     # 计算索引位置
@@ -38,18 +70,175 @@ def percentile(data: List[float], p: float) -> float:
     return sorted_data[lower] * (1 - weight) + sorted_data[upper] * weight
 
 
+def percentile(data: List[float], p: float) -> float:
+    """
+    计算百分位数。
+
+    Args:
+        data: 数据列表（无需预先排序）
+        p: 百分位数（0-100）
+
+    Returns:
+        对应百分位的值
+    """
+    if not data:
+        return 0.0
+
+    return _interpolate(sorted(data), p)
+
+
+def percentiles(data: Sequence[float], ps: Sequence[float],
+                presorted: bool = False) -> List[float]:
+    """
+    一次排序计算多个百分位数。
+
+    Args:
+        data: 数据序列（list 或 array）
+        ps: 百分位数列表（0-100）
+        presorted: data 已排序时为 True，跳过排序
+
+    Returns:
+        与 ps 顺序对应的百分位值；data 为空时全部为 0
+    """
+    if not data:
+        return [0.0] * len(ps)
+
+    sorted_data = data if presorted else sorted(data)
+    return [_interpolate(sorted_data, p) for p in ps]
+
+
+def _validate_quantiles(quantiles: Sequence[float]) -> List[float]:
+    """
+    校验百分位数列表。
+
+    Args:
+        quantiles: 百分位数列表（0-100）
+
+    Returns:
+        转换为 float 的列表
+
+    Raises:
+        ValueError: 列表为空或存在超出 0-100 的值时抛出
+    """
+    result = [float(p) for p in quantiles]
+    if not result:
+        raise ValueError('百分位数列表不能为空')
+    for p in result:
+        if not 0 <= p <= 100:
+            raise ValueError(f'百分位数必须在 0-100 之间: {p:g}')
+    return result
+
+
+def _rate(count: int, total: int) -> float:
+    """
+    计算百分比，保留两位小数。
+
+    Args:
+        count: 计数
+        total: 总数
+
+    Returns:
+        百分比；total 为 0 时返回 0
+    """
+    return round(count / total * 100, 2) if total else 0.0
+
+
+def _sorted_array(values: 'array[float]') -> 'array[float]':
+    """
+    返回排序后的新数组。
+
+    安装了 NumPy 时使用稳定排序，与 sorted() 对相等值（如 0.0 与 -0.0）
+    保持相同的先后顺序；含 NaN 时两者顺序不同，回退到 sorted()。
+
+    Args:
+        values: 延迟数组
+
+    Returns:
+        有序的 array('d')
+    """
+    if numpy is not None and len(values) >= NUMPY_MIN_SIZE:
+        data = numpy.frombuffer(values, dtype=numpy.float64)
+        if not numpy.isnan(data).any():
+            return array('d', numpy.sort(data, kind='stable').tobytes())
+    return array('d', sorted(values))
+
+
 class LogAnalyzer:
     """
     流式日志分析器。
 
     支持 add_record() 逐条处理和 get_stats() 获取统计结果。
+    默认 exact 模式把全部延迟保存在紧凑的 array('d') 中并精确计算分位数；
+    sketch 模式下每个服务
+    使用 LogBucketSketch，内存不随日志量增长，分位数满足相对误差上界。
+    高频消息用 SpaceSaving 计数，内存只取决于 top_messages。
+    配置 series_interval 时额外维护按时间间隔的 LatencySeries。
     """
 
-    def __init__(self):
-        """初始化分析器。"""
+    __slots__ = (
+        'mode', 'relative_accuracy', 'window', 'series', 'top_messages',
+        '_total_logs', '_error_count',
+        '_service_latencies', '_service_sketches', '_sorted_lengths',
+        '_service_errors', '_service_warnings', '_messages',
+    )
+
+    def __init__(self, mode: str = MODE_EXACT,
+                 relative_accuracy: Optional[float] = None,
+                 time_window: Optional[float] = None,
+                 window_bucket_seconds: Optional[float] = None,
+                 top_messages: int = DEFAULT_TOP_MESSAGES,
+                 series_interval: Optional[float] = None):
+        """
+        初始化分析器。
+
+        Args:
+            mode: 精度模式，'exact' 或 'sketch'
+            relative_accuracy: sketch 模式的相对误差上界，None 时使用默认值
+            time_window: 时间窗口长度（秒），设置后额外维护 TimeWindow
+            window_bucket_seconds: 时间窗口每个桶的秒数，None 时自动选择
+            top_messages: 报告的高频 (服务, 级别, 消息) 组合数，0 表示不统计
+            series_interval: 延迟序列的初始间隔（秒），设置后额外维护 LatencySeries
+
+        Raises:
+            ValueError: 模式未知、relative_accuracy 不在 (0, 1) 之间、top_messages 为负数
+                或序列间隔不为正数时抛出
+        """
+        if mode not in (MODE_EXACT, MODE_SKETCH):
+            raise ValueError(f'未知的精度模式: {mode}')
+        if relative_accuracy is not None and not 0 < relative_accuracy < 1:
+            raise ValueError(f'relative_accuracy 必须在 (0, 1) 之间: {relative_accuracy}')
+        if top_messages < 0:
+            raise ValueError(f'top_messages 不能为负数: {top_messages}')
+
+        self.mode = mode
+        self.relative_accuracy = (
+            relative_accuracy if relative_accuracy is not None
+            else DEFAULT_RELATIVE_ACCURACY
+        )
         self._total_logs: int = 0
         self._error_count: int = 0
-        self._service_latencies: Dict[str, List[float]] = defaultdict(list)
+        # exact 模式下延迟保存在 array('d') 中，每个值 8 字节，避免装箱的 float 对象
+        self._service_latencies: Dict[str, 'array[float]'] = defaultdict(partial(array, 'd'))
+        self._service_sketches: Dict[str, LogBucketSketch] = {}
+        # 各服务上次排序时的长度；长度未变说明列表仍然有序
+        self._sorted_lengths: Dict[str, int] = {}
+        self._service_errors: Dict[str, int] = defaultdict(int)
+        self._service_warnings: Dict[str, int] = defaultdict(int)
+        self.top_messages = top_messages
+        self._messages: Optional[SpaceSaving] = None
+        if top_messages:
+            self._messages = SpaceSaving(top_messages * MESSAGE_COUNTERS_PER_ENTRY)
+        self.window: Optional[TimeWindow] = None
+        if time_window is not None:
+            self.window = TimeWindow(time_window, window_bucket_seconds, self.relative_accuracy)
+        self.series: Optional[LatencySeries] = None
+        if series_interval is not None:
+            self.series = LatencySeries(series_interval, relative_accuracy=self.relative_accuracy)
+
+    @property
+    def needs_time(self) -> bool:
+        """是否需要记录的 timestamp 与 level（时间窗口或延迟序列）。"""
+        return self.window is not None or self.series is not None
 
     def add_record(self, record: Dict[str, Any]) -> None:
         """
@@ -57,29 +246,316 @@ class LogAnalyzer:
 
         Args:
             record: 包含日志字段的字典，需包含 level, service, latency_ms 字段
+
+        Raises:
+            ValueError: latency_ms 不能转换为数值时抛出（统计保持不变）
+            TypeError: latency_ms 或 service 类型无效时抛出（统计保持不变）
         """
-        self._total_logs += 1
+        service = record.get('service', 'unknown')
+        level = record.get('level')
+        # 先完成可能失败的转换与哈希，无效记录抛出异常时不改变任何统计
+        latency = float(record.get('latency_ms', 0))
+        hash(service)
 
-        # 统计错误数（ERROR 级别）
-        if record.get('level') == 'ERROR':
+        self._total_logs += 1
+        # 统计错误数（ERROR 级别）与各服务的错误、警告数
+        if level == 'ERROR':
             self._error_count += 1
+            self._service_errors[service] += 1
+        elif level in WARN_LEVELS:
+            self._service_warnings[service] += 1
+
+        if self._messages is not None:
+            self._messages.add((service, message_label(level), message_label(record.get('msg'))))
 
         # 按服务收集延迟数据
-        service = record.get('service', 'unknown')
-        latency = record.get('latency_ms', 0)
-        self._service_latencies[service].append(float(latency))
+        if self.mode == MODE_SKETCH:
+            sketch = self._service_sketches.get(service)
+            if sketch is None:
+                sketch = LogBucketSketch(self.relative_accuracy)
+                self._service_sketches[service] = sketch
+            sketch.add(latency)
+        else:
+            self._service_latencies[service].append(latency)
+
+        if self.window is not None:
+            self.window.add(record.get('timestamp'), level, service, latency)
+        if self.series is not None:
+            self.series.add(record.get('timestamp'), level, service, latency)
+
+    def add_batch(self, batch: 'RecordBatch') -> None:
+        """
+        添加一批列式记录，结果与按相同顺序逐条调用 add_record() 一致。
+
+        exact 模式下安装了 NumPy 时，按服务编号稳定排序后整段追加延迟，
+        每个服务内部保持记录顺序。高频消息先在批内聚合再按次数加入摘要；
+        不同组合不超过计数器数量时计数与逐条处理相同，否则满足相同的误差上界。
+
+        Args:
+            batch: batch.RecordBatch；配置了时间窗口或延迟序列时须包含 levels 和
+                timestamps，统计高频消息时须包含 messages
+
+        Raises:
+            ValueError: 批次缺少分析器配置所需的列时抛出
+        """
+        count = len(batch)
+        if not count:
+            return
+        if self.needs_time and batch.timestamps is None:
+            raise ValueError('分析器配置了时间窗口或延迟序列，批次必须包含 levels 和 timestamps')
+        if self._messages is not None and batch.messages is None:
+            raise ValueError('分析器统计高频消息，批次必须包含 messages')
 
-    def get_stats(self) -> Dict[str, Any]:
+        self._total_logs += count
+        services = batch.services
+        for service, errors, warnings in zip(services, batch.errors, batch.warnings):
+            if errors:
+                self._error_count += errors
+                self._service_errors[service] += errors
+            if warnings:
+                self._service_warnings[service] += warnings
+
+        if self._messages is not None:
+            add = self._messages.add
+            for (service_id, (level, msg)), times in Counter(
+                    zip(batch.service_ids, batch.messages)).items():
+                add((services[service_id], level, msg), times)
+
+        if self.mode == MODE_SKETCH:
+            sketches = []
+            for service in services:
+                sketch = self._service_sketches.get(service)
+                if sketch is None:
+                    sketch = LogBucketSketch(self.relative_accuracy)
+                    self._service_sketches[service] = sketch
+                sketches.append(sketch.add)
+            for service_id, latency in zip(batch.service_ids, batch.latencies):
+                sketches[service_id](latency)
+        else:
+            # 按批内首次出现顺序创建各服务的数组，与逐条处理的字典顺序一致
+            targets = [self._service_latencies[service] for service in services]
+            if numpy is not None and count >= NUMPY_MIN_SIZE:
+                ids = numpy.frombuffer(batch.service_ids, dtype=f'i{batch.service_ids.itemsize}')
+                order = numpy.argsort(ids, kind='stable')
+                grouped = numpy.frombuffer(batch.latencies, dtype=numpy.float64)[order]
+                sizes = numpy.bincount(ids, minlength=len(services)).tolist()
+                position = 0
+                for target, size in zip(targets, sizes):
+                    target.frombytes(grouped[position:position + size].tobytes())
+                    position += size
+            else:
+                appends = [target.append for target in targets]
+                for service_id, latency in zip(batch.service_ids, batch.latencies):
+                    appends[service_id](latency)
+
+        if self.window is not None:
+            add = self.window.add
+            for service_id, latency, level, timestamp in zip(
+                    batch.service_ids, batch.latencies, batch.levels, batch.timestamps):
+                add(timestamp, level, services[service_id], latency)
+        if self.series is not None:
+            self.series.add_columns(services, batch.service_ids, batch.latencies,
+                                    batch.levels, batch.timestamps)
+
+    def config(self) -> Dict[str, Any]:
+        """
+        返回构造参数，可用 LogAnalyzer(**config) 创建配置相同的空分析器。
+
+        Returns:
+            构造参数字典
+        """
+        return {
+            'mode': self.mode,
+            'relative_accuracy': self.relative_accuracy,
+            'time_window': self.window.window_seconds if self.window is not None else None,
+            'window_bucket_seconds': (
+                self.window.bucket_seconds if self.window is not None else None
+            ),
+            'top_messages': self.top_messages,
+            'series_interval': (
+                self.series.base_interval if self.series is not None else None
+            ),
+        }
+
+    def is_compatible(self, other: 'LogAnalyzer') -> bool:
+        """
+        判断另一个分析器能否与当前分析器合并。
+
+        Args:
+            other: 另一个分析器
+
+        Returns:
+            精度模式、时间窗口、高频消息与延迟序列配置均相同时返回 True
+        """
+        return self.config() == other.config()
+
+    @property
+    def total_logs(self) -> int:
+        """已处理的日志总数。"""
+        return self._total_logs
+
+    def merge(self, other: 'LogAnalyzer') -> None:
+        """
+        将另一个分析器的状态合并到当前分析器。
+
+        exact 模式下合并后的延迟统计与顺序处理全部记录完全一致；
+        sketch 模式下仍满足相同的相对误差上界。高频消息计数仍是真实次数的上界。
+
+        Args:
+            other: 配置相同的分析器（见 is_compatible()）
+
+        Raises:
+            ValueError: 配置不一致时抛出
+        """
+        if not self.is_compatible(other):
+            raise ValueError('只能合并精度模式、时间窗口、高频消息和延迟序列配置相同的分析器')
+
+        self._total_logs += other._total_logs
+        self._error_count += other._error_count
+        for service, errors in other._service_errors.items():
+            self._service_errors[service] += errors
+        for service, warnings in other._service_warnings.items():
+            self._service_warnings[service] += warnings
+        if self._messages is not None:
+            self._messages.merge(other._messages)
+        for service, latencies in other._service_latencies.items():
+            self._service_latencies[service].extend(latencies)
+        for service, sketch in other._service_sketches.items():
+            own = self._service_sketches.get(service)
+            if own is None:
+                own = LogBucketSketch(self.relative_accuracy)
+                self._service_sketches[service] = own
+            own.merge(sketch)
+        if self.window is not None:
+            self.window.merge(other.window)
+        if self.series is not None:
+            self.series.merge(other.series)
+
+    def get_window_stats(self, quantiles: Optional[Sequence[float]] = None) -> Dict[str, Any]:
+        """
+        获取时间窗口内的统计结果。
+
+        Args:
+            quantiles: 百分位数列表（0-100），默认 [50, 99]
+
+        Returns:
+            与 get_stats() 结构相同的字典，额外包含 window 字段
+
+        Raises:
+            ValueError: 未配置时间窗口或百分位数超出 0-100 时抛出
+        """
+        if self.window is None:
+            raise ValueError('分析器未配置时间窗口')
+        return self.window.get_stats(_validate_quantiles(
+            DEFAULT_QUANTILES if quantiles is None else quantiles
+        ))
+
+    def to_state(self) -> Dict[str, Any]:
+        """
+        导出可 JSON 序列化的分析器状态。
+
+        Returns:
+            状态字典，可通过 from_state() 恢复
+        """
+        if self.mode == MODE_SKETCH:
+            services = {
+                service: sketch.to_state()
+                for service, sketch in self._service_sketches.items()
+            }
+        else:
+            services = {
+                service: latencies.tolist()
+                for service, latencies in self._service_latencies.items()
+            }
+        return {
+            'mode': self.mode,
+            'relative_accuracy': self.relative_accuracy,
+            'total_logs': self._total_logs,
+            'error_count': self._error_count,
+            'services': services,
+            'service_errors': dict(self._service_errors),
+            'service_warnings': dict(self._service_warnings),
+            'top_messages': self.top_messages,
+            'messages': self._messages.to_state() if self._messages is not None else None,
+            'window': self.window.to_state() if self.window is not None else None,
+            'series': self.series.to_state() if self.series is not None else None,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'LogAnalyzer':
+        """
+        从 to_state() 导出的状态恢复分析器。
+
+        Args:
+            state: 状态字典
+
+        Returns:
+            恢复后的分析器
+        """
+        analyzer = cls(mode=state['mode'], relative_accuracy=state['relative_accuracy'],
+                       top_messages=state.get('top_messages', 0))
+        analyzer._total_logs = state['total_logs']
+        analyzer._error_count = state['error_count']
+        analyzer._service_errors.update(state.get('service_errors', {}))
+        analyzer._service_warnings.update(state.get('service_warnings', {}))
+        if state.get('messages') is not None:
+            analyzer._messages = SpaceSaving.from_state(state['messages'])
+        for service, data in state['services'].items():
+            if analyzer.mode == MODE_SKETCH:
+                analyzer._service_sketches[service] = LogBucketSketch.from_state(data)
+            else:
+                analyzer._service_latencies[service] = array('d', data)
+        if state.get('window') is not None:
+            analyzer.window = TimeWindow.from_state(state['window'])
+        if state.get('series') is not None:
+            analyzer.series = LatencySeries.from_state(state['series'])
+        return analyzer
+
+    def get_accuracy(self) -> Dict[str, Any]:
+        """
+        返回当前使用的精度模式说明。
+
+        Returns:
+            包含 mode 的字典，sketch 模式下额外包含 relative_accuracy
+        """
+        if self.mode == MODE_SKETCH:
+            return {'mode': MODE_SKETCH, 'relative_accuracy': self.relative_accuracy}
+        return {'mode': MODE_EXACT}
+
+    def get_stats(self, quantiles: Optional[Sequence[float]] = None) -> Dict[str, Any]:
         """
         获取统计结果。
 
+        每个服务的延迟只排序一次，所有百分位数与 min/max 都从同一份
+        有序数据中读取，增加百分位数不会增加排序次数。排序在原列表上
+        进行，重复调用时未变化的服务不再排序，新增数据较少时 Timsort
+        只需合并有序前缀与新追加的部分。
+
+        Args:
+            quantiles: 需要计算的百分位数列表（0-100），默认 [50, 99]
+
         Returns:
             包含统计指标的字典：
             - total_logs: 日志总数
             - error_count: 错误数
             - error_rate: 错误率（百分比）
-            - services: 各服务的延迟统计
+            - services: 各服务的统计，键为 count/min/max、p50、p99.9 等延迟统计，
+              以及 error_count/error_rate/warn_count/warn_rate（百分比）
+            - top_messages: 按次数降序的高频 (服务, 级别, 消息) 组合，每项包含
+              service/level/msg/count/overcount，真实次数在 [count - overcount, count]
+              之间；top_messages 为 0 时没有该字段
+            - series: 配置了延迟序列时为 LatencySeries.get_series() 的结果
+            - quantiles: 计算的百分位数列表
+            - accuracy: 分位数的精度模式
+
+        Raises:
+            ValueError: 百分位数超出 0-100 时抛出
         """
+        quantiles = _validate_quantiles(
+            DEFAULT_QUANTILES if quantiles is None else quantiles
+        )
+        keys = [quantile_key(p) for p in quantiles]
+
         # 计算错误率
         error_rate = 0.0
         if self._total_logs > 0:
@@ -89,17 +565,61 @@ class LogAnalyzer:
         services_stats = {}
         for service, latencies in self._service_latencies.items():
             if latencies:
-                services_stats[service] = {
-                    'count': len(latencies),
-                    'p50': percentile(latencies, 50),
-                    'p99': percentile(latencies, 99),
-                    'min': min(latencies),
-                    'max': max(latencies)
-                }
+                if self._sorted_lengths.get(service) != len(latencies):
+                    # array 不支持原地排序；排序后替换为有序的 array，
+                    # 下次调用时未变化的服务无需再排序
+                    latencies = _sorted_array(latencies)
+                    self._service_latencies[service] = latencies
+                    self._sorted_lengths[service] = len(latencies)
+                sorted_latencies = latencies
+                service_stats = {'count': len(sorted_latencies)}
+                service_stats.update(zip(
+                    keys, percentiles(sorted_latencies, quantiles, presorted=True)
+                ))
+                service_stats['min'] = sorted_latencies[0]
+                service_stats['max'] = sorted_latencies[-1]
+                self._add_level_stats(service, service_stats)
+                services_stats[service] = service_stats
+        for service, sketch in self._service_sketches.items():
+            service_stats = {'count': sketch.count}
+            service_stats.update(zip(
+                keys, sketch.quantiles([p / 100 for p in quantiles])
+            ))
+            service_stats['min'] = sketch.min
+            service_stats['max'] = sketch.max
+            self._add_level_stats(service, service_stats)
+            services_stats[service] = service_stats
 
-        return {
+        stats = {
             'total_logs': self._total_logs,
             'error_count': self._error_count,
             'error_rate': round(error_rate, 2),
-            'services': services_stats
+            'services': services_stats,
+            'quantiles': quantiles,
+            'accuracy': self.get_accuracy()
         }
+        if self._messages is not None:
+            stats['top_messages'] = [
+                {'service': service, 'level': level, 'msg': msg,
+                 'count': count, 'overcount': overcount}
+                for (service, level, msg), count, overcount
+                in self._messages.top(self.top_messages)
+            ]
+        if self.series is not None:
+            stats['series'] = self.series.get_series(quantiles)
+        return stats
+
+    def _add_level_stats(self, service: str, service_stats: Dict[str, Any]) -> None:
+        """
+        在服务统计中加入错误与警告的数量和比例。
+
+        Args:
+            service: 服务名称
+            service_stats: 已包含 count 的服务统计
+        """
+        errors = self._service_errors.get(service, 0)
+        warnings = self._service_warnings.get(service, 0)
+        service_stats['error_count'] = errors
+        service_stats['error_rate'] = _rate(errors, service_stats['count'])
+        service_stats['warn_count'] = warnings
+        service_stats['warn_rate'] = _rate(warnings, service_stats['count'])
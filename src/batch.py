@@ -0,0 +1,252 @@
+"""
+列式批处理模块
+
+把 JSONL 行解码为按列存放的批次（服务编号、延迟、各服务的错误与警告数，
+以及时间窗口需要的级别和时间戳、高频消息统计需要的级别和消息），
+由 LogAnalyzer.add_batch() 一次加入，省去每条记录的字典构造和
+add_record() 调用。快速解码时直接在原始字节上用 fastpath
+的正则提取各列，不构造中间字典；快速路径无法处理的行回退到 parse_line()，
+因此统计结果与逐条处理完全一致。
+"""
+
+import sys
+import time
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .analyzer import WARN_LEVELS
+from .diagnostics import ParseDiagnostics
+from .fastpath import FAST_LINE
+from .filters import RecordFilter
+from .heavy_hitters import message_label
+from .parser import parse_line
+from .reader import open_lines
+
+DEFAULT_BATCH_SIZE = 8192
+
+
+class RecordBatch:
+    """
+    一批按列存放的记录。
+
+    service_ids[i] 是第 i 条记录的服务在 services 中的下标，services 按批内
+    首次出现的顺序排列且不重复，errors 与 warnings 是各服务的错误和警告数。
+    levels 与 timestamps 只在 keep_time 时填充；messages 只在 keep_messages
+    时填充，每项为转换为字符串的 (级别, 消息)。未填充的列为 None。
+    """
+
+    __slots__ = ('services', 'service_ids', 'latencies', 'errors', 'warnings',
+                 'levels', 'timestamps', 'messages')
+
+    def __init__(self, keep_time: bool = False, keep_messages: bool = False):
+        """
+        创建空批次。
+
+        Args:
+            keep_time: 是否保存级别和时间戳列（时间窗口需要）
+            keep_messages: 是否保存 (级别, 消息) 列（高频消息统计需要）
+        """
+        self.services: List[Any] = []
+        self.service_ids = array('i')
+        self.latencies = array('d')
+        self.errors: List[int] = []
+        self.warnings: List[int] = []
+        self.levels: Optional[List[Any]] = [] if keep_time else None
+        self.timestamps: Optional[List[Any]] = [] if keep_time else None
+        self.messages: Optional[List[Tuple[str, str]]] = [] if keep_messages else None
+
+    def __len__(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def error_count(self) -> int:
+        """批次中 ERROR 级别的记录数。"""
+        return sum(self.errors)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]], keep_time: bool = False,
+                     keep_messages: bool = False) -> 'RecordBatch':
+        """
+        由记录字典构造批次，字段取值方式与 LogAnalyzer.add_record() 相同。
+
+        Args:
+            records: 记录迭代器
+            keep_time: 是否保存级别和时间戳列
+            keep_messages: 是否保存 (级别, 消息) 列
+
+        Returns:
+            批次
+        """
+        batch = cls(keep_time, keep_messages)
+        ids: Dict[Any, int] = {}
+        for record in records:
+            batch.append(record, ids)
+        return batch
+
+    def add_service(self, service: Any, ids: Dict[Any, int]) -> int:
+        """
+        登记批内新出现的服务。
+
+        Args:
+            service: 服务名
+            ids: 本批次的服务名到编号的映射
+
+        Returns:
+            服务编号
+        """
+        service_id = ids[service] = len(self.services)
+        self.services.append(service)
+        self.errors.append(0)
+        self.warnings.append(0)
+        return service_id
+
+    def append(self, record: Dict[str, Any], ids: Dict[Any, int]) -> None:
+        """
+        追加一条记录。
+
+        Args:
+            record: 记录字典
+            ids: 本批次的服务名到编号的映射，由调用方在整个批次中复用
+        """
+        service = record.get('service', 'unknown')
+        service_id = ids.get(service)
+        if service_id is None:
+            service_id = self.add_service(service, ids)
+        self.service_ids.append(service_id)
+        self.latencies.append(float(record.get('latency_ms', 0)))
+        level = record.get('level')
+        if level == 'ERROR':
+            self.errors[service_id] += 1
+        elif level in WARN_LEVELS:
+            self.warnings[service_id] += 1
+        if self.levels is not None:
+            self.levels.append(level)
+            self.timestamps.append(record.get('timestamp'))
+        if self.messages is not None:
+            self.messages.append((message_label(level), message_label(record.get('msg'))))
+
+
+def iter_batches(filepath: str, start: int = 0, end: Optional[int] = None,
+                 fast: bool = False, diagnostics: Optional[ParseDiagnostics] = None,
+                 record_filter: Optional[RecordFilter] = None, keep_time: bool = False,
+                 keep_messages: bool = False, batch_size: int = DEFAULT_BATCH_SIZE,
+                 timings: Optional[Dict[str, float]] = None) -> Iterator[RecordBatch]:
+    """
+    逐批产出 JSONL 文件中有效记录的列式批次。
+
+    参数语义与 parser.iter_records() 相同：可以只处理 [start, end) 内开始的行，
+    诊断信息记录行号与字节偏移。
+    提供 timings 时把解码耗时（正则提取字段与 parse_line() 回退，不含读取、
+    预筛和写入列）累计到 timings['decode']，每次产出批次前更新，
+    供剖析时把读取与解码分开。
+
+    Args:
+        filepath: JSONL 文件路径，"-" 表示标准输入
+        start: 起始字节偏移，必须位于行首
+        end: 结束字节偏移，None 表示读到文件末尾
+        fast: 是否在原始字节上直接提取字段（结果与 parse_line() 一致）
+        diagnostics: 诊断收集器
+        record_filter: 记录过滤器，None 表示不过滤
+        keep_time: 是否保存级别和时间戳列
+        keep_messages: 是否保存 (级别, 消息) 列
+        batch_size: 每批的最大记录数
+        timings: 解码耗时累计字典，None 表示不计时
+
+    Yields:
+        非空批次
+
+    Raises:
+        FileNotFoundError: 文件不存在时抛出（在首次迭代时）
+    """
+    fullmatch = FAST_LINE.fullmatch if fast else None
+    may_match = record_filter.may_match if record_filter is not None else None
+    matches = record_filter.matches if record_filter is not None else None
+    # 原始字节到字符串的缓存；服务名和级别的基数很低，跨批次复用
+    names: Dict[bytes, str] = {}
+
+    batch = RecordBatch(keep_time, keep_messages)
+    ids: Dict[Any, int] = {}
+    byte_ids: Dict[bytes, int] = {}
+    clock = time.perf_counter if timings is not None else None
+    decode_seconds = 0.0
+    started = 0.0
+
+    with open_lines(filepath, start) as lines:
+        position = start
+        line_number = 0 if start == 0 else None
+        for line in lines:
+            if end is not None and position >= end:
+                break
+            if diagnostics is not None:
+                diagnostics.offset = position
+                if line_number is not None:
+                    line_number += 1
+                    diagnostics.line_number = line_number
+            position += len(line)
+            if may_match is not None and not may_match(line):
+                continue
+
+            if clock is not None:
+                started = clock()
+            match = fullmatch(line) if fullmatch is not None else None
+            if match is not None:
+                timestamp, level, service, number, _, _, msg = match.groups()
+                try:
+                    if not line.isascii():
+                        # 与 parse_line_fast 一致：任一字符串字段不是合法 UTF-8 时回退
+                        timestamp.decode('utf-8')
+                        msg.decode('utf-8')
+                    level_name = names.get(level)
+                    if level_name is None:
+                        level_name = names[level] = sys.intern(level.decode('utf-8'))
+                    service_name = names.get(service)
+                    if service_name is None:
+                        service_name = names[service] = sys.intern(service.decode('utf-8'))
+                except UnicodeDecodeError:
+                    match = None
+
+            if match is not None:
+                if clock is not None:
+                    decode_seconds += clock() - started
+                if matches is not None and not matches({
+                        'service': service_name, 'level': level_name,
+                        'timestamp': timestamp.decode('utf-8')}):
+                    continue
+                service_id = byte_ids.get(service)
+                if service_id is None:
+                    service_id = ids.get(service_name)
+                    if service_id is None:
+                        service_id = batch.add_service(service_name, ids)
+                    byte_ids[service] = service_id
+                batch.service_ids.append(service_id)
+                batch.latencies.append(float(number))
+                if level_name == 'ERROR':
+                    batch.errors[service_id] += 1
+                elif level_name in WARN_LEVELS:
+                    batch.warnings[service_id] += 1
+                if keep_time:
+                    batch.levels.append(level_name)
+                    batch.timestamps.append(timestamp.decode('utf-8'))
+                if keep_messages:
+                    batch.messages.append((level_name, msg.decode('utf-8')))
+            else:
+                record = parse_line(line, diagnostics)
+                if clock is not None:
+                    decode_seconds += clock() - started
+                if record is None or (matches is not None and not matches(record)):
+                    continue
+                batch.append(record, ids)
+
+            if len(batch.latencies) >= batch_size:
+                if timings is not None:
+                    timings['decode'] = timings.get('decode', 0.0) + decode_seconds
+                    decode_seconds = 0.0
+                yield batch
+                batch = RecordBatch(keep_time, keep_messages)
+                ids = {}
+                byte_ids = {}
+
+    if timings is not None:
+        timings['decode'] = timings.get('decode', 0.0) + decode_seconds
+    if len(batch.latencies):
+        yield batch
@@ -0,0 +1,209 @@
+"""
+检查点模块
+
+为只追加写入的日志文件保存分析进度：字节偏移、文件身份指纹和序列化的
+LogAnalyzer 状态。之后的运行从偏移处继续，只处理新增数据；文件被替换
+或截断、分析配置或过滤条件改变时回退到全量扫描。
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional, Tuple
+
+from .analyzer import LogAnalyzer
+from .diagnostics import ParseDiagnostics
+from .filters import RecordFilter
+
+# 版本 2 起分析器状态包含各服务的错误/警告数与高频消息；
+# 版本 3 起记录过滤条件（更早的检查点无法确认过滤条件，按失效处理）
+CHECKPOINT_VERSION = 3
+# 用于识别文件内容的头部字节数
+FINGERPRINT_HEAD_BYTES = 4096
+
+
+def file_fingerprint(filepath: str, head_bytes: int = FINGERPRINT_HEAD_BYTES) -> Dict[str, Any]:
+    """
+    计算文件身份指纹。
+
+    Args:
+        filepath: 文件路径
+        head_bytes: 参与哈希的头部字节数
+
+    Returns:
+        包含 device、inode、size、head_length、head_sha256 的字典
+
+    Raises:
+        FileNotFoundError: 文件不存在时抛出
+    """
+    with open(filepath, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        head = f.read(head_bytes)
+    return {
+        'device': stat.st_dev,
+        'inode': stat.st_ino,
+        'size': stat.st_size,
+        'head_length': len(head),
+        'head_sha256': hashlib.sha256(head).hexdigest(),
+    }
+
+
+def complete_lines_end(filepath: str, start: int = 0) -> int:
+    """
+    返回最后一个完整行（以换行结尾）之后的字节偏移。
+
+    正在写入的不完整末尾行不会被处理，留给下一次运行。
+
+    Args:
+        filepath: 文件路径
+        start: 不早于该偏移
+
+    Returns:
+        字节偏移
+    """
+    block_size = 1 << 16
+    with open(filepath, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        while position > start:
+            read_from = max(start, position - block_size)
+            f.seek(read_from)
+            block = f.read(position - read_from)
+            newline = block.rfind(b'\n')
+            if newline >= 0:
+                return read_from + newline + 1
+            position = read_from
+    return start
+
+
+def _filter_spec(record_filter: Optional[RecordFilter]) -> Optional[Dict[str, Any]]:
+    """
+    返回过滤条件的可序列化形式。
+
+    Args:
+        record_filter: 记录过滤器，None 表示不过滤
+
+    Returns:
+        过滤条件字典；不过滤时返回 None
+    """
+    if record_filter is None or not record_filter.active:
+        return None
+    return record_filter.spec()
+
+
+def save_checkpoint(path: str, filepath: str, offset: int, analyzer: LogAnalyzer,
+                    diagnostics: Optional[ParseDiagnostics] = None,
+                    record_filter: Optional[RecordFilter] = None) -> None:
+    """
+    原子地写入检查点文件。
+
+    Args:
+        path: 检查点文件路径
+        filepath: 被分析的日志文件路径
+        offset: 已处理到的字节偏移
+        analyzer: 分析器
+        diagnostics: 解析诊断收集器
+        record_filter: 本次运行的记录过滤器，None 表示不过滤
+    """
+    checkpoint = {
+        'version': CHECKPOINT_VERSION,
+        'input': os.path.abspath(filepath),
+        'offset': offset,
+        'fingerprint': file_fingerprint(filepath),
+        'filter': _filter_spec(record_filter),
+        'analyzer': analyzer.to_state(),
+        'diagnostics': diagnostics.to_state() if diagnostics is not None else None,
+    }
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    """
+    读取检查点文件。
+
+    Args:
+        path: 检查点文件路径
+
+    Returns:
+        检查点字典；文件不存在或版本不符时返回 None
+
+    Raises:
+        ValueError: 检查点文件内容损坏时抛出
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return None
+    except json.JSONDecodeError as e:
+        raise ValueError(f'检查点文件损坏: {path}') from e
+
+    if not isinstance(checkpoint, dict) or checkpoint.get('version') != CHECKPOINT_VERSION:
+        return None
+    return checkpoint
+
+
+def validate_checkpoint(checkpoint: Dict[str, Any], filepath: str) -> Tuple[bool, str]:
+    """
+    检查检查点是否仍适用于当前文件。
+
+    文件被替换（device/inode 不同）、被截断（大小小于偏移）或头部内容
+    改变时视为失效。
+
+    Args:
+        checkpoint: load_checkpoint() 返回的检查点
+        filepath: 当前日志文件路径
+
+    Returns:
+        (是否有效, 失效原因)
+    """
+    saved = checkpoint['fingerprint']
+    if os.path.abspath(filepath) != checkpoint.get('input'):
+        return False, '输入文件路径不同'
+
+    current = file_fingerprint(filepath, saved['head_length'])
+    if (current['device'], current['inode']) != (saved['device'], saved['inode']):
+        return False, '文件已被替换'
+    if current['size'] < checkpoint['offset'] or current['size'] < saved['size']:
+        return False, '文件已被截断'
+    if current['head_sha256'] != saved['head_sha256']:
+        return False, '文件内容已改变'
+    return True, ''
+
+
+def resume_from_checkpoint(path: str, filepath: str, template: LogAnalyzer,
+                           record_filter: Optional[RecordFilter] = None
+                           ) -> Tuple[Optional[LogAnalyzer], Optional[Dict[str, Any]], int, str]:
+    """
+    尝试从检查点恢复分析状态。
+
+    检查点中的统计只包含当时过滤条件下的记录，过滤条件不同时与配置不同
+    一样视为失效。
+
+    Args:
+        path: 检查点文件路径
+        filepath: 日志文件路径
+        template: 按本次运行参数创建的空分析器，用于检查配置是否一致
+        record_filter: 本次运行的记录过滤器，None 表示不过滤
+
+    Returns:
+        (分析器, 解析诊断状态, 起始偏移, 说明)；无法恢复时分析器为 None、偏移为 0
+    """
+    checkpoint = load_checkpoint(path)
+    if checkpoint is None:
+        return None, None, 0, '没有可用的检查点'
+
+    valid, reason = validate_checkpoint(checkpoint, filepath)
+    if not valid:
+        return None, None, 0, reason
+
+    analyzer = LogAnalyzer.from_state(checkpoint['analyzer'])
+    if not analyzer.is_compatible(template):
+        return None, None, 0, '分析配置与检查点不同'
+    if checkpoint.get('filter') != _filter_spec(record_filter):
+        return None, None, 0, '过滤条件与检查点不同'
+
+    return (analyzer, checkpoint.get('diagnostics'), checkpoint['offset'],
+            f'从偏移 {checkpoint["offset"]} 继续')
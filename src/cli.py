@@ -5,12 +5,218 @@ CLI 接口模块
 """
 
 import argparse
+import errno
+import glob
+import os
 import sys
-from typing import List, Optional
+import threading
+from collections import deque
+from contextlib import nullcontext
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-from .parser import parse_file
-from .analyzer import LogAnalyzer
-from .reporter import generate_report
+from .parser import iter_records, parse_line
+from .analyzer import LogAnalyzer, MODE_EXACT, MODE_SKETCH, DEFAULT_QUANTILES, DEFAULT_TOP_MESSAGES
+from .batch import RecordBatch, iter_batches
+from .checkpoint import complete_lines_end, resume_from_checkpoint, save_checkpoint
+from .diagnostics import ParseDiagnostics, format_location
+from .exporters import EXTENSIONS, FORMAT_HTML, FORMATS, output_paths, write_output
+from .fastpath import parse_line_fast
+from .index import select_ranges, update_index
+from .filters import RecordFilter
+from .follow import FileFollower, follow
+from .ingest import DEFAULT_QUEUE_SIZE, NetworkIngestor, start_in_thread
+from .parallel import analyze_file_parallel, analyze_files
+from .profiling import StageProfiler, StageResult
+from .reader import STDIN, detect_compression
+from .reporter import DEFAULT_TOP_SERVICES, generate_report
+from .server import LiveStats, ingest_file, make_server
+from .window import parse_duration, parse_timestamp
+
+
+def parse_quantiles(value: str) -> List[float]:
+    """
+    解析逗号分隔的百分位数列表。
+
+    Args:
+        value: 例如 "50,90,95,99,99.9"
+
+    Returns:
+        百分位数列表
+
+    Raises:
+        argparse.ArgumentTypeError: 格式错误或超出 0-100 时抛出
+    """
+    try:
+        quantiles = [float(item) for item in value.split(',') if item.strip()]
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f'无效的百分位数列表: {value}') from e
+    if not quantiles or any(not 0 <= p <= 100 for p in quantiles):
+        raise argparse.ArgumentTypeError(f'百分位数必须在 0-100 之间: {value}')
+    return quantiles
+
+
+def expand_inputs(patterns: List[str]) -> List[str]:
+    """
+    展开输入路径中的通配符。
+
+    Args:
+        patterns: 路径或通配符列表
+
+    Returns:
+        去重后的文件路径列表，保持输入顺序，每个通配符的匹配结果按名称排序
+
+    Raises:
+        FileNotFoundError: 通配符没有匹配到任何文件时抛出
+    """
+    paths: List[str] = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern))
+            if not matches:
+                raise FileNotFoundError(errno.ENOENT, '没有匹配的文件', pattern)
+            paths.extend(matches)
+        else:
+            paths.append(pattern)
+    return list(dict.fromkeys(paths))
+
+
+def parse_window(value: str) -> float:
+    """
+    解析时长参数。
+
+    Args:
+        value: 例如 "30s"、"5m"、"1h"
+
+    Returns:
+        秒数
+
+    Raises:
+        argparse.ArgumentTypeError: 格式错误时抛出
+    """
+    try:
+        return parse_duration(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+
+
+def parse_time(value: str) -> float:
+    """
+    解析时间点参数。
+
+    Args:
+        value: ISO 8601 时间戳，例如 "2025-01-15T10:00:00"，不带时区时按 UTC 处理
+
+    Returns:
+        Unix 秒数
+
+    Raises:
+        argparse.ArgumentTypeError: 格式错误时抛出
+    """
+    seconds = parse_timestamp(value)
+    if seconds is None:
+        raise argparse.ArgumentTypeError(f'无法解析的时间: {value}')
+    return seconds
+
+
+def parse_address(value: str) -> Tuple[str, int]:
+    """
+    解析监听地址。
+
+    Args:
+        value: 例如 "5140"、"0.0.0.0:5140"
+
+    Returns:
+        (主机, 端口)，省略主机时为 127.0.0.1
+
+    Raises:
+        argparse.ArgumentTypeError: 格式错误时抛出
+    """
+    host, _, port = value.rpartition(':')
+    try:
+        port_number = int(port)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f'无效的监听地址: {value}') from e
+    if not 0 <= port_number <= 65535:
+        raise argparse.ArgumentTypeError(f'端口超出范围: {port_number}')
+    return host or '127.0.0.1', port_number
+
+
+def add_analysis_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    添加批处理与 serve 子命令共用的分析参数。
+
+    Args:
+        parser: 参数解析器
+    """
+    parser.add_argument(
+        '--window',
+        type=parse_window,
+        default=None,
+        dest='time_window',
+        help='按 timestamp 只统计最近一段时间，例如 5m、1h（基于直方图，近似分位数）'
+    )
+
+    parser.add_argument(
+        '--window-bucket',
+        type=parse_window,
+        default=None,
+        dest='window_bucket',
+        help='--window 的桶间隔，例如 5s（默认: 窗口的 1/60）'
+    )
+
+    parser.add_argument(
+        '--quantiles', '-q',
+        type=parse_quantiles,
+        default=None,
+        dest='quantiles',
+        help='逗号分隔的百分位数列表，例如 50,90,95,99,99.9（默认: 50,99）'
+    )
+
+    parser.add_argument(
+        '--sketch',
+        action='store_true',
+        dest='sketch',
+        help='使用常量内存的分位数草图代替精确计算（适合超大文件）'
+    )
+
+    parser.add_argument(
+        '--relative-accuracy',
+        type=float,
+        default=None,
+        dest='relative_accuracy',
+        help='草图模式下分位数的相对误差上界（默认: 0.01）'
+    )
+
+    parser.add_argument(
+        '--fast-decoder',
+        action='store_true',
+        dest='fast_decoder',
+        help='对固定 schema 的日志行使用快速解码，无法识别时回退到 json.loads'
+    )
+
+    parser.add_argument(
+        '--top-services',
+        type=int,
+        default=DEFAULT_TOP_SERVICES,
+        dest='top_services',
+        help=f'服务表按最高百分位延迟列出前 N 个服务，其余折叠（默认: {DEFAULT_TOP_SERVICES}，0 表示全部列出）'
+    )
+
+    parser.add_argument(
+        '--top-messages',
+        type=int,
+        default=DEFAULT_TOP_MESSAGES,
+        dest='top_messages',
+        help=f'统计出现最多的 N 个 (服务, 级别, 消息) 组合，内存有界的近似计数（默认: {DEFAULT_TOP_MESSAGES}，0 表示不统计）'
+    )
+
+    parser.add_argument(
+        '--series',
+        type=parse_window,
+        default=None,
+        dest='series_interval',
+        help='按 timestamp 每隔一段时间统计延迟与错误率并在报告中绘制趋势图，例如 1m（间隔过多时自动加倍）'
+    )
 
 
 def create_parser() -> argparse.ArgumentParser:
@@ -22,23 +228,90 @@ def create_parser() -> argparse.ArgumentParser:
     """
     parser = argparse.ArgumentParser(
         prog='python -m src.cli',
-        description='Log Stream Analyzer - 分析 JSONL 日志文件并生成 HTML 报告'
+        description='Log Stream Analyzer - 分析 JSONL 日志文件并生成 HTML 报告',
+        epilog='以 HTTP 服务方式持续提供实时统计: python -m src.cli serve --help'
     )
 
     parser.add_argument(
         '--input', '-i',
         required=True,
-        dest='input_file',
-        help='输入的 JSONL 日志文件路径'
+        nargs='+',
+        action='extend',
+        dest='input_files',
+        help='输入的 JSONL 日志文件路径，可指定多个路径或通配符（如 "logs/*.jsonl.gz"），'
+             '"-" 表示标准输入'
     )
 
     parser.add_argument(
         '--output', '-o',
-        default='report.html',
+        default=None,
         dest='output_file',
-        help='输出的 HTML 报告文件路径（默认: report.html）'
+        help='输出文件路径（默认: report.<格式扩展名>）；指定多个 --format 时按格式替换扩展名'
+    )
+
+    parser.add_argument(
+        '--format',
+        choices=FORMATS,
+        action='append',
+        default=None,
+        dest='formats',
+        help='输出格式，可重复指定以同时输出多种格式（默认: html）'
+    )
+
+    parser.add_argument(
+        '--per-file',
+        action='store_true',
+        dest='per_file',
+        help='在报告中按输入文件分别列出统计'
+    )
+
+    parser.add_argument(
+        '--service',
+        nargs='+',
+        action='extend',
+        default=None,
+        dest='services',
+        help='只分析这些服务的日志，可指定多个'
     )
 
+    parser.add_argument(
+        '--level',
+        nargs='+',
+        action='extend',
+        default=None,
+        dest='levels',
+        help='只分析这些级别的日志（区分大小写，如 ERROR WARN）'
+    )
+
+    parser.add_argument(
+        '--since',
+        type=parse_time,
+        default=None,
+        dest='since',
+        help='只分析该时间（含）之后的日志，ISO 8601 格式，不带时区时按 UTC'
+    )
+
+    parser.add_argument(
+        '--until',
+        type=parse_time,
+        default=None,
+        dest='until',
+        help='只分析该时间（不含）之前的日志'
+    )
+
+    parser.add_argument(
+        '--index',
+        nargs='?',
+        const='',
+        default=None,
+        metavar='PATH',
+        dest='index_path',
+        help='使用侧车索引只读取 --since/--until/--service 可能匹配的块；'
+             '索引不存在或已过期时自动建立或增量更新（默认路径: <输入文件>.idx）'
+    )
+
+    add_analysis_arguments(parser)
+
     parser.add_argument(
         '--window-size', '-w',
         type=int,
@@ -47,6 +320,58 @@ def create_parser() -> argparse.ArgumentParser:
         help='只分析最近 N 条日志（默认: 全部）'
     )
 
+    parser.add_argument(
+        '--workers', '-j',
+        type=int,
+        default=1,
+        dest='workers',
+        help='并行解析的进程数（默认: 1，即单进程）'
+    )
+
+    parser.add_argument(
+        '--checkpoint',
+        default=None,
+        dest='checkpoint',
+        help='检查点文件路径：从上次处理到的偏移继续，并在结束时更新检查点'
+    )
+
+    parser.add_argument(
+        '--follow', '-f',
+        action='store_true',
+        dest='follow',
+        help='持续跟踪文件新追加的内容，并定期刷新报告（Ctrl-C 结束）'
+    )
+
+    parser.add_argument(
+        '--refresh-interval',
+        type=float,
+        default=5.0,
+        dest='refresh_interval',
+        help='--follow 模式下报告刷新间隔秒数（默认: 5）'
+    )
+
+    parser.add_argument(
+        '--max-refreshes',
+        type=int,
+        default=None,
+        dest='max_refreshes',
+        help='--follow 模式下刷新 N 次后退出（默认: 直到被中断）'
+    )
+
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        dest='profile',
+        help='记录各处理阶段的耗时、吞吐量和峰值内存，输出摘要并写入报告'
+    )
+
+    parser.add_argument(
+        '--profile-output',
+        default=None,
+        dest='profile_output',
+        help='将读取/分析热点循环的 cProfile 结果写入该文件（隐含 --profile）'
+    )
+
     parser.add_argument(
         '--verbose', '-v',
         action='store_true',
@@ -57,72 +382,828 @@ def create_parser() -> argparse.ArgumentParser:
     return parser
 
 
+def create_serve_parser() -> argparse.ArgumentParser:
+    """
+    创建 serve 子命令的参数解析器。
+
+    Returns:
+        配置好的 ArgumentParser 实例
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m src.cli serve',
+        description='持续跟踪日志文件或接收网络推送的日志，通过 HTTP 提供实时统计（/stats、/metrics、/）'
+    )
+
+    parser.add_argument(
+        '--input', '-i',
+        default=None,
+        dest='input_file',
+        help='被持续跟踪的 JSONL 日志文件路径'
+    )
+
+    parser.add_argument(
+        '--listen-tcp',
+        type=parse_address,
+        default=None,
+        dest='listen_tcp',
+        help='通过 TCP 接收按行分隔的 JSON，格式 [HOST:]PORT'
+    )
+
+    parser.add_argument(
+        '--listen-udp',
+        type=parse_address,
+        default=None,
+        dest='listen_udp',
+        help='通过 UDP 接收 JSON 行（每个数据报可含多行），格式 [HOST:]PORT'
+    )
+
+    parser.add_argument(
+        '--queue-size',
+        type=int,
+        default=DEFAULT_QUEUE_SIZE,
+        dest='queue_size',
+        help=f'等待解码的网络批次上限，满时 TCP 暂停读取、UDP 丢弃（默认: {DEFAULT_QUEUE_SIZE}）'
+    )
+
+    parser.add_argument(
+        '--host',
+        default='127.0.0.1',
+        dest='host',
+        help='监听地址（默认: 127.0.0.1）'
+    )
+
+    parser.add_argument(
+        '--port', '-p',
+        type=int,
+        default=8080,
+        dest='port',
+        help='监听端口（默认: 8080）'
+    )
+
+    parser.add_argument(
+        '--poll-interval',
+        type=float,
+        default=0.5,
+        dest='poll_interval',
+        help='没有新数据时检查文件的间隔秒数（默认: 0.5）'
+    )
+
+    add_analysis_arguments(parser)
+
+    parser.add_argument(
+        '--verbose', '-v',
+        action='store_true',
+        dest='verbose',
+        help='输出访问日志'
+    )
+
+    return parser
+
+
+def create_record_filter(args: argparse.Namespace) -> Optional[RecordFilter]:
+    """
+    按 --service、--level、--since 和 --until 创建记录过滤器。
+
+    Args:
+        args: 解析后的命令行参数
+
+    Returns:
+        记录过滤器；没有过滤条件时返回 None
+    """
+    record_filter = RecordFilter(args.services, args.levels, args.since, args.until)
+    return record_filter if record_filter.active else None
+
+
+def create_analyzer(args: argparse.Namespace) -> LogAnalyzer:
+    """
+    按命令行参数创建分析器。
+
+    Args:
+        args: 解析后的命令行参数
+
+    Returns:
+        空分析器
+
+    Raises:
+        ValueError: 参数组合无效时抛出
+    """
+    return LogAnalyzer(
+        mode=MODE_SKETCH if args.sketch else MODE_EXACT,
+        relative_accuracy=args.relative_accuracy,
+        time_window=args.time_window,
+        window_bucket_seconds=args.window_bucket,
+        top_messages=args.top_messages,
+        series_interval=args.series_interval
+    )
+
+
+def feed_records(records: Iterable[Dict[str, Any]], analyzer: LogAnalyzer,
+                 window_size: Optional[int] = None) -> int:
+    """
+    将记录流送入分析器。
+
+    指定 window_size 时只保留最近 N 条记录的有界队列，
+    峰值内存取决于窗口大小而不是文件大小。
+
+    Args:
+        records: 记录迭代器
+        analyzer: 接收记录的分析器
+        window_size: 只分析最近 N 条记录，None 表示全部
+
+    Returns:
+        送入分析器的记录数
+    """
+    if window_size is not None:
+        window = deque(records, maxlen=window_size)
+        for record in window:
+            analyzer.add_record(record)
+        return len(window)
+
+    count = 0
+    for record in records:
+        analyzer.add_record(record)
+        count += 1
+    return count
+
+
+def open_records(args: argparse.Namespace, filepath: str,
+                 diagnostics: ParseDiagnostics, start: int = 0, end: Optional[int] = None,
+                 profiler: Optional[StageProfiler] = None) -> Iterable[Dict[str, Any]]:
+    """
+    按命令行参数创建单个文件的记录流。
+
+    指定 --service 或 --level 时解码函数先在原始行上预筛。
+    提供 profiler 时分别累计解码耗时（'decode'，包含预筛）与取下一条记录的总耗时
+    （'read_decode'，包含读取和解码），用于拆分热点循环。
+
+    Args:
+        args: 解析后的命令行参数
+        filepath: 输入文件路径
+        diagnostics: 诊断收集器
+        start: 起始字节偏移
+        end: 结束字节偏移，None 表示读到文件末尾
+        profiler: 阶段剖析器
+
+    Returns:
+        记录迭代器
+    """
+    decoder = parse_line_fast if args.fast_decoder else parse_line
+    record_filter = create_record_filter(args)
+    if record_filter is not None:
+        decoder = record_filter.wrap(decoder)
+    if profiler is not None:
+        decoder = profiler.timed_calls(decoder, 'decode')
+    records = iter_records(filepath, start, end, decoder=decoder, diagnostics=diagnostics)
+    if profiler is not None:
+        records = profiler.timed_iter(records, 'read_decode')
+    return records
+
+
+def open_batches(args: argparse.Namespace, filepath: str, analyzer: LogAnalyzer,
+                 diagnostics: ParseDiagnostics, start: int = 0, end: Optional[int] = None,
+                 profiler: Optional[StageProfiler] = None) -> Iterable[RecordBatch]:
+    """
+    按命令行参数创建单个文件的列式批次流。
+
+    提供 profiler 时分别累计解码耗时（'decode'）与取下一批的总耗时
+    （'read_decode'，包含读取和解码）。
+
+    Args:
+        args: 解析后的命令行参数
+        filepath: 输入文件路径
+        analyzer: 接收批次的分析器，决定是否需要时间列和消息列
+        diagnostics: 诊断收集器
+        start: 起始字节偏移
+        end: 结束字节偏移，None 表示读到文件末尾
+        profiler: 阶段剖析器
+
+    Returns:
+        批次迭代器
+    """
+    batches = iter_batches(filepath, start, end, fast=args.fast_decoder,
+                           diagnostics=diagnostics, record_filter=create_record_filter(args),
+                           keep_time=analyzer.needs_time,
+                           keep_messages=bool(analyzer.top_messages),
+                           timings=profiler.accumulated if profiler is not None else None)
+    if profiler is not None:
+        batches = profiler.timed_iter(batches, 'read_decode')
+    return batches
+
+
+def feed_batches(batches: Iterable[RecordBatch], analyzer: LogAnalyzer) -> int:
+    """
+    将列式批次送入分析器。
+
+    Args:
+        batches: 批次迭代器
+        analyzer: 接收批次的分析器
+
+    Returns:
+        送入分析器的记录数
+    """
+    count = 0
+    for batch in batches:
+        analyzer.add_batch(batch)
+        count += len(batch)
+    return count
+
+
+def profile_stage(profiler: Optional[StageProfiler], name: str, hot: bool = False):
+    """
+    返回剖析阶段的上下文管理器；未启用剖析时返回空上下文（产出 None）。
+
+    Args:
+        profiler: 阶段剖析器
+        name: 阶段名称
+        hot: 是否为热点阶段
+
+    Returns:
+        上下文管理器
+    """
+    return profiler.stage(name, hot=hot) if profiler is not None else nullcontext()
+
+
+def add_ingest_breakdown(profiler: StageProfiler, ingest: StageResult,
+                         batched: bool = True) -> None:
+    """
+    将读取阶段拆分为子阶段。
+
+    拆分为读取、解码，以及逐条处理的 add_record 或列式批次的 add_batch。
+    只有单进程路径能拆分：多进程时解析发生在工作进程中，不生成子阶段。
+
+    Args:
+        profiler: 阶段剖析器
+        ingest: 读取阶段的结果
+        batched: 是否按列式批次处理；--window-size 时逐条处理
+    """
+    if 'read_decode' not in profiler.accumulated:
+        return
+    iterate = profiler.accumulated['read_decode']
+    decode = min(profiler.accumulated.get('decode', 0.0), iterate)
+    add_stage = 'ingest.add_batch' if batched else 'ingest.add_record'
+    profiler.add('ingest.read', iterate - decode, ingest.records, ingest.bytes)
+    profiler.add('ingest.decode', decode, ingest.records)
+    profiler.add(add_stage, max(ingest.seconds - iterate, 0.0), ingest.records)
+
+
+def build_stats(args: argparse.Namespace, analyzer: LogAnalyzer,
+                diagnostics: ParseDiagnostics) -> Dict[str, Any]:
+    """
+    生成报告使用的统计结果。
+
+    使用 --window 时返回时间窗口内的统计，否则返回全部数据的统计。
+    使用 --series 时两种情况都包含全部数据的延迟序列。
+
+    Args:
+        args: 解析后的命令行参数
+        analyzer: 分析器
+        diagnostics: 诊断收集器
+
+    Returns:
+        统计结果字典
+    """
+    if analyzer.window is not None:
+        stats = analyzer.get_window_stats(quantiles=args.quantiles)
+        if analyzer.series is not None:
+            stats['series'] = analyzer.series.get_series(stats['quantiles'])
+    else:
+        stats = analyzer.get_stats(quantiles=args.quantiles)
+    stats['parse_diagnostics'] = diagnostics.summary()
+    return stats
+
+
+def write_outputs(args: argparse.Namespace, stats: Dict[str, Any]) -> List[str]:
+    """
+    按 --format 写出所有输出文件。
+
+    Args:
+        args: 解析后的命令行参数
+        stats: 统计结果字典
+
+    Returns:
+        写出的文件路径列表
+    """
+    formats = args.formats or [FORMAT_HTML]
+    output = args.output_file or 'report' + EXTENSIONS[formats[0]]
+    paths = output_paths(output, formats)
+    for fmt, path in paths.items():
+        if fmt == FORMAT_HTML:
+            generate_report(stats, path, args.top_services)
+        else:
+            write_output(stats, fmt, path)
+    return list(paths.values())
+
+
+def print_diagnostics(summary: Dict[str, Any]) -> None:
+    """
+    输出解析诊断汇总（--verbose）。
+
+    Args:
+        summary: ParseDiagnostics.summary() 的返回值
+    """
+    if not summary['failures']:
+        print('[INFO] 没有解析失败的行')
+        return
+
+    print(f'[INFO] 解析失败 {summary["failures"]} 行，按原因统计:')
+    for reason, count in summary['reasons'].items():
+        print(f'[INFO]   {reason}: {count}')
+    for sample in summary['samples']:
+        print(f'[INFO]   样本 {format_location(sample)}: {sample["prefix"]}')
+
+
+def analyze_indexed(args: argparse.Namespace, filepath: str, analyzer: LogAnalyzer,
+                    diagnostics: ParseDiagnostics,
+                    profiler: Optional[StageProfiler] = None) -> Tuple[LogAnalyzer, int]:
+    """
+    借助侧车索引只读取可能匹配 --since/--until/--service 的字节范围。
+
+    读取的记录仍经过完整的过滤器，结果与全量扫描再过滤一致。
+
+    Args:
+        args: 解析后的命令行参数
+        filepath: 输入文件路径（未压缩的普通文件）
+        analyzer: 空分析器
+        diagnostics: 诊断收集器
+        profiler: 阶段剖析器，None 表示不剖析
+
+    Returns:
+        (分析器, 记录数)
+
+    Raises:
+        FileNotFoundError: 输入文件不存在时抛出
+    """
+    index, message = update_index(filepath, args.index_path or None)
+    ranges = select_ranges(index, os.path.getsize(filepath), args.since, args.until,
+                           args.services)
+    if args.verbose:
+        selected = sum(end - start for start, end in ranges)
+        print(f'[INFO] 索引: {message}，读取 {len(ranges)} 个范围共 {selected} 字节')
+
+    window_size = args.window_size if args.window_size and args.window_size > 0 else None
+    if window_size is not None:
+        records = (
+            record
+            for start, end in ranges
+            for record in open_records(args, filepath, diagnostics, start, end, profiler)
+        )
+        return analyzer, feed_records(records, analyzer, window_size)
+    batches = (
+        batch
+        for start, end in ranges
+        for batch in open_batches(args, filepath, analyzer, diagnostics, start, end, profiler)
+    )
+    return analyzer, feed_batches(batches, analyzer)
+
+
+def analyze_input(args: argparse.Namespace, filepath: str, analyzer: LogAnalyzer,
+                  diagnostics: ParseDiagnostics,
+                  profiler: Optional[StageProfiler] = None) -> Tuple[LogAnalyzer, int]:
+    """
+    批处理模式下读取单个输入文件并分析。
+
+    使用 --checkpoint 时从上次的偏移继续，只处理新增的完整行，
+    完成后写回检查点。
+
+    Args:
+        args: 解析后的命令行参数
+        filepath: 输入文件路径
+        analyzer: 空分析器
+        diagnostics: 诊断收集器
+        profiler: 阶段剖析器，None 表示不剖析
+
+    Returns:
+        (分析器, 本次新处理的记录数)
+
+    Raises:
+        FileNotFoundError: 输入文件不存在时抛出
+    """
+    window_size = args.window_size if args.window_size and args.window_size > 0 else None
+    start_offset, end_offset = 0, None
+    workers, checkpoint = args.workers, args.checkpoint
+
+    # 压缩文件只能从头顺序解压
+    codec = detect_compression(filepath)
+    if codec is not None:
+        if args.verbose:
+            print(f'[INFO] 检测到 {codec} 压缩，使用后台线程流式解压')
+        if workers > 1 or checkpoint:
+            print('[WARN] 压缩输入只能顺序读取，忽略 --workers 和 --checkpoint', file=sys.stderr)
+        workers, checkpoint = 1, None
+    elif filepath == STDIN:
+        if workers > 1 or checkpoint:
+            print('[WARN] 标准输入只能顺序读取，忽略 --workers 和 --checkpoint', file=sys.stderr)
+        workers, checkpoint = 1, None
+
+    if args.index_path is not None:
+        if codec is not None or filepath == STDIN:
+            print('[WARN] 压缩输入和标准输入不支持 --index，改为顺序扫描', file=sys.stderr)
+        else:
+            if workers > 1 or checkpoint:
+                print('[WARN] 使用 --index 时忽略 --workers 和 --checkpoint', file=sys.stderr)
+            return analyze_indexed(args, filepath, analyzer, diagnostics, profiler)
+
+    if checkpoint and window_size is not None:
+        print('[WARN] --window-size 不能与 --checkpoint 一起使用，忽略 --checkpoint',
+              file=sys.stderr)
+        checkpoint = None
+    elif checkpoint:
+        resumed, diagnostics_state, start_offset, message = resume_from_checkpoint(
+            checkpoint, filepath, analyzer, create_record_filter(args)
+        )
+        if resumed is not None:
+            analyzer = resumed
+            if diagnostics_state is not None:
+                diagnostics.merge_state(diagnostics_state)
+        if args.verbose:
+            print(f'[INFO] 检查点: {message}')
+        end_offset = complete_lines_end(filepath, start_offset)
+
+    if window_size is not None and args.verbose:
+        print(f'[INFO] 应用窗口大小: {window_size} 条')
+
+    if workers > 1 and window_size is not None:
+        print('[WARN] --window-size 需要按顺序处理，忽略 --workers', file=sys.stderr)
+
+    if workers > 1 and window_size is None:
+        if args.verbose:
+            print(f'[INFO] 使用 {workers} 个进程并行解析')
+        partial = analyze_file_parallel(
+            filepath, workers,
+            config=analyzer.config(), fast=args.fast_decoder, diagnostics=diagnostics,
+            start=start_offset, end=end_offset, record_filter=create_record_filter(args)
+        )
+        record_count = partial.total_logs
+        analyzer.merge(partial)
+    elif window_size is not None:
+        # 最近 N 条需要逐条保留在有界队列中
+        records = open_records(args, filepath, diagnostics, start_offset, end_offset, profiler)
+        record_count = feed_records(records, analyzer, window_size)
+    else:
+        batches = open_batches(args, filepath, analyzer, diagnostics, start_offset, end_offset,
+                               profiler)
+        record_count = feed_batches(batches, analyzer)
+
+    if checkpoint:
+        save_checkpoint(checkpoint, filepath, end_offset, analyzer, diagnostics,
+                        create_record_filter(args))
+        if args.verbose:
+            print(f'[INFO] 检查点已保存: {checkpoint}（偏移 {end_offset}）')
+
+    return analyzer, record_count
+
+
+def analyze_multiple(args: argparse.Namespace, filepaths: List[str], analyzer: LogAnalyzer,
+                     diagnostics: ParseDiagnostics, profiler: Optional[StageProfiler] = None
+                     ) -> Tuple[LogAnalyzer, int, Dict[str, Dict[str, Any]]]:
+    """
+    批处理模式下分析多个输入文件并合并结果。
+
+    Args:
+        args: 解析后的命令行参数
+        filepaths: 输入文件路径列表
+        analyzer: 空分析器
+        diagnostics: 诊断收集器
+        profiler: 阶段剖析器，None 表示不剖析
+
+    Returns:
+        (合并后的分析器, 记录数, {文件路径: 单文件统计})
+
+    Raises:
+        FileNotFoundError: 任一输入文件不存在时抛出
+    """
+    if args.checkpoint:
+        print('[WARN] 多个输入文件时忽略 --checkpoint', file=sys.stderr)
+    if args.index_path is not None:
+        print('[WARN] 多个输入文件时忽略 --index', file=sys.stderr)
+
+    window_size = args.window_size if args.window_size and args.window_size > 0 else None
+    if window_size is not None:
+        # 最近 N 条按输入顺序跨文件计算，只能顺序处理
+        if args.workers > 1 or args.per_file:
+            print('[WARN] --window-size 需要按顺序处理，忽略 --workers 和 --per-file',
+                  file=sys.stderr)
+        records = (
+            record
+            for filepath in filepaths
+            for record in open_records(args, filepath, diagnostics, profiler=profiler)
+        )
+        return analyzer, feed_records(records, analyzer, window_size), {}
+
+    workers = args.workers
+    if STDIN in filepaths and workers > 1:
+        # 工作进程无法读取父进程的标准输入
+        print('[WARN] 输入包含标准输入，忽略 --workers', file=sys.stderr)
+        workers = 1
+    if args.verbose and workers > 1:
+        print(f'[INFO] 使用 {workers} 个进程并行分析 {len(filepaths)} 个文件')
+    merged, per_file = analyze_files(
+        filepaths, workers, config=analyzer.config(), fast=args.fast_decoder,
+        diagnostics=diagnostics, per_file_quantiles=(
+            list(args.quantiles or DEFAULT_QUANTILES) if args.per_file else None
+        ), record_filter=create_record_filter(args)
+    )
+    return merged, merged.total_logs, per_file
+
+
+def detect_compression_safe(filepath: str) -> Optional[str]:
+    """
+    检测压缩格式；文件尚不存在时返回 None。
+
+    Args:
+        filepath: 文件路径
+
+    Returns:
+        压缩格式名称或 None
+    """
+    try:
+        return detect_compression(filepath)
+    except FileNotFoundError:
+        return None
+
+
+def run_follow(args: argparse.Namespace, filepath: str, analyzer: LogAnalyzer,
+               diagnostics: ParseDiagnostics) -> int:
+    """
+    执行 --follow 模式：增量读取新数据并定期刷新报告。
+
+    Args:
+        args: 解析后的命令行参数
+        filepath: 被跟踪的文件路径
+        analyzer: 长期存活的分析器
+        diagnostics: 诊断收集器
+
+    Returns:
+        退出码
+    """
+    if args.window_size or args.workers > 1:
+        print('[WARN] --follow 模式忽略 --window-size 和 --workers', file=sys.stderr)
+
+    # 文件可能稍后才被创建
+    if detect_compression_safe(filepath) is not None:
+        print('[ERROR] --follow 不支持压缩文件', file=sys.stderr)
+        return 2
+
+    record_filter = create_record_filter(args)
+    start_offset = 0
+    if args.checkpoint:
+        try:
+            resumed, diagnostics_state, start_offset, message = resume_from_checkpoint(
+                args.checkpoint, filepath, analyzer, record_filter
+            )
+        except FileNotFoundError:
+            resumed, diagnostics_state, message = None, None, '输入文件尚不存在'
+        except ValueError as e:
+            print(f'[ERROR] 读取检查点失败: {e}', file=sys.stderr)
+            return 2
+        if resumed is not None:
+            analyzer = resumed
+            if diagnostics_state is not None:
+                diagnostics.merge_state(diagnostics_state)
+        if args.verbose:
+            print(f'[INFO] 检查点: {message}')
+
+    decoder = parse_line_fast if args.fast_decoder else parse_line
+    if record_filter is not None:
+        decoder = record_filter.wrap(decoder)
+    follower = FileFollower(filepath, decoder=decoder, diagnostics=diagnostics,
+                            start_offset=start_offset)
+
+    def refresh() -> None:
+        """用当前分析结果重新生成报告，并按需写入检查点。"""
+        if args.checkpoint and os.path.exists(filepath):
+            save_checkpoint(args.checkpoint, filepath, follower.offset,
+                            analyzer, diagnostics, record_filter)
+        stats = build_stats(args, analyzer, diagnostics)
+        write_outputs(args, stats)
+        if args.verbose:
+            print(f'[INFO] 报告已刷新: 共 {stats["total_logs"]} 条日志, '
+                  f'错误率 {stats["error_rate"]:.2f}%')
+
+    if args.verbose:
+        print(f'[INFO] 正在跟踪文件: {filepath}（每 {args.refresh_interval} 秒刷新）')
+
+    try:
+        follow(follower, analyzer, refresh, interval=args.refresh_interval,
+               max_refreshes=args.max_refreshes)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        print(f'[ERROR] 跟踪文件失败: {e}', file=sys.stderr)
+        return 2
+    return 0
+
+
+def run_serve(argv: List[str]) -> int:  # pylint: disable=too-many-locals
+    """
+    执行 serve 子命令：后台线程持续读取文件和/或网络数据，主线程提供 HTTP 服务。
+
+    Args:
+        argv: serve 之后的命令行参数
+
+    Returns:
+        退出码
+    """
+    parser = create_serve_parser()
+    args = parser.parse_args(argv)
+    if not (args.input_file or args.listen_tcp or args.listen_udp):
+        parser.error('至少需要 --input、--listen-tcp 或 --listen-udp 之一')
+    try:
+        analyzer = create_analyzer(args)
+    except ValueError as e:
+        print(f'[ERROR] 参数错误: {e}', file=sys.stderr)
+        return 2
+
+    if args.input_file == STDIN:
+        print('[ERROR] serve 不支持标准输入，请使用 --listen-tcp 或 --listen-udp', file=sys.stderr)
+        return 2
+    if args.input_file and detect_compression_safe(args.input_file) is not None:
+        print('[ERROR] serve 不支持压缩文件', file=sys.stderr)
+        return 2
+
+    decoder = parse_line_fast if args.fast_decoder else None
+    live = LiveStats(analyzer, quantiles=args.quantiles, top_n=args.top_services)
+    try:
+        server = make_server(live, args.host, args.port, verbose=args.verbose)
+    except OSError as e:
+        print(f'[ERROR] 无法监听 {args.host}:{args.port}: {e}', file=sys.stderr)
+        return 2
+
+    ingestor = network_thread = None
+    if args.listen_tcp or args.listen_udp:
+        network_diagnostics = ParseDiagnostics(stream=None)
+        ingestor = NetworkIngestor(
+            lambda records: live.add_records(records, network_diagnostics.summary(),
+                                             source='network'),
+            decoder=decoder, diagnostics=network_diagnostics, queue_size=args.queue_size
+        )
+        live.providers['ingest'] = ingestor.stats
+        try:
+            network_thread = start_in_thread(ingestor, args.listen_tcp, args.listen_udp)
+        except OSError as e:
+            server.server_close()
+            print(f'[ERROR] 无法监听网络输入: {e}', file=sys.stderr)
+            return 2
+        for protocol, (host, port) in ingestor.addresses.items():
+            print(f'[INFO] 正在接收 {protocol.upper()} 行协议输入: {host}:{port}')
+
+    stop = threading.Event()
+    file_thread = None
+    if args.input_file:
+        follower = FileFollower(args.input_file, decoder=decoder,
+                                diagnostics=ParseDiagnostics(stream=None))
+        file_thread = threading.Thread(target=ingest_file, name='ingest',
+                                       args=(follower, live, stop, args.poll_interval),
+                                       daemon=True)
+        file_thread.start()
+        print(f'[INFO] 正在跟踪文件: {args.input_file}')
+
+    host, port = server.server_address[:2]
+    print(f'[INFO] 服务地址 http://{host}:{port}/ （/stats、/metrics）')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        stop.set()
+        if file_thread is not None:
+            file_thread.join()
+        if ingestor is not None:
+            ingestor.stop()
+            network_thread.join()
+    return 0
+
+
 def main(argv: Optional[List[str]] = None) -> int:  # pylint: disable=too-many-branches
     """
     CLI 主入口函数。
 
+    第一个参数为 serve 时执行 serve 子命令，否则执行批处理分析。
+
     Args:
         argv: 命令行参数列表，None 时使用 sys.argv
 
     Returns:
         退出码：成功 0，文件不存在 1，解析错误 2
     """
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == 'serve':
+        return run_serve(argv[1:])
+
     parser = create_parser()
     args = parser.parse_args(argv)
+    if args.since is not None and args.until is not None and args.until <= args.since:
+        parser.error('--until 必须晚于 --since')
 
-    # 验证输入文件是否存在
+    try:
+        analyzer = create_analyzer(args)
+    except ValueError as e:
+        print(f'[ERROR] 参数错误: {e}', file=sys.stderr)
+        return 2
+
+    diagnostics = ParseDiagnostics()
+
+    try:
+        inputs = expand_inputs(args.input_files)
+    except FileNotFoundError as e:
+        print(f'[ERROR] 文件不存在: {e.filename}', file=sys.stderr)
+        return 1
+
+    if args.follow:
+        if len(inputs) != 1:
+            print('[ERROR] --follow 只支持单个输入文件', file=sys.stderr)
+            return 2
+        if inputs[0] == STDIN:
+            print('[ERROR] --follow 不支持标准输入', file=sys.stderr)
+            return 2
+        if args.profile or args.profile_output:
+            print('[WARN] --follow 模式不支持 --profile', file=sys.stderr)
+        return run_follow(args, inputs[0], analyzer, diagnostics)
+
+    profiler = None
+    if args.profile or args.profile_output:
+        profiler = StageProfiler(cprofile_path=args.profile_output)
+
+    # 流式读取并分析，记录不会整体驻留内存
+    sources: Dict[str, Dict[str, Any]] = {}
     try:
         if args.verbose:
-            print(f'[INFO] 正在读取文件: {args.input_file}')
+            print(f'[INFO] 正在读取文件: {", ".join(inputs)}')
+            print('[INFO] 正在分析日志...')
 
-        records = parse_file(args.input_file)
-    except FileNotFoundError:
-        print(f'[ERROR] 文件不存在: {args.input_file}', file=sys.stderr)
+        with profile_stage(profiler, 'ingest', hot=True) as ingest:
+            if len(inputs) == 1:
+                analyzer, record_count = analyze_input(
+                    args, inputs[0], analyzer, diagnostics, profiler)
+            else:
+                analyzer, record_count, sources = analyze_multiple(
+                    args, inputs, analyzer, diagnostics, profiler)
+            if ingest is not None:
+                ingest.records = record_count
+                # 字节数按输入文件在磁盘上的大小计算（压缩文件为压缩后大小），
+                # 标准输入的大小未知，不计入
+                ingest.bytes = sum(os.path.getsize(filepath) for filepath in inputs
+                                   if filepath != STDIN)
+    except FileNotFoundError as e:
+        print(f'[ERROR] 文件不存在: {e.filename}', file=sys.stderr)
         return 1
     except Exception as e:  # pylint: disable=broad-exception-caught
         print(f'[ERROR] 读取文件失败: {e}', file=sys.stderr)
         return 2
 
-    # 应用窗口大小限制
-    if args.window_size is not None and args.window_size > 0:
-        records = records[-args.window_size:]
-        if args.verbose:
-            print(f'[INFO] 应用窗口大小: {args.window_size} 条')
-
+    diagnostics.flush()
+    if profiler is not None:
+        per_record = bool(args.window_size and args.window_size > 0)
+        add_ingest_breakdown(profiler, ingest, batched=not per_record)
     if args.verbose:
-        print(f'[INFO] 成功解析 {len(records)} 条日志记录')
+        print(f'[INFO] 成功解析 {record_count} 条日志记录')
+        print_diagnostics(diagnostics.summary())
 
     # 检查是否有有效记录
-    if not records:
+    if record_count == 0:
         print('[WARN] 没有有效的日志记录', file=sys.stderr)
         # 仍然生成报告，但包含空数据
 
-    # 分析日志
-    if args.verbose:
-        print('[INFO] 正在分析日志...')
-
-    analyzer = LogAnalyzer()
-    for record in records:
-        analyzer.add_record(record)
-
-    stats = analyzer.get_stats()
+    with profile_stage(profiler, 'get_stats') as stage:
+        stats = build_stats(args, analyzer, diagnostics)
+        if stage is not None:
+            stage.records = stats['total_logs']
+    if profiler is not None:
+        stats['profile'] = profiler.to_stats()
+    if args.per_file:
+        # 单个输入文件时，文件统计即整体统计
+        stats['sources'] = sources or {
+            inputs[0]: {key: value for key, value in stats.items() if key != 'parse_diagnostics'}
+        }
 
     if args.verbose:
         print(f'[INFO] 分析完成: 共 {stats["total_logs"]} 条日志, '
-              f'错误率 {stats["error_rate"]:.2f}%')
+              f'错误率 {stats["error_rate"]:.2f}%, '
+              f'精度模式 {stats["accuracy"]["mode"]}')
 
     # 生成报告
     if args.verbose:
-        print(f'[INFO] 正在生成报告: {args.output_file}')
+        print('[INFO] 正在生成报告...')
 
     try:
-        generate_report(stats, args.output_file)
+        with profile_stage(profiler, 'report') as stage:
+            written = write_outputs(args, stats)
+            if stage is not None:
+                stage.records = stats['total_logs']
+                stage.bytes = sum(os.path.getsize(path) for path in written)
     except Exception as e:  # pylint: disable=broad-exception-caught
         print(f'[ERROR] 生成报告失败: {e}', file=sys.stderr)
         return 2
 
     if args.verbose:
-        print(f'[INFO] 报告已生成: {args.output_file}')
+        print(f'[INFO] 报告已生成: {", ".join(written)}')
+
+    if profiler is not None:
+        print('[PROFILE] 各阶段耗时:')
+        print(profiler.format_summary())
+        if args.profile_output:
+            print(f'[PROFILE] cProfile 结果已写入: {args.profile_output}'
+                  f'（python -m pstats {args.profile_output}）')
 
     return 0
 
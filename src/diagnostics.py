@@ -0,0 +1,230 @@
+"""
+解析诊断模块
+
+汇总解析失败信息：按原因计数、保留少量样本、对实时输出限流，
+避免在大量损坏行时终端/管道 I/O 成为瓶颈。
+"""
+
+import sys
+import time
+from typing import Any, Dict, List, Optional, TextIO, Union
+
+REASON_DECODE_ERROR = 'decode_error'
+REASON_NOT_OBJECT = 'not_object'
+MISSING_FIELD_PREFIX = 'missing:'
+
+DEFAULT_MAX_SAMPLES = 10
+DEFAULT_PREFIX_LENGTH = 50
+DEFAULT_LIVE_LIMIT = 10
+DEFAULT_LIVE_INTERVAL = 1.0
+# 默认实时输出到构造时的 sys.stderr，使 contextlib.redirect_stderr 生效
+_STDERR: Any = object()
+
+
+def missing_field_reason(field: str) -> str:
+    """
+    返回缺失字段对应的原因键。
+
+    Args:
+        field: 字段名
+
+    Returns:
+        原因键，例如 'missing:latency_ms'
+    """
+    return MISSING_FIELD_PREFIX + field
+
+
+class ParseDiagnostics:
+    """
+    解析诊断收集器。
+
+    parse_line() 在失败时调用 record()；iter_records() 在解码每行前
+    更新 line_number 和 offset，使样本能定位到具体位置。处理多个输入
+    文件时可设置 source 标明样本来自哪个文件。
+    """
+
+    def __init__(self, stream: Optional[TextIO] = _STDERR,
+                 live_limit: int = DEFAULT_LIVE_LIMIT,
+                 live_interval: float = DEFAULT_LIVE_INTERVAL,
+                 max_samples: int = DEFAULT_MAX_SAMPLES,
+                 prefix_length: int = DEFAULT_PREFIX_LENGTH):
+        """
+        初始化诊断收集器。
+
+        Args:
+            stream: 实时输出的目标流，默认 sys.stderr，None 表示不实时输出
+            live_limit: 每个时间窗口内最多实时输出的条数
+            live_interval: 限流时间窗口（秒）
+            max_samples: 最多保留的样本数
+            prefix_length: 样本保留的行前缀长度
+        """
+        self.stream = sys.stderr if stream is _STDERR else stream
+        self.live_limit = live_limit
+        self.live_interval = live_interval
+        self.max_samples = max_samples
+        self.prefix_length = prefix_length
+
+        self.failures: int = 0
+        self.reasons: Dict[str, int] = {}
+        self.samples: List[Dict[str, Any]] = []
+        self.line_number: Optional[int] = None
+        self.offset: Optional[int] = None
+        self.source: Optional[str] = None
+
+        self._window_start: float = 0.0
+        self._window_count: int = 0
+        self._suppressed: int = 0
+
+    def record(self, reasons: List[str], line: Union[str, bytes],
+               detail: str = '') -> None:
+        """
+        记录一次解析失败。
+
+        Args:
+            reasons: 失败原因键列表（缺多个字段时每个字段一个键）
+            line: 出错的原始行
+            detail: 附加说明，例如 JSON 错误信息
+        """
+        self.failures += 1
+        for reason in reasons:
+            self.reasons[reason] = self.reasons.get(reason, 0) + 1
+
+        if len(self.samples) < self.max_samples or self.stream is not None:
+            prefix = _prefix(line, self.prefix_length)
+            if len(self.samples) < self.max_samples:
+                self.samples.append({
+                    'source': self.source,
+                    'line': self.line_number,
+                    'offset': self.offset,
+                    'reasons': list(reasons),
+                    'prefix': prefix,
+                })
+            if self.stream is not None:
+                self._emit(reasons, prefix, detail)
+
+    def _emit(self, reasons: List[str], prefix: str, detail: str) -> None:
+        """
+        限流地输出一条实时诊断信息。
+
+        Args:
+            reasons: 失败原因键列表
+            prefix: 行前缀
+            detail: 附加说明
+        """
+        now = time.monotonic()
+        if now - self._window_start >= self.live_interval:
+            if self._suppressed:
+                print(f'[PARSER] 已抑制 {self._suppressed} 条解析错误输出',
+                      file=self.stream)
+            self._window_start = now
+            self._window_count = 0
+            self._suppressed = 0
+
+        if self._window_count >= self.live_limit:
+            self._suppressed += 1
+            return
+
+        self._window_count += 1
+        location = format_location({
+            'source': self.source, 'line': self.line_number, 'offset': self.offset
+        })
+        message = f'[PARSER] {location}: {", ".join(reasons)}'
+        if detail:
+            message += f' ({detail})'
+        print(f'{message} - line: {prefix}...', file=self.stream)
+
+    def merge(self, other: 'ParseDiagnostics') -> None:
+        """
+        合并另一个收集器的计数与样本。
+
+        Args:
+            other: 另一个诊断收集器
+        """
+        self.failures += other.failures
+        for reason, count in other.reasons.items():
+            self.reasons[reason] = self.reasons.get(reason, 0) + count
+        room = self.max_samples - len(self.samples)
+        if room > 0:
+            self.samples.extend(other.samples[:room])
+
+    def to_state(self) -> Dict[str, Any]:
+        """
+        导出可 JSON 序列化的状态。
+
+        Returns:
+            状态字典
+        """
+        return {
+            'failures': self.failures,
+            'reasons': dict(self.reasons),
+            'samples': list(self.samples),
+        }
+
+    def merge_state(self, state: Dict[str, Any]) -> None:
+        """
+        合并 to_state() 导出的状态。
+
+        Args:
+            state: 状态字典
+        """
+        other = ParseDiagnostics(stream=None, max_samples=self.max_samples)
+        other.failures = state['failures']
+        other.reasons = dict(state['reasons'])
+        other.samples = list(state['samples'])
+        self.merge(other)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        返回诊断汇总，用于报告和 --verbose 输出。
+
+        Returns:
+            包含 failures、reasons（按次数降序）和 samples 的字典
+        """
+        return {
+            'failures': self.failures,
+            'reasons': dict(sorted(self.reasons.items(), key=lambda item: (-item[1], item[0]))),
+            'samples': list(self.samples),
+        }
+
+    def flush(self) -> None:
+        """输出被限流抑制的条数。"""
+        if self.stream is not None and self._suppressed:
+            print(f'[PARSER] 已抑制 {self._suppressed} 条解析错误输出', file=self.stream)
+            self._suppressed = 0
+
+
+def format_location(sample: Dict[str, Any]) -> str:
+    """
+    格式化样本位置。
+
+    Args:
+        sample: 包含 source、line、offset 的样本字典
+
+    Returns:
+        例如 "app.jsonl:line 3"、"offset 800"
+    """
+    if sample.get('line') is not None:
+        location = f'line {sample["line"]}'
+    elif sample.get('offset') is not None:
+        location = f'offset {sample["offset"]}'
+    else:
+        location = 'input'
+    if sample.get('source'):
+        location = f'{sample["source"]}:{location}'
+    return location
+
+
+def _prefix(line: Union[str, bytes], length: int) -> str:
+    """
+    截取行前缀用于展示。
+
+    Args:
+        line: 原始行
+        length: 前缀长度
+
+    Returns:
+        字符串前缀
+    """
+    if isinstance(line, bytes):
+        return line[:length].decode('utf-8', errors='replace')
+    return line[:length]
@@ -0,0 +1,236 @@
+"""
+机器可读输出模块
+
+直接从 get_stats() 的统计字典生成 JSON、CSV 和 Prometheus 文本格式，
+不经过 HTML 渲染，供告警和自动化流程消费。
+"""
+
+import csv
+import io
+import json
+import math
+import os
+from typing import Any, Callable, Dict, List, TextIO
+
+from .analyzer import quantile_key
+
+FORMAT_HTML = 'html'
+FORMAT_JSON = 'json'
+FORMAT_CSV = 'csv'
+FORMAT_PROMETHEUS = 'prom'
+FORMATS = (FORMAT_HTML, FORMAT_JSON, FORMAT_CSV, FORMAT_PROMETHEUS)
+
+EXTENSIONS = {
+    FORMAT_HTML: '.html',
+    FORMAT_JSON: '.json',
+    FORMAT_CSV: '.csv',
+    FORMAT_PROMETHEUS: '.prom',
+}
+
+METRIC_PREFIX = 'log_analyzer'
+
+
+def _quantile_keys(stats: Dict[str, Any]) -> List[str]:
+    """
+    返回统计结果中的百分位键，例如 ['p50', 'p99']。
+
+    Args:
+        stats: 统计字典
+
+    Returns:
+        百分位键列表
+    """
+    return [quantile_key(p) for p in stats.get('quantiles', (50, 99))]
+
+
+def write_json(stats: Dict[str, Any], f: TextIO) -> None:
+    """
+    以 JSON 写出完整统计结果。
+
+    Args:
+        stats: 统计字典
+        f: 输出流
+    """
+    json.dump(stats, f, ensure_ascii=False, indent=2)
+    f.write('\n')
+
+
+def write_csv(stats: Dict[str, Any], f: TextIO) -> None:
+    """
+    以 CSV 写出每个服务一行的延迟统计。
+
+    Args:
+        stats: 统计字典
+        f: 输出流
+    """
+    quantile_keys = _quantile_keys(stats)
+    writer = csv.writer(f, lineterminator='\n')
+    writer.writerow(['service', 'count'] + quantile_keys + ['min', 'max'])
+    services = stats.get('services', {})
+    writer.writerows(
+        [name, service_stats.get('count', 0)]
+        + [service_stats.get(key, 0) for key in quantile_keys]
+        + [service_stats.get('min', 0), service_stats.get('max', 0)]
+        for name, service_stats in sorted(services.items())
+    )
+
+
+def _escape_label(value: str) -> str:
+    """
+    转义 Prometheus 标签值。
+
+    Args:
+        value: 原始标签值
+
+    Returns:
+        转义后的标签值
+    """
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    """
+    格式化 Prometheus 样本值。
+
+    Args:
+        value: 数值
+
+    Returns:
+        文本表示
+    """
+    value = float(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def write_prometheus(stats: Dict[str, Any], f: TextIO) -> None:
+    """
+    以 Prometheus 文本格式写出统计结果。
+
+    分析结果都是 gauge：每次导出反映一次分析的快照。延迟单位为毫秒，
+    与输入日志的 latency_ms 一致。网络接收计数（stats['ingest']）是 counter。
+
+    Args:
+        stats: 统计字典
+        f: 输出流
+    """
+    def metric(name: str, help_text: str, samples: List[str], kind: str = 'gauge') -> None:
+        full_name = f'{METRIC_PREFIX}_{name}'
+        f.write(f'# HELP {full_name} {help_text}\n# TYPE {full_name} {kind}\n')
+        f.writelines(f'{full_name}{sample}\n' for sample in samples)
+
+    total_logs = stats.get('total_logs', 0)
+    error_count = stats.get('error_count', 0)
+    metric('logs', 'Number of parsed log records.', [f' {total_logs}'])
+    metric('errors', 'Number of ERROR log records.', [f' {error_count}'])
+    # 用计数重新计算，避免 error_rate 百分比的舍入误差
+    metric('error_ratio', 'Fraction of log records with level ERROR.',
+           [f' {_format_value(error_count / total_logs if total_logs else 0.0)}'])
+
+    diagnostics = stats.get('parse_diagnostics')
+    if diagnostics is not None:
+        metric('parse_failures', 'Number of lines that failed to parse.',
+               [f' {diagnostics.get("failures", 0)}'])
+
+    ingest = stats.get('ingest')
+    if ingest is not None:
+        for key, value in ingest.items():
+            if key == 'queue_depth':
+                metric('ingest_queue_depth', 'Batches waiting to be decoded.', [f' {value}'])
+            else:
+                metric(f'ingest_{key}_total', f'Network ingestion counter: {key}.',
+                       [f' {value}'], kind='counter')
+
+    services = sorted(stats.get('services', {}).items())
+    labels = [(f'service="{_escape_label(name)}"', service_stats)
+              for name, service_stats in services]
+    metric('service_logs', 'Number of log records per service.',
+           [f'{{{label}}} {service_stats.get("count", 0)}' for label, service_stats in labels])
+
+    quantiles = stats.get('quantiles', (50, 99))
+    metric('service_latency_milliseconds', 'Latency quantiles per service in milliseconds.', [
+        f'{{{label},quantile="{p / 100:g}"}} '
+        f'{_format_value(service_stats.get(quantile_key(p), 0))}'
+        for label, service_stats in labels
+        for p in quantiles
+    ])
+    metric('service_latency_min_milliseconds', 'Minimum latency per service in milliseconds.',
+           [f'{{{label}}} {_format_value(service_stats.get("min", 0))}'
+            for label, service_stats in labels])
+    metric('service_latency_max_milliseconds', 'Maximum latency per service in milliseconds.',
+           [f'{{{label}}} {_format_value(service_stats.get("max", 0))}'
+            for label, service_stats in labels])
+
+
+WRITERS: Dict[str, Callable[[Dict[str, Any], TextIO], None]] = {
+    FORMAT_JSON: write_json,
+    FORMAT_CSV: write_csv,
+    FORMAT_PROMETHEUS: write_prometheus,
+}
+
+
+def render(stats: Dict[str, Any], fmt: str) -> str:
+    """
+    将统计结果渲染为字符串。
+
+    Args:
+        stats: 统计字典
+        fmt: 格式名称（json、csv 或 prom）
+
+    Returns:
+        渲染结果
+
+    Raises:
+        ValueError: 格式不受支持时抛出
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f'不支持的输出格式: {fmt}')
+    buffer = io.StringIO()
+    WRITERS[fmt](stats, buffer)
+    return buffer.getvalue()
+
+
+def write_output(stats: Dict[str, Any], fmt: str, path: str) -> None:
+    """
+    将统计结果写入文件（先写临时文件再原子替换）。
+
+    Args:
+        stats: 统计字典
+        fmt: 格式名称（json、csv 或 prom）
+        path: 输出路径
+
+    Raises:
+        ValueError: 格式不受支持时抛出
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f'不支持的输出格式: {fmt}')
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        WRITERS[fmt](stats, f)
+    os.replace(tmp_path, path)
+
+
+def output_paths(output: str, formats: List[str]) -> Dict[str, str]:
+    """
+    确定每种格式的输出路径。
+
+    只有一种格式时直接使用 output；多种格式时去掉 output 的扩展名，
+    再按格式加上对应扩展名。
+
+    Args:
+        output: 用户指定的输出路径
+        formats: 格式列表
+
+    Returns:
+        {格式: 输出路径}，保持 formats 的顺序并去重
+    """
+    unique = list(dict.fromkeys(formats))
+    if len(unique) == 1:
+        return {unique[0]: output}
+    base, ext = os.path.splitext(output)
+    if ext not in EXTENSIONS.values():
+        base = output
+    return {fmt: base + EXTENSIONS[fmt] for fmt in unique}
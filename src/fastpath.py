@@ -0,0 +1,64 @@
+"""
+快速行解码模块
+
+针对生产端固定的扁平 schema（timestamp, level, service, latency_ms, msg，
+按此顺序输出）直接在字节串上用预编译正则提取字段，跳过通用的
+json.loads。无法确定能正确处理的行（字段顺序不同、含转义字符、
+额外字段等）一律回退到 parse_line()，因此结果与 parse_line() 一致。
+"""
+
+import re
+import sys
+from typing import Dict, Optional, Union
+
+from .diagnostics import ParseDiagnostics
+from .parser import parse_line
+
+# 字符串值只接受不含引号、反斜杠和控制字符的内容，这样无需处理转义
+_STRING = rb'"([^"\\\x00-\x1f]*)"'
+_NUMBER = rb'(-?(?:0|[1-9][0-9]*)(\.[0-9]+)?([eE][+-]?[0-9]+)?)'
+# JSON 只允许这四种空白；字节串的 \s 还匹配 \f 和 \v，json.loads 会拒绝
+_WS = rb'[ \t\r\n]*'
+# 也供 batch 模块在原始字节上直接提取列。首尾用 \s*，与 parse_line() 先 strip() 一致
+FAST_LINE = re.compile(
+    rb'\s*\{' + _WS + rb'"timestamp"' + _WS + rb':' + _WS + _STRING
+    + _WS + rb',' + _WS + rb'"level"' + _WS + rb':' + _WS + _STRING
+    + _WS + rb',' + _WS + rb'"service"' + _WS + rb':' + _WS + _STRING
+    + _WS + rb',' + _WS + rb'"latency_ms"' + _WS + rb':' + _WS + _NUMBER
+    + _WS + rb',' + _WS + rb'"msg"' + _WS + rb':' + _WS + _STRING
+    + _WS + rb'\}\s*'
+)
+
+
+def parse_line_fast(line: Union[str, bytes],
+                    diagnostics: Optional[ParseDiagnostics] = None) -> Optional[Dict]:
+    """
+    使用快速路径解析单行日志，无法处理时回退到 parse_line()。
+
+    Args:
+        line: JSON 格式的字节串或字符串
+        diagnostics: 诊断收集器，回退解析失败时使用
+
+    Returns:
+        解析成功返回包含日志字段的字典，失败返回 None
+    """
+    if isinstance(line, str):
+        return parse_line(line, diagnostics)
+
+    match = FAST_LINE.fullmatch(line)
+    if match is None:
+        return parse_line(line, diagnostics)
+
+    timestamp, level, service, number, fraction, exponent, msg = match.groups()
+    try:
+        record = {
+            'timestamp': timestamp.decode('utf-8'),
+            'level': sys.intern(level.decode('utf-8')),
+            'service': sys.intern(service.decode('utf-8')),
+            # 与 json.loads 保持一致：整数保持 int，其余为 float
+            'latency_ms': float(number) if fraction or exponent else int(number),
+            'msg': msg.decode('utf-8'),
+        }
+    except UnicodeDecodeError:
+        return parse_line(line, diagnostics)
+    return record
@@ -0,0 +1,156 @@
+"""
+记录过滤模块
+
+按服务、级别和时间范围筛选记录。服务和级别条件编译为原始行上的字节子串检查，
+在 JSON 解码之前排除不可能匹配的行；通过预筛的行解码后再精确比较字段，
+因此结果与先解码再过滤一致，而选择性报告可以省去大部分解码开销。
+"""
+
+import json
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Union
+
+from .diagnostics import ParseDiagnostics
+from .parser import LineDecoder
+from .window import parse_timestamp
+
+
+def _value_needles(value: str) -> FrozenSet[bytes]:
+    """
+    返回字符串值在 JSON 行中可能出现的字节形式（含引号）。
+
+    非 ASCII 字符既可能直接以 UTF-8 出现，也可能被 ensure_ascii 转义，
+    两种形式都要包含。
+
+    Args:
+        value: 字段值
+
+    Returns:
+        字节子串集合
+    """
+    return frozenset((
+        json.dumps(value, ensure_ascii=False).encode('utf-8'),
+        json.dumps(value).encode('ascii'),
+    ))
+
+
+class RecordFilter:
+    """
+    按字段值筛选记录。
+
+    每个字段的候选值之间是“或”，不同字段之间是“且”；没有指定的字段不限制。
+    时间范围只在解码后比较，时间戳无法解析的记录不满足时间条件。
+    预筛只会放过多余的行，不会误删匹配的行：含反斜杠的行（值可能以转义
+    形式出现）一律交给精确比较。被预筛排除的行不会解码，
+    因此不计入解析诊断。
+    """
+
+    def __init__(self, services: Optional[Iterable[str]] = None,
+                 levels: Optional[Iterable[str]] = None,
+                 since: Optional[float] = None, until: Optional[float] = None):
+        """
+        初始化过滤器。
+
+        Args:
+            services: 保留的服务名，None 或空表示不限制
+            levels: 保留的日志级别（区分大小写），None 或空表示不限制
+            since: 起始时间（Unix 秒，包含），None 表示不限制
+            until: 结束时间（Unix 秒，不包含），None 表示不限制
+        """
+        self.since = since
+        self.until = until
+        self.fields: Dict[str, FrozenSet[str]] = {}
+        if services:
+            self.fields['service'] = frozenset(services)
+        if levels:
+            self.fields['level'] = frozenset(levels)
+        self._needles: List[FrozenSet[bytes]] = [
+            frozenset(needle for value in values for needle in _value_needles(value))
+            for values in self.fields.values()
+        ]
+
+    @property
+    def active(self) -> bool:
+        """是否设置了任何过滤条件。"""
+        return bool(self.fields) or self.since is not None or self.until is not None
+
+    def spec(self) -> Dict[str, Any]:
+        """
+        返回可 JSON 序列化的过滤条件，用于判断两次运行的过滤条件是否相同。
+
+        Returns:
+            包含 services、levels（排序后的列表）与 since、until 的字典
+        """
+        return {
+            'services': sorted(self.fields.get('service', ())),
+            'levels': sorted(self.fields.get('level', ())),
+            'since': self.since,
+            'until': self.until,
+        }
+
+    def may_match(self, line: Union[str, bytes]) -> bool:
+        """
+        在原始行上预筛。
+
+        Args:
+            line: 原始行
+
+        Returns:
+            False 表示该行一定不匹配；True 表示需要解码后精确比较
+        """
+        if not isinstance(line, bytes) or b'\\' in line:
+            return True
+        for needles in self._needles:
+            for needle in needles:
+                if needle in line:
+                    break
+            else:
+                return False
+        return True
+
+    def matches(self, record: Dict) -> bool:
+        """
+        精确比较解码后的记录。
+
+        Args:
+            record: 日志记录
+
+        Returns:
+            记录是否满足全部条件
+        """
+        for field, values in self.fields.items():
+            value = record.get(field)
+            if not isinstance(value, str) or value not in values:
+                return False
+        if self.since is not None or self.until is not None:
+            value = record.get('timestamp')
+            timestamp = parse_timestamp(value) if isinstance(value, str) else None
+            if timestamp is None:
+                return False
+            if self.since is not None and timestamp < self.since:
+                return False
+            if self.until is not None and timestamp >= self.until:
+                return False
+        return True
+
+    def wrap(self, decoder: LineDecoder) -> LineDecoder:
+        """
+        包装行解码函数：先预筛，解码成功后再精确比较。
+
+        Args:
+            decoder: 行解码函数
+
+        Returns:
+            对不匹配的行返回 None 的解码函数
+        """
+        may_match, matches = self.may_match, self.matches
+
+        def filtered(line: Union[str, bytes],
+                     diagnostics: Optional[ParseDiagnostics] = None) -> Optional[Dict]:
+            if not may_match(line):
+                return None
+            record = decoder(line, diagnostics)
+            if record is None or not matches(record):
+                return None
+            return record
+
+        return filtered
@@ -0,0 +1,243 @@
+"""
+跟踪模式模块
+
+持续读取日志文件新追加的字节，处理不完整的末尾行、日志轮转和截断，
+并按固定间隔刷新报告。每次刷新的成本只取决于新数据量。
+"""
+
+import io
+import os
+import time
+from typing import Callable, Dict, Generator, Iterator, List, Optional
+
+from .analyzer import LogAnalyzer
+from .diagnostics import ParseDiagnostics
+from .parser import LineDecoder, parse_line
+
+READ_BLOCK_SIZE = 1 << 20
+# 每次 poll() 最多读取的字节数，保证读取已有的大文件时内存有界
+DEFAULT_POLL_BYTES = 4 * READ_BLOCK_SIZE
+
+
+class FileFollower:
+    """
+    增量读取追加写入的日志文件。
+
+    每次 poll() 只读取上次之后新追加的字节；末尾不完整的行暂存在缓冲区，
+    等待下一次读取补齐。检测到文件被轮转（inode 变化）时先读完旧文件
+    再切换到新文件；检测到文件被截断时从头重新读取。
+
+    每次 poll() 最多读取 max_bytes 字节，积压的数据分多次返回；
+    caught_up 表示上一次 poll() 是否已读到文件末尾。
+    """
+
+    def __init__(self, filepath: str, decoder: Optional[LineDecoder] = None,
+                 diagnostics: Optional[ParseDiagnostics] = None,
+                 start_offset: int = 0):
+        """
+        初始化跟踪器。
+
+        Args:
+            filepath: 日志文件路径
+            decoder: 行解码函数，默认 parse_line
+            diagnostics: 诊断收集器
+            start_offset: 开始读取的字节偏移（必须位于行首）
+        """
+        self.filepath = filepath
+        self.decoder = decoder or parse_line
+        self.diagnostics = diagnostics
+        self.rotations: int = 0
+        self.truncations: int = 0
+        self.caught_up: bool = False
+        self._file = None
+        self._inode: Optional[int] = None
+        self._offset: int = start_offset
+        self._buffer: bytes = b''
+
+    @property
+    def offset(self) -> int:
+        """已完整处理的字节偏移（不含缓冲中的不完整行）。"""
+        return self._offset
+
+    def _open(self, offset: int) -> bool:
+        """
+        打开文件并定位到指定偏移。
+
+        Args:
+            offset: 字节偏移
+
+        Returns:
+            文件存在并成功打开时返回 True
+        """
+        try:
+            f = open(self.filepath, 'rb')  # pylint: disable=consider-using-with
+        except FileNotFoundError:
+            return False
+        self._file = f
+        self._inode = os.fstat(f.fileno()).st_ino
+        f.seek(offset)
+        self._offset = offset
+        self._buffer = b''
+        return True
+
+    def _check_rotation(self, limit: int) -> Generator[Dict, None, int]:
+        """
+        检查轮转与截断，必要时重新打开文件。
+
+        Args:
+            limit: 读取旧文件剩余内容的字节上限
+
+        Yields:
+            轮转前旧文件中剩余的记录
+
+        Returns:
+            从旧文件读取的字节数
+        """
+        self.caught_up = True
+        try:
+            stat = os.stat(self.filepath)
+        except FileNotFoundError:
+            # 轮转过程中文件可能短暂不存在，下次再检查
+            return 0
+
+        if stat.st_ino != self._inode:
+            # 先读完旧文件剩余的内容，再切换到新文件
+            read = yield from self._read_available(limit)
+            if not self.caught_up:
+                # 旧文件还有积压，下次 poll() 继续读取后再切换
+                return read
+            self._flush_buffer()
+            self._file.close()
+            self.rotations += 1
+            self._open(0)
+            return read
+        if stat.st_size < self._offset + len(self._buffer):
+            self.truncations += 1
+            self._file.seek(0)
+            self._offset = 0
+            self._buffer = b''
+        return 0
+
+    def _read_available(self, limit: int) -> Generator[Dict, None, int]:
+        """
+        读取至多 limit 字节并解析其中完整的行，读到文件末尾时设置 caught_up。
+
+        Args:
+            limit: 读取的字节上限
+
+        Yields:
+            新增的有效记录
+
+        Returns:
+            读取的字节数
+        """
+        read = 0
+        self.caught_up = False
+        while read < limit:
+            block = self._file.read(min(READ_BLOCK_SIZE, limit - read))
+            if not block:
+                self.caught_up = True
+                return read
+            read += len(block)
+            data = self._buffer + block
+            last_newline = data.rfind(b'\n')
+            if last_newline < 0:
+                self._buffer = data
+                continue
+            self._buffer = data[last_newline + 1:]
+            complete = data[:last_newline + 1]
+            offset = self._offset
+            # 只按 \n 切分：bytes.splitlines() 还会在单独的 \r 等处断行，
+            # 把一条记录拆成两行并使偏移与诊断错位
+            for line in io.BytesIO(complete):
+                if self.diagnostics is not None:
+                    self.diagnostics.offset = offset
+                offset += len(line)
+                record = self.decoder(line, self.diagnostics)
+                if record is not None:
+                    yield record
+            self._offset = offset
+        return read
+
+    def _flush_buffer(self) -> None:
+        """丢弃轮转前旧文件中没有换行结尾的残余内容，并记为诊断。"""
+        if self._buffer.strip():
+            if self.diagnostics is not None:
+                self.diagnostics.offset = self._offset
+            self.decoder(self._buffer, self.diagnostics)
+        self._buffer = b''
+
+    def _poll(self, max_bytes: int) -> Iterator[Dict]:
+        """依次读取轮转前的旧文件和当前文件，合计不超过 max_bytes 字节。"""
+        read = yield from self._check_rotation(max_bytes)
+        if self.caught_up:
+            yield from self._read_available(max_bytes - read)
+
+    def poll(self, max_bytes: int = DEFAULT_POLL_BYTES) -> List[Dict]:
+        """
+        读取自上次调用以来新增的记录，最多读取 max_bytes 字节。
+
+        Args:
+            max_bytes: 本次读取的字节上限；积压更多时 caught_up 为 False，
+                剩余数据留给下一次调用
+
+        Returns:
+            新增的有效记录列表；文件不存在时返回空列表
+        """
+        if self._file is None and not self._open(self._offset):
+            self.caught_up = True
+            return []
+        return list(self._poll(max_bytes))
+
+    def close(self) -> None:
+        """关闭文件。"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def follow(follower: FileFollower, analyzer: LogAnalyzer,
+           refresh: Callable[[], None], interval: float = 5.0,
+           poll_interval: float = 0.5, max_refreshes: Optional[int] = None,
+           sleep: Callable[[float], None] = time.sleep) -> int:
+    """
+    持续读取新记录送入分析器，并按间隔调用 refresh 刷新报告。
+
+    Args:
+        follower: 文件跟踪器
+        analyzer: 长期存活的分析器
+        refresh: 刷新回调，通常生成报告
+        interval: 报告刷新间隔（秒）
+        poll_interval: 读取新数据的间隔（秒）
+        max_refreshes: 刷新次数上限，None 表示直到被中断
+        sleep: 等待函数（便于测试替换）
+
+    Returns:
+        已执行的刷新次数
+    """
+    refreshes = 0
+    last_refresh = time.monotonic()
+    try:
+        while max_refreshes is None or refreshes < max_refreshes:
+            for record in follower.poll():
+                analyzer.add_record(record)
+
+            now = time.monotonic()
+            if now - last_refresh >= interval:
+                refresh()
+                refreshes += 1
+                last_refresh = now
+            elif follower.caught_up:
+                sleep(min(poll_interval, max(0.0, interval - (now - last_refresh))))
+    except KeyboardInterrupt:
+        # 中断时读完积压的数据做最后一次刷新
+        while True:
+            for record in follower.poll():
+                analyzer.add_record(record)
+            if follower.caught_up:
+                break
+        refresh()
+        refreshes += 1
+    finally:
+        follower.close()
+    return refreshes
@@ -0,0 +1,219 @@
+"""
+高频项统计模块
+
+提供 Space-Saving 算法的有界内存计数：最多保留 capacity 个计数器，
+新键在计数器已满时替换计数最小的键并继承其计数。每个计数都是真实次数的
+上界，高估量不超过记录的 overcount；真实次数超过 总数 / capacity 的键
+一定被保留。适合消息中带有请求 ID 等高基数内容的场景，内存不随不同键的
+数量增长，且多个摘要可以合并。
+"""
+
+import heapq
+import json
+from typing import Any, Dict, Hashable, List, Tuple
+
+DEFAULT_CAPACITY = 1000
+
+
+def message_label(value: Any) -> str:
+    """
+    把字段值转换为可作为计数键的字符串。
+
+    Args:
+        value: 日志字段值（任意 JSON 值）
+
+    Returns:
+        字符串原样返回，其他值返回其 JSON 表示
+    """
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+
+class SpaceSaving:
+    """
+    Space-Saving 高频项摘要。
+
+    计数增加时不调整最小堆：堆中每个键恰好有一项，记录的计数是实际计数的
+    下界。需要淘汰时弹出堆顶，若其计数已过期则按实际计数重新入堆，
+    直到堆顶与实际计数一致，即为当前计数最小的键。
+    """
+
+    __slots__ = ('capacity', 'total', '_counts', '_overcounts', '_heap', '_sequence')
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        """
+        初始化摘要。
+
+        Args:
+            capacity: 最多保留的计数器数量
+
+        Raises:
+            ValueError: capacity 不是正数时抛出
+        """
+        if capacity < 1:
+            raise ValueError(f'capacity 必须为正数: {capacity}')
+        self.capacity = capacity
+        self.total: int = 0
+        self._counts: Dict[Hashable, int] = {}
+        self._overcounts: Dict[Hashable, int] = {}
+        # (计数下界, 入堆序号, 键)；序号使相同计数按入堆顺序淘汰，且无需比较键
+        self._heap: List[Tuple[int, int, Hashable]] = []
+        self._sequence: int = 0
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def _push(self, count: int, key: Hashable) -> None:
+        self._sequence += 1
+        heapq.heappush(self._heap, (count, self._sequence, key))
+
+    def _evict(self) -> int:
+        """
+        淘汰计数最小的键；它的堆项留在堆顶，由调用方替换为新键。
+
+        Returns:
+            被淘汰键的计数
+        """
+        heap = self._heap
+        counts = self._counts
+        while True:
+            count, _, key = heap[0]
+            current = counts[key]
+            if current == count:
+                del counts[key]
+                del self._overcounts[key]
+                return count
+            # 堆中的计数已过期，按实际计数重新入堆
+            self._sequence += 1
+            heapq.heapreplace(heap, (current, self._sequence, key))
+
+    def add(self, key: Hashable, count: int = 1) -> None:
+        """
+        记录 key 出现 count 次。
+
+        Args:
+            key: 可哈希的键
+            count: 出现次数
+        """
+        self.total += count
+        counts = self._counts
+        current = counts.get(key)
+        if current is not None:
+            counts[key] = current + count
+            return
+        if len(counts) < self.capacity:
+            counts[key] = count
+            self._overcounts[key] = 0
+            self._push(count, key)
+            return
+        floor = self._evict()
+        counts[key] = floor + count
+        self._overcounts[key] = floor
+        self._sequence += 1
+        heapq.heapreplace(self._heap, (floor + count, self._sequence, key))
+
+    def _floor(self) -> int:
+        """未保留的键的真实次数上界：计数器已满时为最小计数，否则为 0。"""
+        if len(self._counts) < self.capacity:
+            return 0
+        return min(self._counts.values())
+
+    def merge(self, other: 'SpaceSaving') -> None:
+        """
+        将另一个摘要合并到当前摘要。
+
+        一方没有保留的键按该方的最小计数估计（计数器未满时为 0），
+        合并后保留计数最大的 capacity 个键，计数仍是真实次数的上界。
+        计数器都未满时合并结果是精确计数，与按顺序处理全部数据相同。
+
+        Args:
+            other: 另一个摘要
+        """
+        own_floor = self._floor()
+        other_floor = other._floor()
+        merged: Dict[Hashable, Tuple[int, int]] = {}
+        for key, count in self._counts.items():
+            other_count = other._counts.get(key)
+            if other_count is None:
+                merged[key] = (count + other_floor, self._overcounts[key] + other_floor)
+            else:
+                merged[key] = (count + other_count,
+                               self._overcounts[key] + other._overcounts[key])
+        for key, count in other._counts.items():
+            if key not in merged:
+                merged[key] = (count + own_floor, other._overcounts[key] + own_floor)
+
+        entries = list(merged.items())
+        if len(entries) > self.capacity:
+            # 保持键的先后顺序，相同计数的键在 top() 中按首次出现的顺序排列
+            kept = set(heapq.nlargest(self.capacity, range(len(entries)),
+                                      key=lambda i: entries[i][1][0]))
+            entries = [entry for i, entry in enumerate(entries) if i in kept]
+        self.total += other.total
+        self._load(entries)
+
+    def _load(self, entries: List[Tuple[Hashable, Tuple[int, int]]]) -> None:
+        """
+        用 (键, (计数, 高估量)) 列表替换全部计数器并重建堆。
+
+        Args:
+            entries: 计数器列表
+        """
+        self._counts = {key: count for key, (count, _) in entries}
+        self._overcounts = {key: overcount for key, (_, overcount) in entries}
+        self._heap = []
+        self._sequence = 0
+        for key, (count, _) in entries:
+            self._sequence += 1
+            self._heap.append((count, self._sequence, key))
+        heapq.heapify(self._heap)
+
+    def top(self, k: int) -> List[Tuple[Hashable, int, int]]:
+        """
+        返回计数最大的 k 个键。
+
+        Args:
+            k: 返回的键数
+
+        Returns:
+            按计数降序的 (键, 计数, 高估量) 列表；真实次数在
+            [计数 - 高估量, 计数] 之间
+        """
+        keys = heapq.nlargest(k, self._counts, key=self._counts.__getitem__)
+        return [(key, self._counts[key], self._overcounts[key]) for key in keys]
+
+    def to_state(self) -> Dict[str, Any]:
+        """
+        导出可 JSON 序列化的状态。
+
+        Returns:
+            状态字典；元组键保存为列表
+        """
+        return {
+            'capacity': self.capacity,
+            'total': self.total,
+            'counters': [
+                [list(key) if isinstance(key, tuple) else key, count, self._overcounts[key]]
+                for key, count in self._counts.items()
+            ],
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'SpaceSaving':
+        """
+        从 to_state() 导出的状态恢复摘要。
+
+        Args:
+            state: 状态字典
+
+        Returns:
+            恢复后的摘要
+        """
+        summary = cls(state['capacity'])
+        summary.total = state['total']
+        summary._load([
+            (tuple(key) if isinstance(key, list) else key, (count, overcount))
+            for key, count, overcount in state['counters']
+        ])
+        return summary
@@ -0,0 +1,300 @@
+"""
+侧车索引模块
+
+为 JSONL 文件建立按行对齐的块索引：每块记录字节范围、记录数、时间戳
+最小值和最大值以及出现的服务。查询时间段（--since/--until）或服务时
+只读取可能包含匹配记录的块，不必扫描整个文件。
+
+索引保存在日志文件旁（默认 <文件>.idx），带有与检查点相同的文件身份指纹，
+另外对已索引区域末尾的内容取哈希。文件只是追加了新数据时增量索引新增
+部分；被替换、截断或改写时重新建立。
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .checkpoint import complete_lines_end, file_fingerprint, validate_checkpoint
+from .diagnostics import ParseDiagnostics
+from .fastpath import parse_line_fast
+from .reader import open_lines
+from .window import parse_timestamp
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = '.idx'
+DEFAULT_BLOCK_BYTES = 1 << 20
+# 已索引区域末尾参与哈希的字节数，用于发现原地改写
+TAIL_HASH_BYTES = 4096
+
+
+def default_index_path(filepath: str) -> str:
+    """
+    返回日志文件的默认索引路径。
+
+    Args:
+        filepath: 日志文件路径
+
+    Returns:
+        索引文件路径
+    """
+    return filepath + INDEX_SUFFIX
+
+
+def _tail_sha256(filepath: str, offset: int) -> str:
+    """
+    计算 offset 之前 TAIL_HASH_BYTES 字节的哈希。
+
+    Args:
+        filepath: 文件路径
+        offset: 已索引区域的结束偏移
+
+    Returns:
+        十六进制哈希
+    """
+    with open(filepath, 'rb') as f:
+        start = max(0, offset - TAIL_HASH_BYTES)
+        f.seek(start)
+        return hashlib.sha256(f.read(offset - start)).hexdigest()
+
+
+def _index_blocks(filepath: str, start: int, end: int, services: List[str],
+                  block_bytes: int) -> List[Dict[str, Any]]:
+    """
+    扫描 [start, end) 范围并切分为索引块。
+
+    解析失败或时间戳无法解析的行仍属于所在块的字节范围，
+    只是不参与时间范围和服务集合。
+
+    Args:
+        filepath: 文件路径
+        start: 起始偏移，位于行首
+        end: 结束偏移，位于行首
+        services: 服务名表，新出现的服务追加到末尾
+        block_bytes: 每块的目标字节数
+
+    Returns:
+        块列表
+    """
+    service_ids = {name: i for i, name in enumerate(services)}
+    diagnostics = ParseDiagnostics(stream=None)
+    blocks: List[Dict[str, Any]] = []
+    block: Optional[Dict[str, Any]] = None
+    block_services: set = set()
+    position = start
+
+    def close_block() -> None:
+        block['end'] = position
+        block['services'] = sorted(block_services)
+        blocks.append(block)
+
+    with open_lines(filepath, start) as lines:
+        for line in lines:
+            if position >= end:
+                break
+            if block is None:
+                block = {'start': position, 'records': 0, 'min_ts': None, 'max_ts': None}
+                block_services = set()
+            position += len(line)
+            record = parse_line_fast(line, diagnostics)
+            if record is not None:
+                block['records'] += 1
+                service = record['service']
+                if isinstance(service, str):
+                    if service not in service_ids:
+                        service_ids[service] = len(services)
+                        services.append(service)
+                    block_services.add(service_ids[service])
+                timestamp = record['timestamp']
+                timestamp = parse_timestamp(timestamp) if isinstance(timestamp, str) else None
+                if timestamp is not None:
+                    if block['min_ts'] is None or timestamp < block['min_ts']:
+                        block['min_ts'] = timestamp
+                    if block['max_ts'] is None or timestamp > block['max_ts']:
+                        block['max_ts'] = timestamp
+            if position - block['start'] >= block_bytes:
+                close_block()
+                block = None
+    if block is not None:
+        close_block()
+    return blocks
+
+
+def build_index(filepath: str, block_bytes: int = DEFAULT_BLOCK_BYTES,
+                previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    建立索引；提供仍然有效的旧索引时只索引新追加的完整行。
+
+    末尾不完整的行不进入索引，查询时作为未索引部分读取。
+
+    Args:
+        filepath: 日志文件路径
+        block_bytes: 每块的目标字节数
+        previous: 旧索引，调用方须先用 validate_index() 确认有效
+
+    Returns:
+        索引字典
+
+    Raises:
+        FileNotFoundError: 文件不存在时抛出
+    """
+    if previous is not None:
+        services = list(previous['services'])
+        blocks = list(previous['blocks'])
+        start = previous['offset']
+        block_bytes = previous['block_bytes']
+    else:
+        services, blocks, start = [], [], 0
+
+    end = complete_lines_end(filepath, start)
+    if end > start:
+        blocks.extend(_index_blocks(filepath, start, end, services, block_bytes))
+    return {
+        'version': INDEX_VERSION,
+        'input': os.path.abspath(filepath),
+        'offset': end,
+        'fingerprint': file_fingerprint(filepath),
+        'tail_sha256': _tail_sha256(filepath, end),
+        'block_bytes': block_bytes,
+        'services': services,
+        'blocks': blocks,
+    }
+
+
+def save_index(index: Dict[str, Any], path: str) -> None:
+    """
+    原子地写入索引文件。
+
+    Args:
+        index: 索引字典
+        path: 索引文件路径
+    """
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def load_index(path: str) -> Optional[Dict[str, Any]]:
+    """
+    读取索引文件。
+
+    Args:
+        path: 索引文件路径
+
+    Returns:
+        索引字典；文件不存在、损坏或版本不符时返回 None
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if not isinstance(index, dict) or index.get('version') != INDEX_VERSION:
+        return None
+    return index
+
+
+def validate_index(index: Dict[str, Any], filepath: str) -> Tuple[bool, str]:
+    """
+    检查索引是否仍适用于当前文件。
+
+    除检查点的身份与截断检查外，还比较已索引区域末尾的哈希，
+    以发现保持大小不变的原地改写。
+
+    Args:
+        index: load_index() 返回的索引
+        filepath: 当前日志文件路径
+
+    Returns:
+        (是否有效, 失效原因)
+    """
+    valid, reason = validate_checkpoint(index, filepath)
+    if not valid:
+        return valid, reason
+    if _tail_sha256(filepath, index['offset']) != index['tail_sha256']:
+        return False, '文件内容已改变'
+    return True, ''
+
+
+def update_index(filepath: str, path: Optional[str] = None,
+                 block_bytes: int = DEFAULT_BLOCK_BYTES) -> Tuple[Dict[str, Any], str]:
+    """
+    加载索引并使其与文件同步，必要时写回。
+
+    Args:
+        filepath: 日志文件路径
+        path: 索引文件路径，None 使用默认路径
+        block_bytes: 新建索引时每块的目标字节数
+
+    Returns:
+        (索引, 说明)
+
+    Raises:
+        FileNotFoundError: 日志文件不存在时抛出
+    """
+    path = path or default_index_path(filepath)
+    previous = load_index(path)
+    if previous is None:
+        message = '建立新索引'
+    else:
+        valid, reason = validate_index(previous, filepath)
+        if not valid:
+            previous, message = None, f'重建索引（{reason}）'
+        elif os.path.getsize(filepath) == previous['fingerprint']['size']:
+            return previous, '索引是最新的'
+        else:
+            message = f'增量索引（从偏移 {previous["offset"]}）'
+
+    index = build_index(filepath, block_bytes, previous)
+    save_index(index, path)
+    return index, message
+
+
+def select_ranges(index: Dict[str, Any], file_size: int,
+                  since: Optional[float] = None, until: Optional[float] = None,
+                  services: Optional[Iterable[str]] = None) -> List[Tuple[int, int]]:
+    """
+    选出可能包含匹配记录的字节范围。
+
+    相邻的块合并为一个范围；索引之后的未索引部分总是包含在内。
+
+    Args:
+        index: 索引字典
+        file_size: 当前文件大小
+        since: 起始时间（Unix 秒，包含），None 表示不限
+        until: 结束时间（Unix 秒，不包含），None 表示不限
+        services: 服务名，None 或空表示不限
+
+    Returns:
+        按偏移排序的 (start, end) 列表
+    """
+    wanted = None
+    if services:
+        names = set(services)
+        wanted = {i for i, name in enumerate(index['services']) if name in names}
+    timed = since is not None or until is not None
+
+    ranges: List[Tuple[int, int]] = []
+
+    def add(start: int, end: int) -> None:
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+
+    for block in index['blocks']:
+        if timed:
+            if block['min_ts'] is None:
+                continue
+            if since is not None and block['max_ts'] < since:
+                continue
+            if until is not None and block['min_ts'] >= until:
+                continue
+        if wanted is not None and wanted.isdisjoint(block['services']):
+            continue
+        add(block['start'], block['end'])
+
+    if file_size > index['offset']:
+        add(index['offset'], file_size)
+    return ranges
@@ -0,0 +1,298 @@
+"""
+网络接收模块
+
+基于 asyncio 通过 TCP 和 UDP 接收按行分隔的 JSON 日志，按读取块组成批次，
+经有界队列交给单个解码线程送入分析器。队列满时 TCP 连接暂停读取，
+由 TCP 流量控制把背压传回发送方；UDP 无法背压，丢弃整批并计数。
+"""
+
+import asyncio
+import io
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .diagnostics import ParseDiagnostics
+from .parser import LineDecoder, parse_line
+
+DEFAULT_QUEUE_SIZE = 256
+READ_CHUNK_SIZE = 1 << 16
+DEFAULT_MAX_LINE_BYTES = 1 << 20
+
+# 接收解码后记录的回调，例如 LiveStats.add_records
+RecordSink = Callable[[List[Dict]], object]
+Address = Tuple[str, int]
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    """把每个 UDP 数据报交给 NetworkIngestor。"""
+
+    def __init__(self, ingestor: 'NetworkIngestor'):
+        self.ingestor = ingestor
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        self.ingestor.receive_datagram(data)
+
+
+class NetworkIngestor:
+    """
+    TCP/UDP 行协议接收器。
+
+    counters 记录连接数、接收字节数、接收行数、解码成功与失败数、
+    丢弃行数（UDP 队列满或行超过 max_line_bytes）以及 sink 抛出异常的批次数。
+    空行与文件输入一样直接跳过，不计入接收行数和解码失败数。
+    """
+
+    def __init__(self, sink: RecordSink, decoder: Optional[LineDecoder] = None,
+                 diagnostics: Optional[ParseDiagnostics] = None,
+                 queue_size: int = DEFAULT_QUEUE_SIZE,
+                 max_line_bytes: int = DEFAULT_MAX_LINE_BYTES):
+        """
+        初始化接收器。
+
+        Args:
+            sink: 接收每批解码后记录的回调（在解码线程中调用）
+            decoder: 行解码函数，默认 parse_line
+            diagnostics: 诊断收集器
+            queue_size: 队列中最多等待解码的批次数
+            max_line_bytes: TCP 连接中暂存的不完整行最大字节数，超过时丢弃该行
+        """
+        self.sink = sink
+        self.decoder = decoder or parse_line
+        self.diagnostics = diagnostics
+        self.queue_size = queue_size
+        self.max_line_bytes = max_line_bytes
+        self.counters: Dict[str, int] = {
+            'connections': 0,
+            'bytes_received': 0,
+            'lines_received': 0,
+            'records_decoded': 0,
+            'decode_failures': 0,
+            'lines_dropped': 0,
+            'sink_errors': 0,
+        }
+        self.addresses: Dict[str, Address] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._writers: set = set()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        返回计数器快照。
+
+        Returns:
+            计数器字典，附带当前队列深度
+        """
+        snapshot = dict(self.counters)
+        snapshot['queue_depth'] = self._queue.qsize() if self._queue is not None else 0
+        return snapshot
+
+    async def _enqueue(self, lines: List[bytes]) -> None:
+        """
+        把一批行放入队列；队列满时等待，从而暂停读取该连接。
+
+        Args:
+            lines: 完整的行
+        """
+        self.counters['lines_received'] += len(lines)
+        await self._queue.put(lines)
+
+    async def _handle_tcp(self, reader: asyncio.StreamReader,
+                          writer: asyncio.StreamWriter) -> None:
+        """
+        读取一个 TCP 连接直到对端关闭。
+
+        每次读取的块拆分出其中的完整行作为一个批次，不完整的末尾暂存；
+        连接关闭时剩余内容视为最后一行。
+
+        Args:
+            reader: 读取流
+            writer: 写入流
+        """
+        self.counters['connections'] += 1
+        self._writers.add(writer)
+        pending = b''
+        discarding = False
+        try:
+            while True:
+                chunk = await reader.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                self.counters['bytes_received'] += len(chunk)
+                data = pending + chunk
+                last_newline = data.rfind(b'\n')
+                if last_newline < 0:
+                    pending = data
+                else:
+                    pending = data[last_newline + 1:]
+                    lines = list(io.BytesIO(data[:last_newline + 1]))
+                    if discarding:
+                        # 丢弃超长行在本块中的剩余部分
+                        lines = lines[1:]
+                        discarding = False
+                    lines = [line for line in lines if line.strip()]
+                    if lines:
+                        await self._enqueue(lines)
+                if len(pending) > self.max_line_bytes:
+                    if not discarding:
+                        self.counters['lines_dropped'] += 1
+                    pending = b''
+                    discarding = True
+            if pending.strip() and not discarding:
+                await self._enqueue([pending])
+        except ConnectionError:
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def receive_datagram(self, data: bytes) -> None:
+        """
+        处理一个 UDP 数据报；数据报中可以包含多行。
+
+        Args:
+            data: 数据报内容
+        """
+        self.counters['bytes_received'] += len(data)
+        # 与文件输入一样只按 \n 切分，行内单独的 \r 等字符交给解码器处理
+        lines = [line for line in io.BytesIO(data) if line.strip()]
+        if not lines:
+            return
+        try:
+            self._queue.put_nowait(lines)
+        except asyncio.QueueFull:
+            self.counters['lines_dropped'] += len(lines)
+            return
+        self.counters['lines_received'] += len(lines)
+
+    def _process(self, lines: List[bytes]) -> None:
+        """
+        解码一批行并送入 sink（在解码线程中执行）。
+
+        Args:
+            lines: 完整的行
+        """
+        decoder, diagnostics = self.decoder, self.diagnostics
+        records = []
+        failures = 0
+        for line in lines:
+            record = decoder(line, diagnostics)
+            if record is None:
+                failures += 1
+            else:
+                records.append(record)
+        self.counters['decode_failures'] += failures
+        self.counters['records_decoded'] += len(records)
+        # 即使整批解码失败也调用 sink，使诊断信息得以更新
+        try:
+            self.sink(records)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            # 一批数据出错不能终止解码线程，否则队列填满后所有连接都会阻塞
+            self.counters['sink_errors'] += 1
+            print(f'[ERROR] 处理网络输入失败: {e}', file=sys.stderr)
+
+    async def _consume(self, executor: ThreadPoolExecutor) -> None:
+        """
+        逐批取出队列中的行交给解码线程。
+
+        解码和 sink 在单独线程中顺序执行，事件循环保持接收数据；
+        解码跟不上时队列填满，背压由此产生。
+
+        Args:
+            executor: 单线程执行器
+        """
+        while True:
+            lines = await self._queue.get()
+            try:
+                await self._loop.run_in_executor(executor, self._process, lines)
+            finally:
+                self._queue.task_done()
+
+    async def serve(self, tcp: Optional[Address] = None, udp: Optional[Address] = None,
+                    ready: Optional[threading.Event] = None) -> None:
+        """
+        开始监听并运行到 stop() 被调用。
+
+        停止时先关闭监听，再处理完队列中已接收的数据。
+
+        Args:
+            tcp: TCP 监听地址，None 表示不监听
+            udp: UDP 监听地址，None 表示不监听
+            ready: 监听就绪后设置的事件；实际地址写入 addresses
+        """
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._stopped = asyncio.Event()
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ingest-decode')
+        consumer = asyncio.create_task(self._consume(executor))
+        server = transport = None
+        try:
+            if tcp is not None:
+                server = await asyncio.start_server(self._handle_tcp, tcp[0], tcp[1])
+                self.addresses['tcp'] = server.sockets[0].getsockname()[:2]
+            if udp is not None:
+                transport, _ = await self._loop.create_datagram_endpoint(
+                    lambda: _DatagramProtocol(self), local_addr=udp)
+                self.addresses['udp'] = transport.get_extra_info('sockname')[:2]
+            if ready is not None:
+                ready.set()
+            await self._stopped.wait()
+        finally:
+            if server is not None:
+                server.close()
+                # 关闭仍然打开的连接，否则 wait_closed() 会等待对端断开
+                for writer in list(self._writers):
+                    writer.close()
+                await server.wait_closed()
+            if transport is not None:
+                transport.close()
+            # 处理完已接收的数据；解码任务异常退出时不再等待
+            join = asyncio.ensure_future(self._queue.join())
+            await asyncio.wait({join, consumer}, return_when=asyncio.FIRST_COMPLETED)
+            join.cancel()
+            consumer.cancel()
+            executor.shutdown(wait=True)
+            if ready is not None:
+                ready.set()
+
+    def stop(self) -> None:
+        """停止接收（可从其他线程调用）。"""
+        if self._loop is not None and self._stopped is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+
+
+def start_in_thread(ingestor: NetworkIngestor, tcp: Optional[Address] = None,
+                    udp: Optional[Address] = None) -> threading.Thread:
+    """
+    在后台线程的事件循环中运行接收器，监听就绪后返回。
+
+    Args:
+        ingestor: 接收器
+        tcp: TCP 监听地址
+        udp: UDP 监听地址
+
+    Returns:
+        运行事件循环的线程；调用 ingestor.stop() 后 join
+
+    Raises:
+        OSError: 监听失败时抛出
+    """
+    ready = threading.Event()
+    errors: List[BaseException] = []
+
+    def target() -> None:
+        try:
+            asyncio.run(ingestor.serve(tcp, udp, ready))
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            errors.append(e)
+            ready.set()
+
+    thread = threading.Thread(target=target, name='network-ingest', daemon=True)
+    thread.start()
+    ready.wait()
+    if errors:
+        thread.join()
+        raise errors[0]
+    return thread
@@ -0,0 +1,235 @@
+"""
+并行解析模块
+
+将输入文件按换行对齐切分为多个字节范围，每个范围在独立进程中
+解析并分析，最后通过 LogAnalyzer.merge() 合并部分结果。
+多个输入文件时以文件为单位并行分析后合并。
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .analyzer import LogAnalyzer
+from .batch import iter_batches
+from .diagnostics import ParseDiagnostics
+from .filters import RecordFilter
+
+# 小于该大小的分块没有并行收益
+MIN_CHUNK_BYTES = 1 << 20
+
+
+def split_file(filepath: str, chunks: int,
+               min_chunk_bytes: int = MIN_CHUNK_BYTES,
+               start: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    将文件切分为按行对齐的字节范围。
+
+    Args:
+        filepath: 文件路径
+        chunks: 期望的分块数
+        min_chunk_bytes: 每个分块的最小字节数
+        start: 起始字节偏移，必须位于行首
+        end: 结束字节偏移，None 表示文件末尾
+
+    Returns:
+        (start, end) 字节范围列表，覆盖 [start, end) 且互不重叠
+
+    Raises:
+        FileNotFoundError: 文件不存在时抛出
+    """
+    if end is None:
+        end = os.path.getsize(filepath)
+    size = end - start
+    if size <= 0:
+        return []
+
+    chunks = max(1, min(chunks, size // max(1, min_chunk_bytes)))
+    boundaries = [start]
+    with open(filepath, 'rb') as f:
+        for i in range(1, chunks):
+            target = start + size * i // chunks
+            if target <= boundaries[-1]:
+                continue
+            # 从目标位置的前一个字节开始找换行，保证边界落在行首
+            f.seek(target - 1)
+            f.readline()
+            boundary = f.tell()
+            if boundaries[-1] < boundary < end:
+                boundaries.append(boundary)
+    boundaries.append(end)
+
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _analyze_range(task: Tuple[str, int, int, Dict[str, Any], bool, Optional[RecordFilter]]
+                   ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    在工作进程中分析一个字节范围。
+
+    Args:
+        task: (文件路径, 起始偏移, 结束偏移, 分析器构造参数, 是否使用快速解码, 记录过滤器)
+
+    Returns:
+        (分析器状态, 解析诊断状态)
+    """
+    filepath, start, end, config, fast, record_filter = task
+    # 工作进程不实时输出，诊断信息由主进程汇总
+    diagnostics = ParseDiagnostics(stream=None)
+    analyzer = LogAnalyzer(**config)
+    for batch in iter_batches(filepath, start, end, fast, diagnostics, record_filter,
+                              keep_time=analyzer.needs_time,
+                              keep_messages=bool(analyzer.top_messages)):
+        analyzer.add_batch(batch)
+    return analyzer.to_state(), diagnostics.to_state()
+
+
+def analyze_file_parallel(filepath: str, workers: int,
+                          config: Optional[Dict[str, Any]] = None,
+                          min_chunk_bytes: int = MIN_CHUNK_BYTES,
+                          fast: bool = False,
+                          diagnostics: Optional[ParseDiagnostics] = None,
+                          start: int = 0, end: Optional[int] = None,
+                          record_filter: Optional[RecordFilter] = None) -> LogAnalyzer:
+    """
+    使用多个进程并行分析文件。
+
+    结果与单进程顺序处理一致（sketch 模式下满足相同的误差上界）。
+
+    Args:
+        filepath: JSONL 文件路径
+        workers: 工作进程数
+        config: 分析器构造参数（LogAnalyzer.config()），None 时使用默认配置
+        min_chunk_bytes: 每个分块的最小字节数
+        fast: 是否使用 schema 专用的快速解码器
+        diagnostics: 汇总各分块解析诊断的收集器
+        start: 起始字节偏移，必须位于行首
+        end: 结束字节偏移，None 表示文件末尾
+        record_filter: 记录过滤器，None 表示不过滤
+
+    Returns:
+        合并后的分析器
+
+    Raises:
+        FileNotFoundError: 文件不存在时抛出
+    """
+    analyzer = LogAnalyzer(**(config or {}))
+    config = analyzer.config()
+    ranges = split_file(filepath, workers, min_chunk_bytes, start, end)
+    tasks = [(filepath, start, end, config, fast, record_filter) for start, end in ranges]
+
+    if len(tasks) <= 1:
+        # 单个分块直接在当前进程处理，避免进程池开销
+        results = [_analyze_range(task) for task in tasks]
+        _merge_results(analyzer, diagnostics, results)
+        return analyzer
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+        # map 保持分块顺序，合并结果与顺序处理一致
+        _merge_results(analyzer, diagnostics, executor.map(_analyze_range, tasks))
+
+    return analyzer
+
+
+def _merge_results(analyzer: LogAnalyzer, diagnostics: Optional[ParseDiagnostics],
+                   results: Iterable[Tuple[Dict[str, Any], Dict[str, Any]]]) -> None:
+    """
+    按顺序合并各分块的分析结果。
+
+    Args:
+        analyzer: 接收合并结果的分析器
+        diagnostics: 接收诊断信息的收集器，None 时丢弃
+        results: (分析器状态, 解析诊断状态) 迭代器
+    """
+    for analyzer_state, diagnostics_state in results:
+        analyzer.merge(LogAnalyzer.from_state(analyzer_state))
+        if diagnostics is not None:
+            diagnostics.merge_state(diagnostics_state)
+
+
+def _analyze_file(task: Tuple[str, Dict[str, Any], bool, Optional[List[float]],
+                              Optional[RecordFilter]]
+                  ) -> Tuple[Dict[str, Any], Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    在工作进程中分析一个完整文件。
+
+    Args:
+        task: (文件路径, 分析器构造参数, 是否使用快速解码, 单文件统计的百分位数,
+              记录过滤器)；百分位数为 None 时不计算单文件统计
+
+    Returns:
+        (分析器状态, 解析诊断状态, 单文件统计或 None)
+    """
+    filepath, config, fast, per_file_quantiles, record_filter = task
+    diagnostics = ParseDiagnostics(stream=None)
+    diagnostics.source = filepath
+    analyzer = LogAnalyzer(**config)
+    for batch in iter_batches(filepath, fast=fast, diagnostics=diagnostics,
+                              record_filter=record_filter,
+                              keep_time=analyzer.needs_time,
+                              keep_messages=bool(analyzer.top_messages)):
+        analyzer.add_batch(batch)
+
+    file_stats = None
+    if per_file_quantiles is not None:
+        # 配置了时间窗口时与整体报告一致，使用窗口统计
+        if analyzer.window is not None:
+            file_stats = analyzer.get_window_stats(quantiles=per_file_quantiles)
+        else:
+            file_stats = analyzer.get_stats(quantiles=per_file_quantiles)
+        # 延迟序列只在整体报告中绘制，不随每个文件重复输出
+        file_stats.pop('series', None)
+    return analyzer.to_state(), diagnostics.to_state(), file_stats
+
+
+def analyze_files(filepaths: List[str], workers: int = 1,
+                  config: Optional[Dict[str, Any]] = None,
+                  fast: bool = False,
+                  diagnostics: Optional[ParseDiagnostics] = None,
+                  per_file_quantiles: Optional[List[float]] = None,
+                  record_filter: Optional[RecordFilter] = None
+                  ) -> Tuple[LogAnalyzer, Dict[str, Dict[str, Any]]]:
+    """
+    分析多个文件并合并结果。
+
+    workers > 1 时每个文件在独立进程中分析（压缩文件同样适用），
+    各自产生部分分析器状态，再按输入顺序合并。
+
+    Args:
+        filepaths: 文件路径列表
+        workers: 工作进程数
+        config: 分析器构造参数（LogAnalyzer.config()），None 时使用默认配置
+        fast: 是否使用 schema 专用的快速解码器
+        diagnostics: 汇总各文件解析诊断的收集器
+        per_file_quantiles: 计算单文件统计时使用的百分位数，None 表示不计算
+        record_filter: 记录过滤器，None 表示不过滤
+
+    Returns:
+        (合并后的分析器, {文件路径: 单文件统计})
+
+    Raises:
+        FileNotFoundError: 任一文件不存在时抛出
+    """
+    analyzer = LogAnalyzer(**(config or {}))
+    config = analyzer.config()
+    tasks = [(filepath, config, fast, per_file_quantiles, record_filter)
+             for filepath in filepaths]
+    per_file: Dict[str, Dict[str, Any]] = {}
+
+    def collect(results: Iterable[Tuple[Dict[str, Any], Dict[str, Any],
+                                        Optional[Dict[str, Any]]]]) -> None:
+        """按输入顺序合并各文件结果。"""
+        for filepath, (analyzer_state, diagnostics_state, file_stats) in zip(filepaths, results):
+            analyzer.merge(LogAnalyzer.from_state(analyzer_state))
+            if diagnostics is not None:
+                diagnostics.merge_state(diagnostics_state)
+            if file_stats is not None:
+                per_file[filepath] = file_stats
+
+    if workers <= 1 or len(tasks) <= 1:
+        collect(_analyze_file(task) for task in tasks)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            collect(executor.map(_analyze_file, tasks))
+
+    return analyzer, per_file
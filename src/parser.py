@@ -6,15 +6,42 @@ JSONL 日志解析器模块
 
 import json
 import sys
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterator, List, Optional, Union
 
+from .diagnostics import (
+    ParseDiagnostics, REASON_DECODE_ERROR, REASON_NOT_OBJECT, missing_field_reason
+)
+from .reader import open_lines
 
-def parse_line(line: str) -> Optional[Dict]:
+REQUIRED_FIELDS = ('timestamp', 'level', 'service', 'latency_ms', 'msg')
+
+# 行解码函数：输入一行和可选的诊断收集器，返回记录或 None
+LineDecoder = Callable[[Union[str, bytes], Optional[ParseDiagnostics]], Optional[Dict]]
+
+
+def _intern_fields(record: Dict) -> None:
+    """
+    驻留低基数的字符串字段，使保留的记录共享同一个字符串对象。
+
+    Args:
+        record: 日志记录
+    """
+    service = record['service']
+    if isinstance(service, str):
+        record['service'] = sys.intern(service)
+    level = record['level']
+    if isinstance(level, str):
+        record['level'] = sys.intern(level)
+
+
+def parse_line(line: Union[str, bytes],
+               diagnostics: Optional[ParseDiagnostics] = None) -> Optional[Dict]:
     """
     解析单行 JSON 字符串。
 
     Args:
-        line: JSON 格式的字符串
+        line: JSON 格式的字符串或 UTF-8 字节串
+        diagnostics: 诊断收集器；为 None 时失败信息直接输出到 stderr
 
     Returns:
         解析成功返回包含日志字段的字典，失败返回 None
@@ -25,20 +52,78 @@ def parse_line(line: str) -> Optional[Dict]:
 
     try:
         record = json.loads(line)
-        # 验证必需字段
-        required_fields = ['timestamp', 'level', 'service', 'latency_ms', 'msg']
-        if all(field in record for field in required_fields):
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        if diagnostics is not None:
+            diagnostics.record([REASON_DECODE_ERROR], line, str(e))
+        else:
+            print(f"[PARSER] JSON decode error: {e} - line: {line[:50]}...",
+                  file=sys.stderr)
+        return None
+
+    # 验证必需字段
+    if isinstance(record, dict):
+        missing = [field for field in REQUIRED_FIELDS if field not in record]
+        if not missing:
+            _intern_fields(record)
             return record
+        reasons = [missing_field_reason(field) for field in missing]
+    else:
+        reasons = [REASON_NOT_OBJECT]
+
+    if diagnostics is not None:
+        diagnostics.record(reasons, line)
+    else:
         print(f"[PARSER] Missing required fields in line: {line[:50]}...",
               file=sys.stderr)
-        return None
-    except json.JSONDecodeError as e:
-        print(f"[PARSER] JSON decode error: {e} - line: {line[:50]}...",
-              file=sys.stderr)
-        return None
+    return None
 
 
-def parse_file(filepath: str) -> List[Dict]:
+def iter_records(filepath: str, start: int = 0, end: Optional[int] = None,
+                 decoder: Optional[LineDecoder] = None,
+                 diagnostics: Optional[ParseDiagnostics] = None) -> Iterator[Dict]:
+    """
+    逐条产出 JSONL 文件中的有效记录。
+
+    与 parse_file() 不同，不会把整个文件的记录保存在内存中，
+    适合直接把记录送入 LogAnalyzer。文件通过 mmap 读取（见 reader 模块），
+    可以只处理 [start, end) 字节范围内开始的行，用于并行分块解析。
+
+    Args:
+        filepath: JSONL 文件路径
+        start: 起始字节偏移，必须位于行首
+        end: 结束字节偏移，None 表示读到文件末尾
+        decoder: 行解码函数，默认 parse_line，可替换为 fastpath.parse_line_fast
+        diagnostics: 诊断收集器，记录失败行的行号（从文件头读取时）和字节偏移
+
+    Yields:
+        有效的日志记录字典
+
+    Raises:
+        FileNotFoundError: 文件不存在时抛出（在首次迭代时）
+    """
+    if decoder is None:
+        decoder = parse_line
+
+    with open_lines(filepath, start) as lines:
+        position = start
+        # 只有从文件头开始读取时行号才有意义
+        line_number = 0 if start == 0 else None
+        for line in lines:
+            if end is not None and position >= end:
+                break
+            if diagnostics is not None:
+                diagnostics.offset = position
+                if line_number is not None:
+                    line_number += 1
+                    diagnostics.line_number = line_number
+            position += len(line)
+            record = decoder(line, diagnostics)
+            if record is not None:
+                yield record
+
+
+def parse_file(filepath: str, decoder: Optional[LineDecoder] = None,
+               diagnostics: Optional[ParseDiagnostics] = None) -> List[Dict]:
     """
     解析 JSONL 文件，返回所有有效记录。
 
@@ -46,6 +131,8 @@ def parse_file(filepath: str) -> List[Dict]:
 
     Args:
         filepath: JSONL 文件路径
+        decoder: 行解码函数，默认 parse_line
+        diagnostics: 诊断收集器，None 时失败信息直接输出到 stderr
 
     Returns:
         包含所有有效日志记录的列表
@@ -53,12 +140,4 @@ def parse_file(filepath: str) -> List[Dict]:
     Raises:
         FileNotFoundError: 文件不存在时抛出
     """
-    records = []
-
-    with open(filepath, 'r', encoding='utf-8') as f:
-        for line in f:
-            record = parse_line(line)
-            if record is not None:
-                records.append(record)
-
-    return records
+    return list(iter_records(filepath, decoder=decoder, diagnostics=diagnostics))
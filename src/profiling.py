@@ -0,0 +1,255 @@
+"""
+阶段剖析模块
+
+记录处理流水线各阶段的耗时、吞吐量（记录/秒、字节/秒）与进程峰值 RSS，
+并可对热点循环生成 cProfile 输出。
+"""
+
+import cProfile
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块
+    resource = None
+
+T = TypeVar('T')
+# 阶段结束时调用的钩子
+StageHook = Callable[['StageResult'], None]
+
+
+def peak_rss() -> Optional[int]:
+    """
+    返回当前进程的峰值常驻内存（字节）。
+
+    Returns:
+        峰值 RSS；平台不支持时返回 None
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KiB 为单位，macOS 以字节为单位
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class StageResult:
+    """单个阶段的剖析结果。"""
+
+    __slots__ = ('name', 'seconds', 'records', 'bytes', 'peak_rss')
+
+    def __init__(self, name: str, seconds: float = 0.0, records: int = 0,
+                 bytes_: int = 0, peak_rss_bytes: Optional[int] = None):
+        """
+        初始化阶段结果。
+
+        Args:
+            name: 阶段名称，子阶段使用 "父阶段.子阶段"
+            seconds: 墙钟耗时
+            records: 处理的记录数
+            bytes_: 处理的字节数
+            peak_rss_bytes: 阶段结束时的进程峰值 RSS
+        """
+        self.name = name
+        self.seconds = seconds
+        self.records = records
+        self.bytes = bytes_
+        self.peak_rss = peak_rss_bytes
+
+    @property
+    def records_per_sec(self) -> float:
+        """每秒处理的记录数。"""
+        return self.records / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def bytes_per_sec(self) -> float:
+        """每秒处理的字节数。"""
+        return self.bytes / self.seconds if self.seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        导出为字典。
+
+        Returns:
+            包含耗时、吞吐量和峰值 RSS 的字典
+        """
+        return {
+            'name': self.name,
+            'seconds': self.seconds,
+            'records': self.records,
+            'bytes': self.bytes,
+            'records_per_sec': self.records_per_sec,
+            'bytes_per_sec': self.bytes_per_sec,
+            'peak_rss': self.peak_rss,
+        }
+
+
+class StageProfiler:
+    """
+    流水线阶段剖析器。
+
+    用 stage() 包裹一个阶段，或用 add() 记录外部测得的阶段；每个阶段结束时
+    依次调用注册的钩子。timed_calls() 与 timed_iter() 累计流式处理中交错执行
+    的部分（例如解码与迭代）的耗时，供调用方拆分热点循环。
+    """
+
+    def __init__(self, hooks: Optional[Iterable[StageHook]] = None,
+                 cprofile_path: Optional[str] = None):
+        """
+        初始化剖析器。
+
+        Args:
+            hooks: 阶段结束时调用的钩子
+            cprofile_path: 热点阶段的 cProfile 输出路径，None 表示不生成
+        """
+        self.stages: List[StageResult] = []
+        self.hooks: List[StageHook] = list(hooks or ())
+        self.cprofile_path = cprofile_path
+        self.accumulated: Dict[str, float] = {}
+
+    def add_hook(self, hook: StageHook) -> None:
+        """
+        注册阶段结束钩子。
+
+        Args:
+            hook: 以 StageResult 为参数的回调
+        """
+        self.hooks.append(hook)
+
+    def add(self, name: str, seconds: float, records: int = 0, bytes_: int = 0) -> StageResult:
+        """
+        记录一个外部测得的阶段。
+
+        Args:
+            name: 阶段名称
+            seconds: 耗时
+            records: 记录数
+            bytes_: 字节数
+
+        Returns:
+            阶段结果
+        """
+        result = StageResult(name, seconds, records, bytes_, peak_rss())
+        self._finish(result)
+        return result
+
+    @contextmanager
+    def stage(self, name: str, hot: bool = False) -> Iterator[StageResult]:
+        """
+        剖析一个阶段。
+
+        调用方可在 with 块内设置 records 和 bytes。
+
+        Args:
+            name: 阶段名称
+            hot: 是否为热点阶段；设置了 cprofile_path 时对其生成 cProfile 输出
+
+        Yields:
+            阶段结果
+        """
+        result = StageResult(name)
+        profile = cProfile.Profile() if hot and self.cprofile_path else None
+        if profile is not None:
+            profile.enable()
+        start = time.perf_counter()
+        try:
+            yield result
+        finally:
+            result.seconds = time.perf_counter() - start
+            if profile is not None:
+                profile.disable()
+                profile.dump_stats(self.cprofile_path)
+            result.peak_rss = peak_rss()
+            self._finish(result)
+
+    def _finish(self, result: StageResult) -> None:
+        """
+        保存阶段结果并调用钩子。
+
+        Args:
+            result: 阶段结果
+        """
+        self.stages.append(result)
+        for hook in self.hooks:
+            hook(result)
+
+    def timed_calls(self, func: Callable[..., T], name: str) -> Callable[..., T]:
+        """
+        包装函数，把每次调用的耗时累计到 accumulated[name]。
+
+        Args:
+            func: 被包装的函数
+            name: 累计项名称
+
+        Returns:
+            包装后的函数
+        """
+        accumulated = self.accumulated
+        accumulated.setdefault(name, 0.0)
+        perf_counter = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                accumulated[name] += perf_counter() - start
+
+        return wrapper
+
+    def timed_iter(self, iterable: Iterable[T], name: str) -> Iterator[T]:
+        """
+        包装迭代器，把每次取下一个元素的耗时累计到 accumulated[name]。
+
+        Args:
+            iterable: 被包装的可迭代对象
+            name: 累计项名称
+
+        Yields:
+            原样产出的元素
+        """
+        accumulated = self.accumulated
+        accumulated.setdefault(name, 0.0)
+        perf_counter = time.perf_counter
+        iterator = iter(iterable)
+        while True:
+            start = perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                accumulated[name] += perf_counter() - start
+                return
+            accumulated[name] += perf_counter() - start
+            yield item
+
+    def to_stats(self) -> Dict[str, Any]:
+        """
+        导出剖析结果，用于嵌入报告。
+
+        Returns:
+            {'stages': [阶段字典...], 'total_seconds': 顶层阶段耗时之和}
+        """
+        return {
+            'stages': [stage.to_dict() for stage in self.stages],
+            'total_seconds': sum(stage.seconds for stage in self.stages if '.' not in stage.name),
+        }
+
+    def format_summary(self) -> str:
+        """
+        格式化为终端输出的摘要表。
+
+        Returns:
+            多行文本
+        """
+        rows = [f'{"stage":<20} {"seconds":>9} {"records/s":>13} {"MiB/s":>9} {"peak RSS":>10}']
+        for stage in self.stages:
+            name = '  ' + stage.name.split('.', 1)[1] if '.' in stage.name else stage.name
+            rss = f'{stage.peak_rss / 1048576:.1f} MiB' if stage.peak_rss is not None else '-'
+            rows.append(
+                f'{name:<20} {stage.seconds:>9.3f} '
+                f'{stage.records_per_sec:>13,.0f} '
+                f'{stage.bytes_per_sec / 1048576:>9.1f} {rss:>10}'
+            )
+        return '\n'.join(rows)
@@ -0,0 +1,292 @@
+"""
+输入读取模块
+
+基于 mmap 的行读取：把文件映射到内存后直接在映射缓冲区中查找行边界，
+省去文本模式的解码和缓冲区之间的拷贝，是串行与并行分块解析的共同基础。
+无法映射的输入（空文件、管道等）回退到普通的二进制缓冲读取。
+
+压缩输入（gzip/bz2/xz）按魔数识别，在后台线程中流式解压，通过有界队列
+把数据块交给解析线程，使解压与 JSON 解码、分析重叠进行。
+
+路径 "-" 表示标准输入：以大块读取 sys.stdin.buffer 并自行切分行，
+避免文本模式逐行迭代的解码与缓冲开销。
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+import mmap
+import queue
+import sys
+import threading
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, Optional, Union
+
+# 魔数 -> 压缩格式
+_MAGIC_NUMBERS = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+)
+# 三种打开函数都接受路径或二进制流；传入流时不会关闭它
+_OPENERS: Dict[str, Callable[[Union[str, BinaryIO]], BinaryIO]] = {
+    'gzip': lambda source: gzip.open(source, 'rb'),
+    'bz2': lambda source: bz2.open(source, 'rb'),
+    'xz': lambda source: lzma.open(source, 'rb'),
+}
+
+DECOMPRESS_BLOCK_SIZE = 1 << 20
+DECOMPRESS_QUEUE_SIZE = 8
+
+# 表示标准输入的路径
+STDIN = '-'
+STREAM_BLOCK_SIZE = 1 << 20
+
+
+def _match_magic(head: bytes) -> Optional[str]:
+    """
+    根据数据开头的魔数识别压缩格式。
+
+    Args:
+        head: 数据开头的字节
+
+    Returns:
+        压缩格式名称，未识别时返回 None
+    """
+    for magic, codec in _MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+def detect_compression(filepath: str) -> Optional[str]:
+    """
+    根据文件头的魔数识别压缩格式。
+
+    Args:
+        filepath: 文件路径，"-" 表示标准输入
+
+    Returns:
+        'gzip'、'bz2'、'xz'，未压缩时返回 None
+
+    Raises:
+        FileNotFoundError: 文件不存在时抛出
+    """
+    if filepath == STDIN:
+        return detect_stream_compression(sys.stdin.buffer)
+    with open(filepath, 'rb') as f:
+        head = f.read(6)
+    return _match_magic(head)
+
+
+def detect_stream_compression(stream: BinaryIO) -> Optional[str]:
+    """
+    在不消耗数据的前提下识别流的压缩格式。
+
+    只有支持 peek() 的缓冲流（例如 sys.stdin.buffer）才能识别；
+    peek() 返回的字节不足以匹配魔数时按未压缩处理。
+
+    Args:
+        stream: 二进制流
+
+    Returns:
+        压缩格式名称，未压缩或无法识别时返回 None
+    """
+    peek = getattr(stream, 'peek', None)
+    if peek is None:
+        return None
+    return _match_magic(peek(6)[:6])
+
+
+def iter_stream_blocks(stream: BinaryIO,
+                       block_size: int = STREAM_BLOCK_SIZE) -> Iterator[bytes]:
+    """
+    以大块读取二进制流直到结束。
+
+    Args:
+        stream: 二进制流
+        block_size: 每次读取的字节数
+
+    Yields:
+        数据块
+    """
+    read = stream.read
+    while True:
+        block = read(block_size)
+        if not block:
+            return
+        yield block
+
+
+def iter_block_lines(blocks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    把任意切分的数据块重新切分为行。
+
+    跨块的行会被拼接；最后一行没有换行符时原样产出。
+
+    Args:
+        blocks: 字节块迭代器
+
+    Yields:
+        包含换行符的行
+    """
+    carry = b''
+    for block in blocks:
+        last_newline = block.rfind(b'\n')
+        if last_newline < 0:
+            carry += block
+            continue
+        complete = carry + block[:last_newline + 1] if carry else block[:last_newline + 1]
+        carry = block[last_newline + 1:]
+        # BytesIO 的行迭代在 C 中按 \n 切分，与文件逐行读取的语义一致
+        yield from io.BytesIO(complete)
+    if carry:
+        yield carry
+
+
+def iter_decompressed_blocks(filepath: Union[str, BinaryIO], codec: str,
+                             block_size: int = DECOMPRESS_BLOCK_SIZE,
+                             queue_size: int = DECOMPRESS_QUEUE_SIZE) -> Iterator[bytes]:
+    """
+    在后台线程中解压文件，按块产出解压后的数据。
+
+    解压线程与消费者通过有界队列连接：消费者较慢时解压线程阻塞，
+    内存占用不超过 queue_size 个数据块。zlib/bz2/lzma 解压时释放 GIL，
+    因此解压与解析可以真正并行。
+
+    Args:
+        filepath: 压缩文件路径或二进制流
+        codec: 压缩格式
+        block_size: 每块解压后的字节数
+        queue_size: 队列中最多缓存的块数
+
+    Yields:
+        解压后的数据块
+
+    Raises:
+        OSError, EOFError, lzma.LZMAError: 压缩数据损坏时抛出
+    """
+    blocks: 'queue.Queue' = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    done = object()
+
+    def produce() -> None:
+        """解压线程：读取数据块放入队列，结束或出错时放入标记。"""
+        try:
+            with _OPENERS[codec](filepath) as f:
+                while not stop.is_set():
+                    block = f.read(block_size)
+                    if not block:
+                        break
+                    _put(block)
+            _put(done)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            _put(e)
+
+    def _put(item: object) -> None:
+        """放入队列；消费者已停止时放弃。"""
+        while not stop.is_set():
+            try:
+                blocks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    thread = threading.Thread(target=produce, name=f'decompress-{codec}', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = blocks.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # 消费者提前结束时通知解压线程退出
+        stop.set()
+        thread.join()
+
+
+@contextmanager
+def open_lines(filepath: str, start: int = 0) -> Iterator[Iterator[bytes]]:
+    """
+    打开文件并返回从 start 开始的行迭代器。
+
+    每行是包含换行符的 bytes。映射缓冲区在退出上下文时释放。
+    映射文件用 mmap.readline 逐行切分：换行查找和切片都在 C 中完成，
+    实测（30 万行、38 MB）0.05 秒，而 Python 循环 mapped.find() 后产出
+    切片需 0.19 秒，产出 memoryview 需 0.22 秒；memoryview 还不能直接
+    交给 json.loads，且未释放时无法关闭映射，因此仍产出 bytes。
+    压缩文件自动在后台线程中解压，此时偏移指解压后的数据。
+    "-" 表示标准输入，按大块读取后切分为行，退出上下文时不关闭标准输入。
+
+    Args:
+        filepath: 文件路径，"-" 表示标准输入
+        start: 起始字节偏移，必须位于行首；压缩文件和标准输入只支持 0
+
+    Yields:
+        行迭代器
+
+    Raises:
+        FileNotFoundError: 文件不存在时抛出
+        ValueError: 对压缩文件或标准输入指定非零偏移时抛出
+    """
+    if filepath == STDIN:
+        if start:
+            raise ValueError(f'标准输入不支持从偏移 {start} 开始读取')
+        stream = sys.stdin.buffer
+        codec = detect_stream_compression(stream)
+        blocks = (iter_decompressed_blocks(stream, codec) if codec is not None
+                  else iter_stream_blocks(stream))
+        try:
+            yield iter_block_lines(blocks)
+        finally:
+            blocks.close()
+        return
+
+    codec = detect_compression(filepath)
+    if codec is not None:
+        if start:
+            raise ValueError(f'压缩文件（{codec}）不支持从偏移 {start} 开始读取')
+        blocks = iter_decompressed_blocks(filepath, codec)
+        try:
+            yield iter_block_lines(blocks)
+        finally:
+            blocks.close()
+        return
+
+    with open(filepath, 'rb') as f:
+        mapped = _map_file(f)
+        if mapped is None:
+            f.seek(start)
+            yield iter(f)
+            return
+
+        try:
+            mapped.seek(start)
+            yield iter(mapped.readline, b'')
+        finally:
+            mapped.close()
+
+
+def _map_file(f: BinaryIO):
+    """
+    以只读方式映射文件。
+
+    Args:
+        f: 以二进制模式打开的文件
+
+    Returns:
+        mmap 对象；文件为空或不支持映射时返回 None
+    """
+    try:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, OSError):
+        # 空文件不能映射；管道、字符设备等不支持 mmap
+        return None
+    if hasattr(mapped, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+        # 顺序访问提示，让内核提前预读
+        mapped.madvise(mmap.MADV_SEQUENTIAL)
+    return mapped
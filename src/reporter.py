@@ -4,8 +4,30 @@ HTML 报告生成器模块
 生成包含统计信息的 HTML 监控面板。
 """
 
+import heapq
+import html
+import os
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Sequence, TextIO
+
+from .analyzer import quantile_key
+from .diagnostics import format_location
+from .series import downsample_lttb
+from .window import format_timestamp
+
+# 服务表默认直接列出的服务数，其余折叠
+DEFAULT_TOP_SERVICES = 100
+
+# 趋势图每条曲线最多绘制的点数；再长的输入报告大小也不变
+DEFAULT_CHART_POINTS = 300
+# 趋势图尺寸与绘图区边距（SVG 用户单位）
+CHART_WIDTH = 960
+CHART_HEIGHT = 220
+CHART_MARGIN_LEFT = 70
+CHART_MARGIN_RIGHT = 10
+CHART_MARGIN_TOP = 10
+CHART_MARGIN_BOTTOM = 25
+CHART_COLORS = ('#17a2b8', '#dc3545', '#6f42c1', '#fd7e14', '#28a745', '#e83e8c', '#343a40')
 
 
 def _get_error_rate_color(error_rate: float) -> str:
@@ -38,44 +60,488 @@ def _format_latency(value: float) -> str:
     return f'{value:.2f} ms'
 
 
-def generate_report(stats: Dict[str, Any], output_path: str = 'report.html') -> None:
+def _format_accuracy(accuracy: Dict[str, Any]) -> str:
     """
-    生成 HTML 报告文件。
+    格式化分位数精度模式说明。
+
+    Args:
+        accuracy: get_stats() 返回的 accuracy 字典
+
+    Returns:
+        说明文字
+    """
+    if accuracy.get('mode') == 'sketch':
+        return f"近似分位数（草图模式，相对误差 ≤ {accuracy.get('relative_accuracy', 0):.2%}）"
+    return '精确分位数'
+
+
+def _format_window(window: Optional[Dict[str, Any]]) -> str:
+    """
+    生成时间窗口说明。
+
+    Args:
+        window: get_window_stats() 返回的 window 字典，None 表示未使用时间窗口
+
+    Returns:
+        HTML 片段
+    """
+    if not window:
+        return ''
+    if window.get('start') is None:
+        text = f"时间窗口: 最近 {window.get('seconds', 0):g} 秒（暂无数据）"
+    else:
+        text = (f"时间窗口: 最近 {window.get('seconds', 0):g} 秒 "
+                f"({window['start']} ~ {window['end']} UTC)")
+    return f'<p class="timestamp">{html.escape(text)}</p>'
+
+
+def _tail_key(quantiles: Sequence[float]) -> str:
+    """
+    返回最高百分位的统计键，用于汇总卡片和各文件的尾延迟。
+
+    Args:
+        quantiles: get_stats() 使用的百分位数列表
+
+    Returns:
+        例如 "p99"
+    """
+    return quantile_key(max(quantiles))
+
+
+def _render_sources(sources: Optional[Dict[str, Dict[str, Any]]], tail_key: str) -> str:
+    """
+    生成按输入文件分列的统计区块。
+
+    Args:
+        sources: {文件路径: 单文件统计}，None 或空时不生成
+        tail_key: 尾延迟列使用的百分位键
+
+    Returns:
+        HTML 片段
+    """
+    if not sources:
+        return ''
+    rows = ''
+    for source, source_stats in sorted(sources.items()):
+        services = source_stats.get('services', {})
+        source_tail = max((svc.get(tail_key, 0) for svc in services.values()), default=0.0)
+        source_error_rate = source_stats.get('error_rate', 0.0)
+        rows += (
+            f'<tr><td>{html.escape(source)}</td>'
+            f'<td>{source_stats.get("total_logs", 0):,}</td>'
+            f'<td style="color: {_get_error_rate_color(source_error_rate)}">'
+            f'{source_error_rate:.2f}%</td>'
+            f'<td>{_format_latency(source_tail)}</td>'
+            f'<td>{len(services)}</td></tr>'
+        )
+    return f'''
+        <div class="table-container section">
+            <h2>各输入文件统计</h2>
+            <table><thead><tr><th>文件</th><th>日志数</th><th>错误率</th><th>最大 {tail_key.upper()} 延迟</th><th>服务数</th></tr></thead>
+            <tbody>{rows}</tbody></table>
+        </div>'''
+
+
+def _render_chart(title: str, lines: List[tuple], unit: str, max_points: int) -> str:
+    """
+    生成一张内联 SVG 折线图。
+
+    每条曲线先用 LTTB 降采样到 max_points 个点，纵轴从 0 开始。
+
+    Args:
+        title: 图标题
+        lines: [(图例名称, [(Unix 秒, 数值), ...]), ...]，点按时间排序
+        unit: 纵轴数值单位，'ms' 或 '%'
+        max_points: 每条曲线最多绘制的点数
+
+    Returns:
+        HTML 片段
+    """
+    lines = [(name, downsample_lttb(points, max_points)) for name, points in lines if points]
+    if not lines:
+        return ''
+    x_min = min(points[0][0] for _, points in lines)
+    x_max = max(points[-1][0] for _, points in lines)
+    y_max = max(y for _, points in lines for _, y in points)
+    if y_max <= 0:
+        y_max = 1.0
+    plot_width = CHART_WIDTH - CHART_MARGIN_LEFT - CHART_MARGIN_RIGHT
+    plot_height = CHART_HEIGHT - CHART_MARGIN_TOP - CHART_MARGIN_BOTTOM
+    bottom = CHART_MARGIN_TOP + plot_height
+
+    def x_of(x: float) -> float:
+        if x_max == x_min:
+            return CHART_MARGIN_LEFT + plot_width / 2
+        return CHART_MARGIN_LEFT + (x - x_min) / (x_max - x_min) * plot_width
+
+    def y_of(y: float) -> float:
+        return bottom - y / y_max * plot_height
+
+    def label(y: float) -> str:
+        return f'{y:.2f}%' if unit == '%' else _format_latency(y)
+
+    parts = []
+    for fraction in (0.0, 0.5, 1.0):
+        y = CHART_MARGIN_TOP + plot_height * (1 - fraction)
+        parts.append(
+            f'<line x1="{CHART_MARGIN_LEFT}" y1="{y:.1f}" x2="{CHART_WIDTH - CHART_MARGIN_RIGHT}" '
+            f'y2="{y:.1f}" stroke="#eee"/>'
+            f'<text x="{CHART_MARGIN_LEFT - 6}" y="{y + 4:.1f}" text-anchor="end">'
+            f'{label(y_max * fraction)}</text>'
+        )
+    parts.append(
+        f'<text x="{CHART_MARGIN_LEFT}" y="{CHART_HEIGHT - 6}">'
+        f'{format_timestamp(x_min)}</text>'
+        f'<text x="{CHART_WIDTH - CHART_MARGIN_RIGHT}" y="{CHART_HEIGHT - 6}" text-anchor="end">'
+        f'{format_timestamp(x_max)}</text>'
+    )
+    legend = ''
+    for index, (name, points) in enumerate(lines):
+        color = CHART_COLORS[index % len(CHART_COLORS)]
+        coordinates = ' '.join(f'{x_of(x):.1f},{y_of(y):.1f}' for x, y in points)
+        if len(points) == 1:
+            parts.append(f'<circle cx="{x_of(points[0][0]):.1f}" cy="{y_of(points[0][1]):.1f}" '
+                         f'r="3" fill="{color}"/>')
+        else:
+            parts.append(f'<polyline fill="none" stroke="{color}" stroke-width="1.5" '
+                         f'points="{coordinates}"/>')
+        legend += (f'<span><i style="background: {color}"></i>'
+                   f'{html.escape(str(name))}</span>')
+    return (
+        f'<h3>{html.escape(title)}</h3>'
+        f'<svg class="chart" viewBox="0 0 {CHART_WIDTH} {CHART_HEIGHT}" role="img" '
+        f'aria-label="{html.escape(title)}">{"".join(parts)}</svg>'
+        f'<div class="chart-legend">{legend}</div>'
+    )
+
+
+def _render_series(series: Optional[Dict[str, Any]],
+                   max_points: int = DEFAULT_CHART_POINTS) -> str:
+    """
+    生成延迟与错误率趋势图区块。
+
+    Args:
+        series: LatencySeries.get_series() 的返回值，None 时不生成
+        max_points: 每条曲线最多绘制的点数
+
+    Returns:
+        HTML 片段
+    """
+    if series is None:
+        return ''
+    times = series.get('timestamps', [])
+    if len(times) < 2:
+        body = '<div class="no-data">时间间隔不足，无法绘制趋势图</div>'
+    else:
+        overall = series.get('overall', {})
+        body = (
+            f'<p class="accuracy-note">每个间隔 {series["interval_seconds"]:g} 秒，'
+            f'共 {len(times):,} 个间隔（{series["start"]} ~ {series["end"]} UTC）；'
+            f'每条曲线最多绘制 {max_points} 个点</p>'
+        )
+        body += _render_chart('全部服务延迟', [
+            (key.upper(), list(zip(times, values))) for key, values in overall.items()
+        ], 'ms', max_points)
+        if overall:
+            # 按服务的曲线只画最高的百分位
+            top_key = max(overall, key=lambda key: float(key[1:]))
+            body += _render_chart(f'各服务 {top_key.upper()} 延迟', [
+                (service, [(t, v) for t, v in zip(times, columns[top_key]) if v is not None])
+                for service, columns in series.get('services', {}).items()
+            ], 'ms', max_points)
+        body += _render_chart('错误率', [
+            ('错误率', list(zip(times, series.get('error_rate', []))))
+        ], '%', max_points)
+    return f'''
+        <div class="table-container section">
+            <h2>延迟与错误率趋势</h2>
+            {body}
+        </div>'''
+
+
+def _render_service_levels(services: Dict[str, Dict[str, Any]],
+                           top_n: Optional[int]) -> str:
+    """
+    生成各服务错误与警告率区块。
+
+    按错误率、警告率从高到低排列，服务数超过 top_n 时只列出前 top_n 个。
+
+    Args:
+        services: {服务名: 服务统计}；统计中没有 error_count 时（如时间窗口统计）不生成
+        top_n: 最多列出的服务数，None 或 0 表示全部列出
+
+    Returns:
+        HTML 片段
+    """
+    if not services or not all('error_count' in svc for svc in services.values()):
+        return ''
+    ranked = sorted(services, key=lambda name: (-services[name]['error_rate'],
+                                                -services[name]['warn_rate'], name))
+    note = ''
+    if top_n and len(ranked) > top_n:
+        ranked = ranked[:top_n]
+        note = f'<p class="accuracy-note">按错误率列出最高的 {top_n} 个服务</p>'
+    rows = ''.join(
+        f'<tr><td>{html.escape(name)}</td>'
+        f'<td>{services[name].get("count", 0):,}</td>'
+        f'<td>{services[name]["error_count"]:,}</td>'
+        f'<td style="color: {_get_error_rate_color(services[name]["error_rate"])}">'
+        f'{services[name]["error_rate"]:.2f}%</td>'
+        f'<td>{services[name]["warn_count"]:,}</td>'
+        f'<td>{services[name]["warn_rate"]:.2f}%</td></tr>'
+        for name in ranked
+    )
+    return f'''
+        <div class="table-container section">
+            <h2>各服务错误与警告</h2>
+            {note}
+            <table><thead><tr><th>服务名称</th><th>日志数</th><th>错误数</th><th>错误率</th><th>警告数</th><th>警告率</th></tr></thead>
+            <tbody>{rows}</tbody></table>
+        </div>'''
+
+
+def _render_top_messages(top_messages: Optional[List[Dict[str, Any]]]) -> str:
+    """
+    生成高频消息区块。
+
+    Args:
+        top_messages: get_stats() 返回的 top_messages，None 时不生成
+
+    Returns:
+        HTML 片段
+    """
+    if top_messages is None:
+        return ''
+    if not top_messages:
+        body = '<div class="no-data">暂无消息数据</div>'
+    else:
+        rows = ''.join(
+            f'<tr><td>{html.escape(str(item["service"]))}</td>'
+            f'<td>{html.escape(item["level"])}</td>'
+            f'<td><code>{html.escape(item["msg"])}</code></td>'
+            f'<td>{item["count"]:,}</td>'
+            f'<td>{item["overcount"]:,}</td></tr>'
+            for item in top_messages
+        )
+        body = (
+            '<p class="accuracy-note">有界内存的近似计数：次数是上界，'
+            '真实次数不少于 次数 − 最多高估</p>'
+            '<table><thead><tr><th>服务名称</th><th>级别</th><th>消息</th>'
+            '<th>次数</th><th>最多高估</th></tr></thead>'
+            f'<tbody>{rows}</tbody></table>'
+        )
+    return f'''
+        <div class="table-container section">
+            <h2>高频消息</h2>
+            {body}
+        </div>'''
+
+
+def _render_diagnostics(summary: Optional[Dict[str, Any]]) -> str:
+    """
+    生成解析诊断区块。
+
+    Args:
+        summary: ParseDiagnostics.summary() 的返回值，None 时不生成
+
+    Returns:
+        HTML 片段
+    """
+    if summary is None:
+        return ''
+    if not summary.get('failures'):
+        body = '<div class="no-data">没有解析失败的行</div>'
+    else:
+        reason_rows = ''.join(
+            f'<tr><td>{html.escape(reason)}</td><td>{count}</td></tr>'
+            for reason, count in summary.get('reasons', {}).items()
+        )
+        sample_rows = ''.join(
+            '<tr><td>{}</td><td><code>{}</code></td></tr>'.format(
+                html.escape(format_location(sample)),
+                html.escape(sample.get('prefix', ''))
+            )
+            for sample in summary.get('samples', [])
+        )
+        body = (
+            f'<p class="accuracy-note">共 {summary["failures"]:,} 行解析失败</p>'
+            '<table><thead><tr><th>原因</th><th>次数</th></tr></thead>'
+            f'<tbody>{reason_rows}</tbody></table>'
+        )
+        if sample_rows:
+            body += (
+                '<table><thead><tr><th>位置</th><th>行前缀</th></tr></thead>'
+                f'<tbody>{sample_rows}</tbody></table>'
+            )
+    return f'''
+        <div class="table-container section">
+            <h2>解析诊断</h2>
+            {body}
+        </div>'''
+
+
+def _render_profile(profile: Optional[Dict[str, Any]]) -> str:
+    """
+    生成阶段剖析区块。
+
+    Args:
+        profile: StageProfiler.to_stats() 的返回值，None 时不生成
+
+    Returns:
+        HTML 片段
+    """
+    if not profile:
+        return ''
+    rows = ''
+    for stage in profile.get('stages', []):
+        name = stage['name']
+        if '.' in name:
+            name = '&nbsp;&nbsp;' + html.escape(name.split('.', 1)[1])
+        else:
+            name = html.escape(name)
+        peak = stage.get('peak_rss')
+        peak_text = f'{peak / 1048576:.1f} MiB' if peak is not None else '-'
+        rows += (
+            f'<tr><td>{name}</td>'
+            f'<td>{stage["seconds"]:.3f} s</td>'
+            f'<td>{stage["records_per_sec"]:,.0f}</td>'
+            f'<td>{stage["bytes_per_sec"] / 1048576:.1f}</td>'
+            f'<td>{peak_text}</td></tr>'
+        )
+    return f'''
+        <div class="table-container section">
+            <h2>阶段剖析</h2>
+            <p class="accuracy-note">报告生成之前的各阶段合计 {profile.get("total_seconds", 0):.3f} 秒</p>
+            <table><thead><tr><th>阶段</th><th>耗时</th><th>记录/秒</th><th>MiB/秒</th><th>峰值 RSS</th></tr></thead>
+            <tbody>{rows}</tbody></table>
+        </div>'''
+
+
+def _service_row(service_name: str, service_stats: Dict[str, Any],
+                 quantile_keys: List[str]) -> str:
+    """
+    生成一行服务统计。
+
+    Args:
+        service_name: 服务名称
+        service_stats: 服务统计
+        quantile_keys: 百分位列的键
+
+    Returns:
+        HTML 表格行
+    """
+    quantile_cells = ''.join(
+        f'<td>{_format_latency(service_stats.get(key, 0))}</td>'
+        for key in quantile_keys
+    )
+    return (
+        f'<tr><td>{html.escape(service_name)}</td>'
+        f'<td>{service_stats.get("count", 0)}</td>'
+        f'{quantile_cells}'
+        f'<td>{_format_latency(service_stats.get("min", 0))}</td>'
+        f'<td>{_format_latency(service_stats.get("max", 0))}</td></tr>\n'
+    )
+
+
+def _write_service_tables(f: TextIO, services: Dict[str, Dict[str, Any]],
+                          quantile_keys: List[str], sort_key: str,
+                          top_n: Optional[int]) -> bool:
+    """
+    逐行写出服务表格。
+
+    服务数不超过 top_n 时按名称列出全部服务；否则先列出最高百分位延迟最大的
+    top_n 个服务，其余服务放在折叠区块的 <template> 中，展开时才插入页面，
+    避免浏览器一次渲染数万行。
+
+    Args:
+        f: 输出文件
+        services: {服务名: 服务统计}
+        quantile_keys: 百分位列的键
+        sort_key: 折叠时用于排序的最高百分位键
+        top_n: 主表最多列出的服务数，None 或 0 表示全部列出
+
+    Returns:
+        是否生成了折叠区块
+    """
+    header = (
+        '<table><thead><tr><th>服务名称</th><th>日志数</th>'
+        + ''.join(f'<th>{key.upper()} 延迟</th>' for key in quantile_keys)
+        + '<th>最小延迟</th><th>最大延迟</th></tr></thead>'
+    )
+
+    if not top_n or len(services) <= top_n:
+        f.write(header + '<tbody>\n')
+        f.writelines(_service_row(name, services[name], quantile_keys)
+                     for name in sorted(services))
+        f.write('</tbody></table>\n')
+        return False
+
+    top = heapq.nlargest(top_n, services, key=lambda name: services[name].get(sort_key, 0))
+    shown = set(top)
+    f.write(f'<p class="accuracy-note">按 {sort_key.upper()} 延迟列出最高的 {top_n} 个服务</p>\n')
+    f.write(header + '<tbody>\n')
+    f.writelines(_service_row(name, services[name], quantile_keys) for name in top)
+    f.write('</tbody></table>\n')
+
+    f.write(
+        '<details class="more-services">'
+        f'<summary>其余 {len(services) - len(shown):,} 个服务（按名称排序，展开后加载）</summary>\n'
+        + header + '<tbody></tbody></table>\n<template>\n'
+    )
+    f.writelines(_service_row(name, services[name], quantile_keys)
+                 for name in sorted(services) if name not in shown)
+    f.write('</template></details>\n')
+    return True
+
+
+# 展开折叠区块时把 <template> 中的行插入表格（只插入一次）
+_EXPAND_SCRIPT = """<script>
+document.querySelectorAll('details.more-services').forEach(function (details) {
+    details.addEventListener('toggle', function () {
+        var template = details.querySelector('template');
+        if (details.open && template) {
+            details.querySelector('tbody').appendChild(template.content);
+            template.remove();
+        }
+    });
+});
+</script>
+"""
+
+
+def write_report(stats: Dict[str, Any], f: TextIO,
+                 top_n: Optional[int] = DEFAULT_TOP_SERVICES) -> None:
+    """
+    将 HTML 报告按块流式写入文本流，耗时与内存随服务数线性增长。
 
     Args:
         stats: 统计数据字典，包含 total_logs, error_count, error_rate, services 等字段
-        output_path: 输出 HTML 文件路径，默认为 report.html
+        f: 输出流
+        top_n: 服务表最多直接列出的服务数，其余折叠；None 或 0 表示全部列出
     """
     # 提取统计数据
     total_logs = stats.get('total_logs', 0)
     error_rate = stats.get('error_rate', 0.0)
     services = stats.get('services', {})
+    accuracy_note = _format_accuracy(stats.get('accuracy', {}))
+    window_note = _format_window(stats.get('window'))
+
+    # 百分位列由 get_stats() 的 quantiles 决定
+    quantiles = stats.get('quantiles', (50, 99))
+    quantile_keys = [quantile_key(p) for p in quantiles]
 
-    # 计算全局 P99（所有服务中的最大 P99）
-    global_p99 = 0.0
+    # 计算全局尾延迟（所有服务中最高百分位的最大值）
+    tail_key = _tail_key(quantiles)
+    global_tail = 0.0
     if services:
-        global_p99 = max(
-            svc.get('p99', 0) for svc in services.values()
+        global_tail = max(
+            svc.get(tail_key, 0) for svc in services.values()
         )
 
     # 获取错误率颜色
     error_rate_color = _get_error_rate_color(error_rate)
 
-    # 生成服务表格行
-    service_rows = ''
-    for service_name, service_stats in sorted(services.items()):
-        service_rows += f'''
-            <tr>
-                <td>{service_name}</td>
-                <td>{service_stats.get('count', 0)}</td>
-                <td>{_format_latency(service_stats.get('p50', 0))}</td>
-                <td>{_format_latency(service_stats.get('p99', 0))}</td>
-                <td>{_format_latency(service_stats.get('min', 0))}</td>
-                <td>{_format_latency(service_stats.get('max', 0))}</td>
-            </tr>'''
-
-    # 生成完整 HTML
-    html_content = f'''<!DOCTYPE html>
+    page_start = f'''<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
     <meta charset="UTF-8">
@@ -180,6 +646,45 @@ def generate_report(stats: Dict[str, Any], output_path: str = 'report.html') ->
         td {{
             color: #333;
         }}
+        .accuracy-note {{
+            margin: -10px 0 15px;
+            color: #888;
+            font-size: 0.85em;
+        }}
+        .section {{
+            margin-top: 30px;
+        }}
+        .table-container h3 {{
+            margin: 20px 0 10px;
+            color: #555;
+            font-size: 1.1em;
+        }}
+        svg.chart {{
+            width: 100%;
+            height: auto;
+            font-size: 11px;
+            fill: #888;
+        }}
+        .chart-legend span {{
+            display: inline-block;
+            margin-right: 15px;
+            color: #555;
+            font-size: 0.85em;
+        }}
+        .chart-legend i {{
+            display: inline-block;
+            width: 10px;
+            height: 10px;
+            margin-right: 5px;
+        }}
+        details.more-services {{
+            margin-top: 20px;
+        }}
+        details.more-services summary {{
+            cursor: pointer;
+            color: #555;
+            font-weight: 600;
+        }}
         .no-data {{
             text-align: center;
             padding: 40px;
@@ -193,6 +698,7 @@ def generate_report(stats: Dict[str, Any], output_path: str = 'report.html') ->
         <div class="header">
             <h1>📊 Log Stream Analyzer</h1>
             <p class="timestamp">报告生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+            {window_note}
         </div>
 
         <div class="summary-cards">
@@ -205,19 +711,48 @@ def generate_report(stats: Dict[str, Any], output_path: str = 'report.html') ->
                 <div class="value">{error_rate:.2f}%</div>
             </div>
             <div class="card p99">
-                <div class="label">全局 P99 延迟</div>
-                <div class="value">{_format_latency(global_p99)}</div>
+                <div class="label">全局 {tail_key.upper()} 延迟</div>
+                <div class="value">{_format_latency(global_tail)}</div>
             </div>
         </div>
 
         <div class="table-container">
             <h2>各服务延迟详情</h2>
-            {'<table><thead><tr><th>服务名称</th><th>日志数</th><th>P50 延迟</th><th>P99 延迟</th><th>最小延迟</th><th>最大延迟</th></tr></thead><tbody>' + service_rows + '</tbody></table>' if services else '<div class="no-data">暂无服务数据</div>'}
-        </div>
-    </div>
-</body>
-</html>'''
+            <p class="accuracy-note">{accuracy_note}</p>
+'''
+
+    f.write(page_start)
+    collapsed = False
+    if services:
+        collapsed = _write_service_tables(f, services, quantile_keys, tail_key, top_n)
+    else:
+        f.write('<div class="no-data">暂无服务数据</div>\n')
+    f.write('        </div>\n')
+    f.write(_render_series(stats.get('series')))
+    f.write(_render_service_levels(services, top_n))
+    f.write(_render_top_messages(stats.get('top_messages')))
+    f.write(_render_sources(stats.get('sources'), tail_key))
+    f.write(_render_diagnostics(stats.get('parse_diagnostics')))
+    f.write(_render_profile(stats.get('profile')))
+    f.write('\n    </div>\n')
+    if collapsed:
+        f.write(_EXPAND_SCRIPT)
+    f.write('</body>\n</html>')
 
-    # 写入文件
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+
+def generate_report(stats: Dict[str, Any], output_path: str = 'report.html',
+                    top_n: Optional[int] = DEFAULT_TOP_SERVICES) -> None:
+    """
+    生成 HTML 报告文件。
+
+    先写入临时文件再原子替换目标文件，--follow 刷新期间读者不会看到写了一半的报告。
+
+    Args:
+        stats: 统计数据字典，包含 total_logs, error_count, error_rate, services 等字段
+        output_path: 输出 HTML 文件路径，默认为 report.html
+        top_n: 服务表最多直接列出的服务数，其余折叠；None 或 0 表示全部列出
+    """
+    tmp_path = f'{output_path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        write_report(stats, f, top_n)
+    os.replace(tmp_path, output_path)
@@ -0,0 +1,369 @@
+"""
+时间序列模块
+
+按记录的 timestamp 把数据划分为固定间隔，每个间隔保存计数、错误数和各服务的
+对数分桶延迟直方图，用于在报告中绘制延迟与错误率随时间变化的趋势图。
+
+间隔数超过上限时间隔加倍、相邻间隔合并，因此一周甚至更长的输入也只占用
+有界内存；绘图时再用 LTTB 算法把每条曲线降采样到固定点数。
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .sketch import LogBucketSketch, DEFAULT_RELATIVE_ACCURACY, quantile_key
+from .window import WindowBucket, format_timestamp, timestamp_seconds
+
+# 保留的间隔数超过该值时间隔加倍
+DEFAULT_MAX_INTERVALS = 512
+# 按服务输出曲线的服务数（按日志数选取）
+DEFAULT_SERIES_SERVICES = 5
+
+
+def downsample_lttb(points: Sequence[Tuple[float, float]],
+                    threshold: int) -> List[Tuple[float, float]]:
+    """
+    用 Largest-Triangle-Three-Buckets 算法把折线降采样到 threshold 个点。
+
+    保留首尾两点，中间的点分为 threshold - 2 组，每组选出与前一个选中点和
+    下一组均值构成三角形面积最大的点，能保留尖峰等视觉特征。
+
+    Args:
+        points: 按 x 排序的 (x, y) 序列
+        threshold: 目标点数，至少为 3
+
+    Returns:
+        降采样后的点列表；点数不超过 threshold 时原样返回
+
+    Raises:
+        ValueError: threshold 小于 3 时抛出
+    """
+    if threshold < 3:
+        raise ValueError(f'降采样点数至少为 3: {threshold}')
+    n = len(points)
+    if n <= threshold:
+        return list(points)
+
+    sampled = [points[0]]
+    every = (n - 2) / (threshold - 2)
+    previous = 0
+    for i in range(threshold - 2):
+        # 下一组的均值作为三角形的第三个顶点
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        next_points = points[next_start:next_end]
+        avg_x = sum(x for x, _ in next_points) / len(next_points)
+        avg_y = sum(y for _, y in next_points) / len(next_points)
+
+        prev_x, prev_y = points[previous]
+        best, best_area = -1, -1.0
+        for j in range(int(i * every) + 1, next_start):
+            x, y = points[j]
+            area = abs((prev_x - avg_x) * (y - prev_y) - (prev_x - x) * (avg_y - prev_y))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        previous = best
+    sampled.append(points[-1])
+    return sampled
+
+
+class LatencySeries:
+    """
+    按事件时间划分间隔的延迟与错误率序列。
+
+    间隔编号为 timestamp // interval。间隔数超过 max_intervals 时 interval
+    加倍，编号减半后合并到同一个 WindowBucket；因此 interval 总是
+    base_interval 的 2 的幂倍，配置相同的序列总能对齐合并。
+    """
+
+    __slots__ = (
+        'base_interval', 'interval', 'max_intervals', 'relative_accuracy',
+        'invalid_timestamps', '_buckets',
+    )
+
+    def __init__(self, interval: float, max_intervals: int = DEFAULT_MAX_INTERVALS,
+                 relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        """
+        初始化序列。
+
+        Args:
+            interval: 初始间隔（秒）
+            max_intervals: 最多保留的间隔数
+            relative_accuracy: 延迟直方图的相对误差
+
+        Raises:
+            ValueError: 参数不为正数时抛出
+        """
+        if interval <= 0:
+            raise ValueError(f'序列间隔必须为正数: {interval}')
+        if max_intervals < 1:
+            raise ValueError(f'max_intervals 必须为正数: {max_intervals}')
+        self.base_interval = interval
+        self.interval = interval
+        self.max_intervals = max_intervals
+        self.relative_accuracy = relative_accuracy
+        self.invalid_timestamps = 0
+        self._buckets: Dict[int, WindowBucket] = {}
+
+    def add(self, timestamp: Any, level: Any, service: str, latency: float) -> None:
+        """
+        添加一条记录。
+
+        Args:
+            timestamp: ISO 8601 时间戳字符串或 Unix 秒数
+            level: 日志级别
+            service: 服务名
+            latency: 延迟毫秒数
+        """
+        seconds = timestamp_seconds(timestamp)
+        if seconds is None:
+            self.invalid_timestamps += 1
+            return
+
+        bucket = self._bucket_for(int(seconds // self.interval), self.interval)
+        bucket.count += 1
+        if level == 'ERROR':
+            bucket.error_count += 1
+        sketch = bucket.sketches.get(service)
+        if sketch is None:
+            sketch = bucket.sketches[service] = LogBucketSketch(self.relative_accuracy)
+        sketch.add(latency)
+
+    def add_columns(self, services: Sequence[Any], service_ids: Iterable[int],
+                    latencies: Iterable[float], levels: Iterable[Any],
+                    timestamps: Iterable[Any]) -> None:
+        """
+        添加一批列式记录，结果与按相同顺序逐条调用 add() 一致。
+
+        先在批内按 (间隔, 服务) 分组，每组的延迟一次加入直方图。
+
+        Args:
+            services: 服务名表
+            service_ids: 每条记录的服务在 services 中的下标
+            latencies: 每条记录的延迟
+            levels: 每条记录的级别
+            timestamps: 每条记录的时间戳
+        """
+        interval = self.interval
+        to_seconds = timestamp_seconds
+        groups: Dict[Tuple[int, int], List[float]] = {}
+        errors: Dict[int, int] = {}
+        for service_id, latency, level, timestamp in zip(
+                service_ids, latencies, levels, timestamps):
+            seconds = to_seconds(timestamp)
+            if seconds is None:
+                self.invalid_timestamps += 1
+                continue
+            slot = int(seconds // interval)
+            group = groups.get((slot, service_id))
+            if group is None:
+                group = groups[(slot, service_id)] = []
+            group.append(latency)
+            if level == 'ERROR':
+                errors[slot] = errors.get(slot, 0) + 1
+
+        for (slot, service_id), values in groups.items():
+            bucket = self._bucket_for(slot, interval)
+            bucket.count += len(values)
+            service = services[service_id]
+            sketch = bucket.sketches.get(service)
+            if sketch is None:
+                sketch = bucket.sketches[service] = LogBucketSketch(self.relative_accuracy)
+            sketch.add_many(values)
+        for slot, count in errors.items():
+            self._bucket_for(slot, interval).error_count += count
+
+    def _bucket_for(self, slot: int, interval: float) -> WindowBucket:
+        """
+        返回某个间隔对应的桶，不存在时创建；间隔数超过上限时先放大间隔。
+
+        Args:
+            slot: 按 interval 计算的间隔编号
+            interval: 计算 slot 时使用的间隔，可能小于当前间隔
+
+        Returns:
+            桶
+        """
+        while True:
+            current = slot // round(self.interval / interval)
+            bucket = self._buckets.get(current)
+            if bucket is not None:
+                return bucket
+            bucket = self._buckets[current] = WindowBucket(current)
+            if len(self._buckets) <= self.max_intervals:
+                return bucket
+            # 新桶随放大的间隔合并到其他编号，重新查找
+            self._coarsen(self.interval * 2)
+
+    def _merge_bucket(self, source: WindowBucket, slot: int) -> None:
+        """
+        把一个桶合并到当前间隔下编号为 slot 的桶。
+
+        Args:
+            source: 来源桶
+            slot: 目标间隔编号
+        """
+        bucket = self._buckets.get(slot)
+        if bucket is None:
+            bucket = self._buckets[slot] = WindowBucket(slot)
+        bucket.count += source.count
+        bucket.error_count += source.error_count
+        for service, sketch in source.sketches.items():
+            target = bucket.sketches.get(service)
+            if target is None:
+                target = bucket.sketches[service] = LogBucketSketch(self.relative_accuracy)
+            target.merge(sketch)
+
+    def _coarsen(self, interval: float) -> None:
+        """
+        把间隔放大到 interval（base_interval 的 2 的幂倍），直到间隔数不超过上限。
+
+        Args:
+            interval: 不小于当前间隔的新间隔
+        """
+        while True:
+            if interval > self.interval:
+                factor = round(interval / self.interval)
+                buckets = self._buckets
+                self._buckets = {}
+                self.interval = interval
+                for slot in sorted(buckets):
+                    self._merge_bucket(buckets[slot], slot // factor)
+            if len(self._buckets) <= self.max_intervals:
+                return
+            interval = self.interval * 2
+
+    def merge(self, other: 'LatencySeries') -> None:
+        """
+        合并另一个配置相同的序列，间隔取两者中较大的一个。
+
+        Args:
+            other: 另一个序列
+
+        Raises:
+            ValueError: 配置不同时抛出
+        """
+        if (other.base_interval, other.max_intervals, other.relative_accuracy) != (
+                self.base_interval, self.max_intervals, self.relative_accuracy):
+            raise ValueError('只能合并配置相同的时间序列')
+
+        self.invalid_timestamps += other.invalid_timestamps
+        self._coarsen(max(self.interval, other.interval))
+        factor = round(self.interval / other.interval)
+        for slot in sorted(other._buckets):
+            self._merge_bucket(other._buckets[slot], slot // factor)
+        self._coarsen(self.interval)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def get_series(self, quantiles: Sequence[float] = (50.0, 99.0),
+                   top_services: int = DEFAULT_SERIES_SERVICES) -> Dict[str, Any]:
+        """
+        输出按时间排序的列式序列。
+
+        Args:
+            quantiles: 百分位数列表（0-100）
+            top_services: 输出按服务曲线的服务数，按总日志数选取
+
+        Returns:
+            字典：
+            - interval_seconds: 当前间隔
+            - start/end: 首个间隔的开始和最后一个间隔的结束（ISO 8601 UTC）
+            - timestamps: 各间隔的开始时间（Unix 秒）
+            - count/error_rate: 各间隔的日志数与错误率（百分比）
+            - overall: {百分位键: 各间隔全部服务合并后的延迟}
+            - services: {服务名: {百分位键: 各间隔的延迟，无数据的间隔为 None}}
+            - invalid_timestamps: 无法解析时间戳的记录数
+        """
+        slots = sorted(self._buckets)
+        keys = [quantile_key(p) for p in quantiles]
+        qs = [p / 100 for p in quantiles]
+
+        totals: Dict[str, int] = {}
+        overall: Dict[str, List[float]] = {key: [] for key in keys}
+        counts, error_rates = [], []
+        for slot in slots:
+            bucket = self._buckets[slot]
+            counts.append(bucket.count)
+            error_rates.append(round(bucket.error_count / bucket.count * 100, 2)
+                               if bucket.count else 0.0)
+            merged = LogBucketSketch(self.relative_accuracy)
+            for service, sketch in bucket.sketches.items():
+                merged.merge(sketch)
+                totals[service] = totals.get(service, 0) + sketch.count
+            for key, value in zip(keys, merged.quantiles(qs)):
+                overall[key].append(value)
+
+        chosen = sorted(totals, key=lambda name: -totals[name])[:top_services]
+        services: Dict[str, Dict[str, List[Optional[float]]]] = {}
+        for service in chosen:
+            columns: Dict[str, List[Optional[float]]] = {key: [] for key in keys}
+            for slot in slots:
+                sketch = self._buckets[slot].sketches.get(service)
+                values = sketch.quantiles(qs) if sketch is not None else [None] * len(keys)
+                for key, value in zip(keys, values):
+                    columns[key].append(value)
+            services[service] = columns
+
+        return {
+            'interval_seconds': self.interval,
+            'start': format_timestamp(slots[0] * self.interval) if slots else None,
+            'end': format_timestamp((slots[-1] + 1) * self.interval) if slots else None,
+            'timestamps': [slot * self.interval for slot in slots],
+            'count': counts,
+            'error_rate': error_rates,
+            'overall': overall,
+            'services': services,
+            'invalid_timestamps': self.invalid_timestamps,
+        }
+
+    def to_state(self) -> Dict[str, Any]:
+        """
+        导出可 JSON 序列化的状态。
+
+        Returns:
+            状态字典
+        """
+        return {
+            'base_interval': self.base_interval,
+            'interval': self.interval,
+            'max_intervals': self.max_intervals,
+            'relative_accuracy': self.relative_accuracy,
+            'invalid_timestamps': self.invalid_timestamps,
+            'buckets': [
+                {
+                    'slot': slot,
+                    'count': bucket.count,
+                    'error_count': bucket.error_count,
+                    'sketches': {
+                        service: sketch.to_state() for service, sketch in bucket.sketches.items()
+                    },
+                }
+                for slot, bucket in sorted(self._buckets.items())
+            ],
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'LatencySeries':
+        """
+        从 to_state() 导出的状态恢复序列。
+
+        Args:
+            state: 状态字典
+
+        Returns:
+            恢复后的序列
+        """
+        series = cls(state['base_interval'], state['max_intervals'], state['relative_accuracy'])
+        series.interval = state['interval']
+        series.invalid_timestamps = state['invalid_timestamps']
+        for data in state['buckets']:
+            bucket = series._buckets[data['slot']] = WindowBucket(data['slot'])
+            bucket.count = data['count']
+            bucket.error_count = data['error_count']
+            bucket.sketches = {
+                service: LogBucketSketch.from_state(sketch)
+                for service, sketch in data['sketches'].items()
+            }
+        return series
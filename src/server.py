@@ -0,0 +1,310 @@
+"""
+HTTP 服务模块
+
+常驻内存的分析器持续接收新记录，通过标准库 http.server 提供实时统计：
+/stats（JSON）、/metrics（Prometheus 文本格式）和 /（HTML 报告）。
+统计快照按数据版本缓存，新数据到达或快照超过有效期后才重新计算。
+"""
+
+import io
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .analyzer import LogAnalyzer
+from .exporters import FORMAT_HTML, FORMAT_JSON, FORMAT_PROMETHEUS, render
+from .follow import FileFollower
+from .reporter import DEFAULT_TOP_SERVICES, write_report
+
+# 每批在锁内加入的记录数，限制单次持锁时间
+INGEST_BATCH_SIZE = 10000
+# 没有新数据时快照的有效期（秒），过期后只重新求值 providers 附加的字段
+DEFAULT_SNAPSHOT_TTL = 1.0
+
+CONTENT_TYPES = {
+    FORMAT_JSON: 'application/json; charset=utf-8',
+    FORMAT_PROMETHEUS: 'text/plain; version=0.0.4; charset=utf-8',
+    FORMAT_HTML: 'text/html; charset=utf-8',
+}
+
+ROUTES = {
+    '/stats': FORMAT_JSON,
+    '/metrics': FORMAT_PROMETHEUS,
+    '/': FORMAT_HTML,
+}
+
+
+def combine_summaries(summaries: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    合并多个写入方的诊断汇总。
+
+    Args:
+        summaries: ParseDiagnostics.summary() 的返回值
+
+    Returns:
+        合并后的汇总，格式与 summary() 相同
+    """
+    summaries = list(summaries)
+    if len(summaries) == 1:
+        return summaries[0]
+    reasons: Dict[str, int] = {}
+    for summary in summaries:
+        for reason, count in summary['reasons'].items():
+            reasons[reason] = reasons.get(reason, 0) + count
+    return {
+        'failures': sum(summary['failures'] for summary in summaries),
+        'reasons': dict(sorted(reasons.items(), key=lambda item: (-item[1], item[0]))),
+        'samples': [sample for summary in summaries for sample in summary['samples']],
+    }
+
+
+class LiveStats:
+    """
+    线程安全的实时统计。
+
+    写入方调用 add_records()，每批新数据使版本号加一；读取方调用
+    snapshot()，同一版本的统计只计算一次，各格式的渲染结果也随快照缓存，
+    因此大量客户端同时轮询时只有第一个请求触发 get_stats()。没有新数据时
+    快照超过 snapshot_ttl 秒后只重新求值 providers，使网络接收计数等随时间
+    变化的字段保持最新；快照内容不变时快照编号（ETag）不变。
+    """
+
+    def __init__(self, analyzer: LogAnalyzer, quantiles: Optional[List[float]] = None,
+                 top_n: Optional[int] = DEFAULT_TOP_SERVICES,
+                 snapshot_ttl: float = DEFAULT_SNAPSHOT_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        初始化实时统计。
+
+        Args:
+            analyzer: 长期存活的分析器
+            quantiles: 报告的百分位数，None 使用默认值
+            top_n: HTML 报告服务表最多直接列出的服务数
+            snapshot_ttl: 没有新数据时快照的有效期（秒）
+            clock: 单调时钟（便于测试替换）
+        """
+        self.analyzer = analyzer
+        self.quantiles = quantiles
+        self.top_n = top_n
+        self.snapshot_ttl = snapshot_ttl
+        self._clock = clock
+        self.version: int = 0
+        self.computations: int = 0
+        # 分析器拒绝的记录数（例如 latency_ms 不是数值）
+        self.rejected_records: int = 0
+        # 计算快照时附加到统计中的额外字段，例如网络接收计数
+        self.providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._diagnostics: Dict[str, Dict[str, Any]] = {}
+        # _data_lock 保护分析器；_snapshot_lock 保证同一版本只计算一次
+        self._data_lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_version: int = -1
+        self._snapshot_time: float = 0.0
+        # 快照内容变化时加一，作为 ETag
+        self._snapshot_tag: int = 0
+        self._stats: Dict[str, Any] = {}
+        self._rendered: Dict[str, bytes] = {}
+
+    def add_records(self, records: Iterable[Dict[str, Any]],
+                    diagnostics: Optional[Dict[str, Any]] = None,
+                    source: str = 'file') -> int:
+        """
+        加入一批新记录。
+
+        分析器拒绝的无效记录被跳过并计入 rejected_records（快照中为同名字段），
+        首次出现时输出到 stderr，同批的其他记录照常加入。
+
+        Args:
+            records: 记录迭代器
+            diagnostics: 写入方最新的 ParseDiagnostics.summary()，None 表示不变
+            source: 写入方名称，各写入方的诊断分别保存、计算快照时合并
+
+        Returns:
+            加入的记录数（不含被拒绝的记录）
+        """
+        iterator = iter(records)
+        added = 0
+        while True:
+            batch = list(islice(iterator, INGEST_BATCH_SIZE))
+            rejected = 0
+            with self._data_lock:
+                add_record = self.analyzer.add_record
+                for record in batch:
+                    try:
+                        add_record(record)
+                    except (TypeError, ValueError) as e:
+                        if not self.rejected_records and not rejected:
+                            print(f'[ERROR] 跳过无效记录: {e}', file=sys.stderr)
+                        rejected += 1
+                self.rejected_records += rejected
+                if batch:
+                    self.version += 1
+                if diagnostics is not None and diagnostics != self._diagnostics.get(source):
+                    self._diagnostics[source] = diagnostics
+                    self.version += 1
+                    diagnostics = None
+            added += len(batch) - rejected
+            if len(batch) < INGEST_BATCH_SIZE:
+                return added
+
+    def stats(self) -> Tuple[int, Dict[str, Any]]:
+        """
+        返回当前的统计快照。
+
+        Returns:
+            (快照编号, 统计字典)；调用方不得修改返回的字典
+        """
+        with self._snapshot_lock:
+            return self._refresh()
+
+    def _refresh(self) -> Tuple[int, Dict[str, Any]]:
+        """
+        版本变化时重新计算统计；版本不变而快照过期时只重新求值 providers，
+        附加字段变化时才更新快照。快照更新时清空渲染缓存
+        （调用方持有 _snapshot_lock）。
+
+        Returns:
+            (快照编号, 统计字典)
+        """
+        now = self._clock()
+        if self._snapshot_version == self.version:
+            if self.providers and now - self._snapshot_time >= self.snapshot_ttl:
+                self._snapshot_time = now
+                provided = {key: provider() for key, provider in self.providers.items()}
+                if any(self._stats.get(key) != value for key, value in provided.items()):
+                    self._stats = dict(self._stats, **provided)
+                    self._snapshot_tag += 1
+                    self._rendered = {}
+        else:
+            with self._data_lock:
+                version = self.version
+                if self.analyzer.window is not None:
+                    stats = self.analyzer.get_window_stats(quantiles=self.quantiles)
+                    if self.analyzer.series is not None:
+                        stats['series'] = self.analyzer.series.get_series(stats['quantiles'])
+                else:
+                    stats = self.analyzer.get_stats(quantiles=self.quantiles)
+                if self._diagnostics:
+                    stats['parse_diagnostics'] = combine_summaries(self._diagnostics.values())
+                if self.rejected_records:
+                    stats['rejected_records'] = self.rejected_records
+            for key, provider in self.providers.items():
+                stats[key] = provider()
+            self.computations += 1
+            self._snapshot_version = version
+            self._snapshot_time = now
+            self._snapshot_tag += 1
+            self._stats = stats
+            self._rendered = {}
+        return self._snapshot_tag, self._stats
+
+    def snapshot(self, fmt: str) -> Tuple[int, bytes]:
+        """
+        返回当前统计快照的指定格式渲染结果。
+
+        Args:
+            fmt: 格式名称（json、prom 或 html）
+
+        Returns:
+            (快照编号, UTF-8 编码的内容)
+        """
+        with self._snapshot_lock:
+            tag, stats = self._refresh()
+            body = self._rendered.get(fmt)
+            if body is None:
+                if fmt == FORMAT_HTML:
+                    buffer = io.StringIO()
+                    write_report(stats, buffer, self.top_n)
+                    text = buffer.getvalue()
+                else:
+                    text = render(stats, fmt)
+                body = self._rendered[fmt] = text.encode('utf-8')
+        return tag, body
+
+
+class StatsRequestHandler(BaseHTTPRequestHandler):
+    """处理 /stats、/metrics 和 / 请求。"""
+
+    live: LiveStats
+    verbose: bool = False
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """返回对应格式的统计快照，支持 If-None-Match 条件请求。"""
+        fmt = ROUTES.get(self.path.split('?', 1)[0])
+        if fmt is None:
+            self.send_error(404, 'Not Found')
+            return
+
+        tag, body = self.live.snapshot(fmt)
+        etag = f'"{tag}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPES[fmt])
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """只在 verbose 模式下输出访问日志。"""
+        if self.verbose:
+            sys.stderr.write(f'[HTTP] {self.address_string()} {format % args}\n')
+
+
+def make_server(live: LiveStats, host: str = '127.0.0.1', port: int = 8080,
+                verbose: bool = False) -> ThreadingHTTPServer:
+    """
+    创建 HTTP 服务器（每个请求一个线程）。
+
+    Args:
+        live: 实时统计
+        host: 监听地址
+        port: 监听端口，0 表示由系统分配
+        verbose: 是否输出访问日志
+
+    Returns:
+        尚未开始服务的服务器
+    """
+    handler = type('BoundStatsRequestHandler', (StatsRequestHandler,),
+                   {'live': live, 'verbose': verbose})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def ingest_file(follower: FileFollower, live: LiveStats, stop: threading.Event,
+                poll_interval: float = 0.5) -> None:
+    """
+    持续读取文件新追加的记录送入实时统计，直到 stop 被设置。
+
+    Args:
+        follower: 文件跟踪器
+        live: 实时统计
+        stop: 停止信号
+        poll_interval: 已读到文件末尾时的等待间隔（秒）
+    """
+    diagnostics = follower.diagnostics
+    try:
+        while not stop.is_set():
+            try:
+                records = follower.poll()
+                summary = diagnostics.summary() if diagnostics is not None else None
+                live.add_records(records, summary)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                # 读取线程退出后快照会静默停止更新，因此报告错误后继续轮询
+                print(f'[ERROR] 读取跟踪文件失败: {e}', file=sys.stderr)
+                stop.wait(poll_interval)
+                continue
+            if follower.caught_up:
+                stop.wait(poll_interval)
+    finally:
+        follower.close()
@@ -0,0 +1,265 @@
+"""
+延迟分位数草图模块
+
+提供 DDSketch 风格的对数分桶直方图：每个服务占用常量内存，
+分位数估计满足可配置的相对误差上界，且多个草图可以合并。
+"""
+
+import math
+from typing import Dict, Iterable, List, Sequence
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+DEFAULT_MAX_BUCKETS = 2048
+# 小于该值的延迟统一计入零桶（毫秒）
+MIN_INDEXABLE_VALUE = 1e-6
+
+
+def quantile_key(p: float) -> str:
+    """
+    返回百分位数在统计结果中的键名。
+
+    Args:
+        p: 百分位数（0-100）
+
+    Returns:
+        键名，例如 50 -> 'p50'，99.9 -> 'p99.9'
+    """
+    return f'p{p:g}'
+
+
+class LogBucketSketch:
+    """
+    对数分桶分位数草图。
+
+    值 x 落入索引为 ceil(log_gamma(x)) 的桶，其中
+    gamma = (1 + a) / (1 - a)，a 为相对误差。桶数超过 max_buckets 时
+    合并最低的桶，保证内存有上界（只影响最低分位数的精度）。
+    """
+
+    __slots__ = (
+        'relative_accuracy', 'max_buckets', 'count', 'min', 'max',
+        '_gamma', '_log_gamma', '_buckets', '_zero_count',
+    )
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+                 max_buckets: int = DEFAULT_MAX_BUCKETS):
+        """
+        初始化草图。
+
+        Args:
+            relative_accuracy: 相对误差上界，取值范围 (0, 1)
+            max_buckets: 最多保留的桶数
+
+        Raises:
+            ValueError: 参数超出取值范围时抛出
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f'relative_accuracy 必须在 (0, 1) 之间: {relative_accuracy}')
+        if max_buckets < 1:
+            raise ValueError(f'max_buckets 必须为正数: {max_buckets}')
+
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets: Dict[int, int] = {}
+        self._zero_count: int = 0
+        self.count: int = 0
+        self.min: float = math.inf
+        self.max: float = -math.inf
+
+    def add(self, value: float) -> None:
+        """
+        添加一个观测值。
+
+        Args:
+            value: 延迟毫秒数
+        """
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+        if value <= MIN_INDEXABLE_VALUE:
+            self._zero_count += 1
+            return
+
+        index = math.ceil(math.log(value) / self._log_gamma)
+        buckets = self._buckets
+        buckets[index] = buckets.get(index, 0) + 1
+        if len(buckets) > self.max_buckets:
+            self._collapse()
+
+    def add_many(self, values: Sequence[float]) -> None:
+        """
+        添加一组观测值，等价于逐个调用 add()。
+
+        桶数超过上限时与 merge() 相同，在全部加入后一次合并最低的桶。
+
+        Args:
+            values: 延迟毫秒数序列
+        """
+        if not values:
+            return
+        self.count += len(values)
+        low = min(values)
+        high = max(values)
+        if low < self.min:
+            self.min = low
+        if high > self.max:
+            self.max = high
+
+        log = math.log
+        ceil = math.ceil
+        log_gamma = self._log_gamma
+        buckets = self._buckets
+        zeros = 0
+        for value in values:
+            if value <= MIN_INDEXABLE_VALUE:
+                zeros += 1
+            else:
+                index = ceil(log(value) / log_gamma)
+                buckets[index] = buckets.get(index, 0) + 1
+        self._zero_count += zeros
+        if len(buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self) -> None:
+        """合并最低的两个桶，使桶数回到 max_buckets 以内。"""
+        buckets = self._buckets
+        while len(buckets) > self.max_buckets:
+            lowest_count = buckets.pop(min(buckets))
+            buckets[min(buckets)] += lowest_count
+
+    def _bucket_value(self, index: int) -> float:
+        """
+        返回桶的代表值（相对误差最小的点）。
+
+        Args:
+            index: 桶索引
+
+        Returns:
+            桶代表值
+        """
+        return 2 * self._gamma ** index / (self._gamma + 1)
+
+    def quantiles(self, qs: Iterable[float]) -> List[float]:
+        """
+        一次遍历计算多个分位数。
+
+        Args:
+            qs: 分位数列表，取值 0-1
+
+        Returns:
+            与 qs 顺序对应的估计值；空草图返回全 0
+        """
+        qs = list(qs)
+        if self.count == 0:
+            return [0.0] * len(qs)
+
+        # 按秩从小到大处理，桶只需遍历一次
+        order = sorted(range(len(qs)), key=lambda i: qs[i])
+        results = [0.0] * len(qs)
+        keys = sorted(self._buckets)
+        cumulative = self._zero_count
+        key_pos = 0
+        for i in order:
+            rank = qs[i] * (self.count - 1)
+            # 端点直接使用精确的最小/最大值
+            if qs[i] <= 0:
+                value = self.min
+            elif qs[i] >= 1:
+                value = self.max
+            elif rank < cumulative:
+                value = 0.0
+            else:
+                while key_pos < len(keys) and cumulative <= rank:
+                    cumulative += self._buckets[keys[key_pos]]
+                    key_pos += 1
+                value = self._bucket_value(keys[key_pos - 1]) if key_pos else 0.0
+            # 估计值不超出真实观测范围
+            results[i] = min(max(value, self.min), self.max)
+        return results
+
+    def quantile(self, q: float) -> float:
+        """
+        计算单个分位数。
+
+        Args:
+            q: 分位数，取值 0-1
+
+        Returns:
+            估计值
+        """
+        return self.quantiles([q])[0]
+
+    def merge(self, other: 'LogBucketSketch') -> None:
+        """
+        将另一个草图合并到当前草图。
+
+        Args:
+            other: 相对误差相同的草图
+
+        Raises:
+            ValueError: 相对误差不一致时抛出
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError('只能合并相对误差相同的草图')
+        for index, count in other._buckets.items():  # pylint: disable=protected-access
+            self._buckets[index] = self._buckets.get(index, 0) + count
+        self._zero_count += other._zero_count  # pylint: disable=protected-access
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(self._buckets) > self.max_buckets:
+            self._collapse()
+
+    def to_state(self) -> Dict:
+        """
+        导出可 JSON 序列化的状态。
+
+        Returns:
+            状态字典
+        """
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'max_buckets': self.max_buckets,
+            'buckets': [[index, count] for index, count in self._buckets.items()],
+            'zero_count': self._zero_count,
+            'count': self.count,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'LogBucketSketch':
+        """
+        从 to_state() 导出的状态恢复草图。
+
+        Args:
+            state: 状态字典
+
+        Returns:
+            恢复后的草图
+        """
+        sketch = cls(state['relative_accuracy'], state['max_buckets'])
+        sketch._buckets = {  # pylint: disable=protected-access
+            int(index): count for index, count in state['buckets']
+        }
+        sketch._zero_count = state['zero_count']  # pylint: disable=protected-access
+        sketch.count = state['count']
+        if sketch.count:
+            sketch.min = state['min']
+            sketch.max = state['max']
+        return sketch
+
+    @property
+    def bucket_count(self) -> int:
+        """当前占用的桶数。"""
+        return len(self._buckets)
+
+    def __len__(self) -> int:
+        """观测值个数。"""
+        return self.count
+
@@ -0,0 +1,398 @@
+"""
+时间窗口模块
+
+按记录的 timestamp 维护最近一段时间（如 5 分钟、1 小时）的统计。
+数据保存在按固定间隔划分的环形桶中（计数、错误数、各服务延迟直方图），
+过期数据按桶整体丢弃，代价与桶内记录数无关。
+"""
+
+import math
+import re
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+from .sketch import LogBucketSketch, DEFAULT_RELATIVE_ACCURACY, quantile_key
+
+# 默认把窗口划分为 60 个桶
+DEFAULT_BUCKETS_PER_WINDOW = 60
+
+# 不带时区的时间戳按 UTC 处理：与该时刻相减得到 Unix 秒数，省去 replace(tzinfo=...)
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+# datetime 能表示的 Unix 秒数范围，超出范围的时间戳视为无效
+_MIN_SECONDS = datetime(1, 1, 1, tzinfo=timezone.utc).timestamp()
+_MAX_SECONDS = datetime(9999, 12, 31, 23, 59, 59, tzinfo=timezone.utc).timestamp()
+
+_DURATION = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*$')
+_UNIT_SECONDS = {'': 1, 's': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_duration(value: str) -> float:
+    """
+    解析时长字符串。
+
+    Args:
+        value: 例如 "30s"、"5m"、"1h"、"1d"，无单位时按秒
+
+    Returns:
+        秒数
+
+    Raises:
+        ValueError: 格式错误或时长不为正时抛出
+    """
+    match = _DURATION.match(value)
+    if match is None:
+        raise ValueError(f'无效的时长: {value}')
+    seconds = float(match.group(1)) * _UNIT_SECONDS[match.group(2)]
+    if seconds <= 0:
+        raise ValueError(f'时长必须为正数: {value}')
+    return seconds
+
+
+def parse_timestamp(value: Any) -> Optional[float]:
+    """
+    将 ISO 8601 时间戳转换为 Unix 秒数。
+
+    不带时区的时间戳按 UTC 处理。同一秒内的日志时间戳相同，
+    因此字符串的解析结果会被缓存；非字符串在查缓存前直接排除，
+    列表等不可哈希的值也不会引发异常。
+
+    Args:
+        value: ISO 8601 时间戳字符串
+
+    Returns:
+        Unix 秒数；不是字符串或无法解析时返回 None
+    """
+    if not isinstance(value, str):
+        return None
+    return _parse_iso(value)
+
+
+@lru_cache(maxsize=4096)
+def _parse_iso(value: str) -> Optional[float]:
+    """parse_timestamp() 的缓存实现，value 必须是字符串。"""
+    text = value.strip()
+    if text.endswith('Z'):
+        text = text[:-1] + '+00:00'
+    try:
+        moment = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        return (moment - _NAIVE_EPOCH).total_seconds()
+    return moment.timestamp()
+
+
+def timestamp_seconds(value: Any) -> Optional[float]:
+    """
+    将记录的 timestamp 字段转换为 Unix 秒数。
+
+    Args:
+        value: ISO 8601 时间戳字符串或 Unix 秒数
+
+    Returns:
+        Unix 秒数；类型不对、无法解析、非有限值或超出 datetime
+        可表示的范围时返回 None
+    """
+    if isinstance(value, str):
+        seconds = _parse_iso(value)
+        if seconds is None:
+            return None
+    elif isinstance(value, (int, float)):
+        seconds = value
+    else:
+        return None
+    # NaN 与任何值比较都为假，因此同样被排除
+    if not _MIN_SECONDS <= seconds <= _MAX_SECONDS:
+        return None
+    return seconds
+
+
+def format_timestamp(seconds: float) -> str:
+    """
+    将 Unix 秒数格式化为 ISO 8601 UTC 字符串。
+
+    Args:
+        seconds: Unix 秒数，超出 datetime 可表示的范围时取范围边界
+
+    Returns:
+        例如 "2025-01-15T10:23:45"
+    """
+    seconds = min(max(seconds, _MIN_SECONDS), _MAX_SECONDS)
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+
+
+class WindowBucket:
+    """一个时间间隔内的聚合数据。"""
+
+    __slots__ = ('slot', 'count', 'error_count', 'sketches')
+
+    def __init__(self, slot: int):
+        """
+        初始化桶。
+
+        Args:
+            slot: 间隔编号（timestamp // bucket_seconds）
+        """
+        self.slot = slot
+        self.count = 0
+        self.error_count = 0
+        self.sketches: Dict[str, LogBucketSketch] = {}
+
+
+class TimeWindow:
+    """
+    基于事件时间的滑动窗口。
+
+    以已见过的最大 timestamp 作为“当前时间”，窗口覆盖其之前的
+    window_seconds 秒。环形数组中每个位置保存一个间隔的 WindowBucket，
+    位置被新间隔复用时旧数据即被丢弃。
+    """
+
+    __slots__ = (
+        'window_seconds', 'bucket_seconds', 'relative_accuracy', 'num_buckets',
+        'late_records', 'invalid_timestamps', '_ring', '_head_slot',
+    )
+
+    def __init__(self, window_seconds: float, bucket_seconds: Optional[float] = None,
+                 relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        """
+        初始化时间窗口。
+
+        Args:
+            window_seconds: 窗口长度（秒）
+            bucket_seconds: 每个桶覆盖的秒数，默认为窗口的 1/60（至少 1 秒）
+            relative_accuracy: 延迟直方图的相对误差
+
+        Raises:
+            ValueError: 参数不为正数时抛出
+        """
+        if window_seconds <= 0:
+            raise ValueError(f'窗口长度必须为正数: {window_seconds}')
+        if bucket_seconds is None:
+            bucket_seconds = max(1.0, window_seconds / DEFAULT_BUCKETS_PER_WINDOW)
+        if bucket_seconds <= 0:
+            raise ValueError(f'桶间隔必须为正数: {bucket_seconds}')
+
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.relative_accuracy = relative_accuracy
+        self.num_buckets = max(1, math.ceil(window_seconds / bucket_seconds))
+        self.late_records = 0
+        self.invalid_timestamps = 0
+        self._ring: List[Optional[WindowBucket]] = [None] * self.num_buckets
+        self._head_slot: Optional[int] = None
+
+    def add(self, timestamp: Any, level: Any, service: str, latency: float) -> None:
+        """
+        向窗口添加一条记录。
+
+        Args:
+            timestamp: ISO 8601 时间戳字符串或 Unix 秒数
+            level: 日志级别
+            service: 服务名
+            latency: 延迟毫秒数
+        """
+        seconds = timestamp_seconds(timestamp)
+        if seconds is None:
+            self.invalid_timestamps += 1
+            return
+
+        slot = int(seconds // self.bucket_seconds)
+        if self._head_slot is None or slot > self._head_slot:
+            self._head_slot = slot
+        elif slot <= self._head_slot - self.num_buckets:
+            # 早于窗口的迟到记录
+            self.late_records += 1
+            return
+
+        bucket = self._bucket_for(slot)
+        bucket.count += 1
+        if level == 'ERROR':
+            bucket.error_count += 1
+        sketch = bucket.sketches.get(service)
+        if sketch is None:
+            sketch = LogBucketSketch(self.relative_accuracy)
+            bucket.sketches[service] = sketch
+        sketch.add(latency)
+
+    def _bucket_for(self, slot: int) -> WindowBucket:
+        """
+        返回间隔对应的桶，位置被旧间隔占用时直接替换（即过期）。
+
+        Args:
+            slot: 间隔编号
+
+        Returns:
+            对应的桶
+        """
+        position = slot % self.num_buckets
+        bucket = self._ring[position]
+        if bucket is None or bucket.slot != slot:
+            bucket = WindowBucket(slot)
+            self._ring[position] = bucket
+        return bucket
+
+    def live_buckets(self) -> List[WindowBucket]:
+        """
+        返回当前窗口内的桶，按时间先后排序。
+
+        Returns:
+            桶列表
+        """
+        if self._head_slot is None:
+            return []
+        oldest = self._head_slot - self.num_buckets + 1
+        return sorted(
+            (bucket for bucket in self._ring if bucket is not None and bucket.slot >= oldest),
+            key=lambda bucket: bucket.slot
+        )
+
+    def get_stats(self, quantiles: Sequence[float] = (50.0, 99.0)) -> Dict[str, Any]:
+        """
+        汇总窗口内的统计结果。
+
+        输出结构与 LogAnalyzer.get_stats() 相同，额外包含 window 字段。
+
+        Args:
+            quantiles: 百分位数列表（0-100）
+
+        Returns:
+            统计结果字典
+        """
+        total = 0
+        errors = 0
+        merged: Dict[str, LogBucketSketch] = {}
+        buckets = self.live_buckets()
+        for bucket in buckets:
+            total += bucket.count
+            errors += bucket.error_count
+            for service, sketch in bucket.sketches.items():
+                target = merged.get(service)
+                if target is None:
+                    target = LogBucketSketch(self.relative_accuracy)
+                    merged[service] = target
+                target.merge(sketch)
+
+        quantiles = [float(p) for p in quantiles]
+        services = {}
+        for service, sketch in merged.items():
+            service_stats = {'count': sketch.count}
+            service_stats.update(zip(
+                (quantile_key(p) for p in quantiles),
+                sketch.quantiles([p / 100 for p in quantiles])
+            ))
+            service_stats['min'] = sketch.min
+            service_stats['max'] = sketch.max
+            services[service] = service_stats
+
+        window: Dict[str, Any] = {
+            'seconds': self.window_seconds,
+            'bucket_seconds': self.bucket_seconds,
+            'start': None,
+            'end': None,
+            'late_records': self.late_records,
+            'invalid_timestamps': self.invalid_timestamps,
+        }
+        if self._head_slot is not None:
+            window['end'] = format_timestamp((self._head_slot + 1) * self.bucket_seconds)
+            window['start'] = format_timestamp(
+                (self._head_slot + 1) * self.bucket_seconds - self.window_seconds)
+
+        return {
+            'total_logs': total,
+            'error_count': errors,
+            'error_rate': round(errors / total * 100, 2) if total else 0.0,
+            'services': services,
+            'quantiles': quantiles,
+            'accuracy': {'mode': 'sketch', 'relative_accuracy': self.relative_accuracy},
+            'window': window,
+        }
+
+    def merge(self, other: 'TimeWindow') -> None:
+        """
+        合并另一个配置相同的时间窗口。
+
+        Args:
+            other: 另一个时间窗口
+
+        Raises:
+            ValueError: 配置不同时抛出
+        """
+        if (other.window_seconds, other.bucket_seconds, other.relative_accuracy) != (
+                self.window_seconds, self.bucket_seconds, self.relative_accuracy):
+            raise ValueError('只能合并配置相同的时间窗口')
+
+        self.late_records += other.late_records
+        self.invalid_timestamps += other.invalid_timestamps
+        if other._head_slot is not None and (
+                self._head_slot is None or other._head_slot > self._head_slot):
+            self._head_slot = other._head_slot
+        if self._head_slot is None:
+            return
+
+        oldest = self._head_slot - self.num_buckets + 1
+        for source in other.live_buckets():
+            if source.slot < oldest:
+                continue
+            bucket = self._bucket_for(source.slot)
+            bucket.count += source.count
+            bucket.error_count += source.error_count
+            for service, sketch in source.sketches.items():
+                target = bucket.sketches.get(service)
+                if target is None:
+                    target = LogBucketSketch(self.relative_accuracy)
+                    bucket.sketches[service] = target
+                target.merge(sketch)
+
+    def to_state(self) -> Dict[str, Any]:
+        """
+        导出可 JSON 序列化的状态。
+
+        Returns:
+            状态字典
+        """
+        return {
+            'window_seconds': self.window_seconds,
+            'bucket_seconds': self.bucket_seconds,
+            'relative_accuracy': self.relative_accuracy,
+            'late_records': self.late_records,
+            'invalid_timestamps': self.invalid_timestamps,
+            'head_slot': self._head_slot,
+            'buckets': [
+                {
+                    'slot': bucket.slot,
+                    'count': bucket.count,
+                    'error_count': bucket.error_count,
+                    'sketches': {
+                        service: sketch.to_state() for service, sketch in bucket.sketches.items()
+                    },
+                }
+                for bucket in self.live_buckets()
+            ],
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'TimeWindow':
+        """
+        从 to_state() 导出的状态恢复时间窗口。
+
+        Args:
+            state: 状态字典
+
+        Returns:
+            恢复后的时间窗口
+        """
+        window = cls(state['window_seconds'], state['bucket_seconds'], state['relative_accuracy'])
+        window.late_records = state['late_records']
+        window.invalid_timestamps = state['invalid_timestamps']
+        window._head_slot = state['head_slot']
+        for data in state['buckets']:
+            bucket = window._bucket_for(data['slot'])
+            bucket.count = data['count']
+            bucket.error_count = data['error_count']
+            bucket.sketches = {
+                service: LogBucketSketch.from_state(sketch)
+                for service, sketch in data['sketches'].items()
+            }
+        return window
@@ -2,8 +2,13 @@
 流式分析引擎测试
 """
 
+import json
+import tracemalloc
+
 import pytest
-from src.analyzer import LogAnalyzer, percentile
+from src.analyzer import LogAnalyzer, percentile, percentiles, quantile_key
+from src.parser import parse_line
+from src.sketch import LogBucketSketch
 
 
 class TestPercentile:
@@ -165,3 +170,257 @@ class TestLogAnalyzer:
 
         stats = analyzer.get_stats()
         assert 'unknown' in stats['services']
+
+    def test_service_error_breakdown(self):
+        """按服务统计错误与警告的数量和比例。"""
+        analyzer = LogAnalyzer()
+        for level in ('ERROR', 'WARN', 'WARNING', 'INFO'):
+            analyzer.add_record({'level': level, 'service': 'api', 'latency_ms': 1})
+        analyzer.add_record({'level': 'INFO', 'service': 'db', 'latency_ms': 1})
+
+        services = analyzer.get_stats()['services']
+        assert services['api']['error_count'] == 1 and services['api']['error_rate'] == 25.0
+        assert services['api']['warn_count'] == 2 and services['api']['warn_rate'] == 50.0
+        assert services['db']['error_rate'] == 0.0 and services['db']['warn_rate'] == 0.0
+
+    def test_top_messages(self):
+        """高频 (服务, 级别, 消息) 组合按次数降序输出，非字符串值按 JSON 表示。"""
+        analyzer = LogAnalyzer(top_messages=2)
+        for msg, times in (('timeout', 3), ('ok', 5), ('retry', 1)):
+            for _ in range(times):
+                analyzer.add_record({'level': 'ERROR', 'service': 'api', 'latency_ms': 1,
+                                     'msg': msg})
+        analyzer.add_record({'level': ['x'], 'service': 'api', 'latency_ms': 1, 'msg': None})
+
+        top = analyzer.get_stats()['top_messages']
+        assert [(m['msg'], m['count'], m['overcount']) for m in top] == [
+            ('ok', 5, 0), ('timeout', 3, 0)]
+        assert 'top_messages' not in LogAnalyzer(top_messages=0).get_stats()
+        assert analyzer._messages.top(10)[-1][0] == ('api', '["x"]', 'null')
+
+    @pytest.mark.parametrize('record', [
+        {'level': 'ERROR', 'service': 'a', 'latency_ms': 'abc', 'msg': 'm'},
+        {'level': 'ERROR', 'service': 'a', 'latency_ms': [1], 'msg': 'm'},
+        {'level': 'ERROR', 'service': ['a'], 'latency_ms': 1, 'msg': 'm'},
+    ])
+    def test_invalid_record_leaves_state_unchanged(self, record):
+        """无效记录抛出异常时不改变任何统计。"""
+        analyzer = LogAnalyzer()
+        analyzer.add_record({'level': 'INFO', 'service': 'a', 'latency_ms': 1, 'msg': 'm'})
+        before = analyzer.to_state()
+        with pytest.raises((TypeError, ValueError)):
+            analyzer.add_record(record)
+        assert analyzer.to_state() == before
+
+
+class TestSketchMode:
+    """测试 sketch 精度模式。"""
+
+    def test_sketch_within_relative_error(self):
+        """草图分位数满足相对误差上界。"""
+        exact = LogAnalyzer()
+        approx = LogAnalyzer(mode='sketch', relative_accuracy=0.01)
+        for i in range(1, 10001):
+            record = {'level': 'INFO', 'service': 'api', 'latency_ms': i * 0.37}
+            exact.add_record(record)
+            approx.add_record(record)
+
+        exact_stats = exact.get_stats()['services']['api']
+        approx_stats = approx.get_stats()['services']['api']
+        for key in ('p50', 'p99'):
+            assert abs(approx_stats[key] - exact_stats[key]) <= 0.01 * exact_stats[key] + 0.37
+        assert approx_stats['min'] == exact_stats['min']
+        assert approx_stats['max'] == exact_stats['max']
+        assert approx_stats['count'] == 10000
+
+    def test_sketch_memory_is_bounded(self):
+        """草图桶数不随记录数增长。"""
+        sketch = LogBucketSketch(0.01, max_buckets=64)
+        for i in range(1, 100001):
+            sketch.add(float(i))
+        assert sketch.bucket_count <= 64
+        assert sketch.count == 100000
+        assert sketch.quantile(1.0) == 100000
+
+    def test_sketch_zero_latency(self):
+        """零延迟记录计入零桶。"""
+        analyzer = LogAnalyzer(mode='sketch')
+        analyzer.add_record({'level': 'INFO', 'service': 'test'})
+        stats = analyzer.get_stats()['services']['test']
+        assert stats['p50'] == 0.0
+        assert stats['min'] == 0.0
+
+    def test_accuracy_mode_reported(self):
+        """get_stats() 报告精度模式。"""
+        assert LogAnalyzer().get_stats()['accuracy'] == {'mode': 'exact'}
+        stats = LogAnalyzer(mode='sketch', relative_accuracy=0.02).get_stats()
+        assert stats['accuracy'] == {'mode': 'sketch', 'relative_accuracy': 0.02}
+
+    def test_invalid_mode(self):
+        """未知模式抛出 ValueError。"""
+        with pytest.raises(ValueError):
+            LogAnalyzer(mode='fuzzy')
+
+    @pytest.mark.parametrize('accuracy', [0, 1, 2, -0.1])
+    def test_invalid_relative_accuracy(self, accuracy):
+        """相对误差不在 (0, 1) 之间时在构造时抛出 ValueError。"""
+        with pytest.raises(ValueError):
+            LogAnalyzer(mode='sketch', relative_accuracy=accuracy)
+
+
+class TestQuantiles:
+    """测试多百分位数计算。"""
+
+    def test_percentiles_match_percentile(self):
+        """percentiles() 与逐个 percentile() 结果一致。"""
+        data = [7, 3, 9, 1, 5, 8, 2]
+        ps = [0, 50, 90, 99, 100]
+        assert percentiles(data, ps) == [percentile(data, p) for p in ps]
+
+    def test_percentiles_empty(self):
+        """空列表返回全 0。"""
+        assert percentiles([], [50, 99]) == [0.0, 0.0]
+
+    def test_custom_quantiles(self):
+        """get_stats(quantiles=...) 输出对应键。"""
+        analyzer = LogAnalyzer()
+        for i in range(1, 1001):
+            analyzer.add_record({'level': 'INFO', 'service': 'api', 'latency_ms': i})
+
+        stats = analyzer.get_stats(quantiles=[50, 90, 95, 99, 99.9])
+        api = stats['services']['api']
+        assert stats['quantiles'] == [50.0, 90.0, 95.0, 99.0, 99.9]
+        assert api['p50'] == percentile(list(range(1, 1001)), 50)
+        assert api['p99.9'] == percentile(list(range(1, 1001)), 99.9)
+        assert 'p90' in api and 'p95' in api
+        assert api['min'] == 1 and api['max'] == 1000
+
+    def test_default_quantiles(self):
+        """默认只输出 p50 和 p99。"""
+        analyzer = LogAnalyzer()
+        analyzer.add_record({'level': 'INFO', 'service': 'api', 'latency_ms': 1})
+        api = analyzer.get_stats()['services']['api']
+        assert set(api) == {'count', 'p50', 'p99', 'min', 'max',
+                            'error_count', 'error_rate', 'warn_count', 'warn_rate'}
+
+    def test_invalid_quantile(self):
+        """超出 0-100 的百分位数抛出 ValueError。"""
+        with pytest.raises(ValueError):
+            LogAnalyzer().get_stats(quantiles=[101])
+
+    def test_empty_quantiles(self):
+        """空的百分位数列表抛出 ValueError，而不是生成没有百分位列的结果。"""
+        analyzer = LogAnalyzer(time_window=60)
+        analyzer.add_record({'timestamp': 0, 'level': 'INFO', 'service': 'api', 'latency_ms': 1})
+        with pytest.raises(ValueError, match='不能为空'):
+            analyzer.get_stats(quantiles=[])
+        with pytest.raises(ValueError, match='不能为空'):
+            analyzer.get_window_stats(quantiles=[])
+
+    def test_quantile_keys_shared(self):
+        """分析器、时间窗口和导出器使用同一套百分位键名。"""
+        analyzer = LogAnalyzer(time_window=60)
+        analyzer.add_record({'timestamp': 0, 'level': 'INFO', 'service': 'api', 'latency_ms': 1})
+        quantiles = [50, 99.9]
+        keys = {quantile_key(p) for p in quantiles}
+        assert keys == {'p50', 'p99.9'}
+        assert keys <= set(analyzer.get_stats(quantiles)['services']['api'])
+        assert keys <= set(analyzer.get_window_stats(quantiles)['services']['api'])
+
+
+class TestMergeAndState:
+    """测试分析器合并与状态序列化。"""
+
+    @staticmethod
+    def _records():
+        """生成测试记录。"""
+        for i in range(200):
+            yield {
+                'level': 'ERROR' if i % 7 == 0 else ('WARN' if i % 5 == 0 else 'INFO'),
+                'service': f'svc{i % 3}',
+                'latency_ms': (i * 37) % 101,
+                'msg': f'm{i % 4}',
+            }
+
+    @pytest.mark.parametrize('mode', ['exact', 'sketch'])
+    def test_merge_matches_sequential(self, mode):
+        """分块分析后合并与顺序分析结果一致。"""
+        records = list(self._records())
+        sequential = LogAnalyzer(mode=mode)
+        for record in records:
+            sequential.add_record(record)
+
+        merged = LogAnalyzer(mode=mode)
+        for chunk in (records[:50], records[50:120], records[120:]):
+            part = LogAnalyzer(mode=mode)
+            for record in chunk:
+                part.add_record(record)
+            merged.merge(part)
+
+        assert merged.get_stats() == sequential.get_stats()
+
+    @pytest.mark.parametrize('mode', ['exact', 'sketch'])
+    def test_state_round_trip(self, mode):
+        """to_state/from_state 经 JSON 往返后结果不变。"""
+        analyzer = LogAnalyzer(mode=mode)
+        for record in self._records():
+            analyzer.add_record(record)
+
+        state = json.loads(json.dumps(analyzer.to_state()))
+        assert LogAnalyzer.from_state(state).get_stats() == analyzer.get_stats()
+
+    def test_merge_mode_mismatch(self):
+        """精度模式不同的分析器不能合并。"""
+        with pytest.raises(ValueError):
+            LogAnalyzer().merge(LogAnalyzer(mode='sketch'))
+
+
+class TestCompactStorage:
+    """测试 exact 模式的紧凑存储。"""
+
+    @staticmethod
+    def _traced_size(build):
+        """返回 build() 结果占用的内存字节数。"""
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            result = build()
+            after = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        assert result is not None
+        return after - before
+
+    def test_memory_several_fold_smaller(self):
+        """与 list[float] 存储相比，峰值内存降低数倍。"""
+        count = 200000
+
+        def build_list():
+            latencies = {}
+            for i in range(count):
+                latencies.setdefault(f'svc{i % 4}', []).append(float(i) * 0.5)
+            return latencies
+
+        def build_analyzer():
+            analyzer = LogAnalyzer()
+            for i in range(count):
+                analyzer.add_record({'level': 'INFO', 'service': f'svc{i % 4}',
+                                     'latency_ms': i * 0.5})
+            return analyzer
+
+        baseline = self._traced_size(build_list)
+        compact = self._traced_size(build_analyzer)
+        assert compact * 3 < baseline
+
+    def test_slots(self):
+        """分析器和草图不使用 __dict__。"""
+        assert not hasattr(LogAnalyzer(), '__dict__')
+        assert not hasattr(LogBucketSketch(), '__dict__')
+
+    def test_service_names_interned(self):
+        """解析出的服务名被驻留。"""
+        first = parse_line('{"timestamp": "t", "level": "INFO", "service": "payment", '
+                           '"latency_ms": 1, "msg": "m"}')
+        second = parse_line('{"timestamp": "t", "level": "INFO", "service": "payment", '
+                            '"latency_ms": 2, "msg": "m"}')
+        assert first['service'] is second['service']
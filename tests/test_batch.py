@@ -0,0 +1,120 @@
+"""
+列式批处理测试
+"""
+
+import io
+import os
+import sys
+
+import pytest
+
+import src.analyzer
+from benchmarks.generator import generate_lines
+from src.analyzer import LogAnalyzer, MODE_SKETCH
+from src.batch import RecordBatch, iter_batches
+from src.diagnostics import ParseDiagnostics
+from src.filters import RecordFilter
+from src.parser import iter_records
+
+
+@pytest.fixture(name='log_file')
+def fixture_log_file(tmp_path):
+    """包含损坏行、非 ASCII、转义与正负零延迟的合成日志。"""
+    path = tmp_path / 'logs.jsonl'
+    lines = list(generate_lines(12000, services=4, corrupt_ratio=0.03))
+    lines.insert(10, '{"timestamp": "2025-01-15T00:00:00", "level": "INFO", "service": "支付", '
+                     '"latency_ms": 5, "msg": "é"}\n'.encode('utf-8'))
+    lines.insert(20, b'{"timestamp": "2025-01-15T00:00:00", "level": "INFO", '
+                     b'"service": "service-00", "latency_ms": -0.0, "msg": "\\u00e9"}\n')
+    lines.insert(30, b'{"timestamp": "2025-01-15T00:00:00", "level": "INFO", '
+                     b'"service": "service-00", "latency_ms": 0.0, "msg": "m"}\n')
+    path.write_bytes(b''.join(lines))
+    return str(path)
+
+
+def _serial(path, record_filter=None, **config):
+    """逐条处理得到的分析器与诊断。"""
+    analyzer = LogAnalyzer(**config)
+    diagnostics = ParseDiagnostics(stream=None)
+    for record in iter_records(path, diagnostics=diagnostics):
+        if record_filter is None or record_filter.matches(record):
+            analyzer.add_record(record)
+    return analyzer, diagnostics
+
+
+def _batched(path, fast, record_filter=None, batch_size=1000, **config):
+    """按列式批次处理得到的分析器与诊断。"""
+    analyzer = LogAnalyzer(**config)
+    diagnostics = ParseDiagnostics(stream=None)
+    for batch in iter_batches(path, fast=fast, diagnostics=diagnostics,
+                              record_filter=record_filter,
+                              keep_time=analyzer.needs_time,
+                              keep_messages=bool(analyzer.top_messages), batch_size=batch_size):
+        analyzer.add_batch(batch)
+    return analyzer, diagnostics
+
+
+class TestAddBatch:
+    """测试 add_batch 与逐条处理一致。"""
+
+    @pytest.mark.parametrize('fast', [False, True])
+    @pytest.mark.parametrize('use_numpy', [False, True])
+    def test_identical_to_add_record(self, log_file, monkeypatch, fast, use_numpy):
+        """统计结果、状态与诊断逐位一致（含 NumPy 与标准库两种实现）。"""
+        if use_numpy:
+            pytest.importorskip('numpy')
+        else:
+            monkeypatch.setattr(src.analyzer, 'numpy', None)
+        serial, serial_diagnostics = _serial(log_file)
+        batched, batched_diagnostics = _batched(log_file, fast, batch_size=4000)
+
+        quantiles = [0, 25, 50, 90, 99, 99.9, 100]
+        assert batched.to_state() == serial.to_state()
+        assert batched.get_stats(quantiles) == serial.get_stats(quantiles)
+        assert batched_diagnostics.to_state() == serial_diagnostics.to_state()
+        # 相等的 -0.0 与 0.0 保持输入顺序，排序结果逐位一致
+        assert str(batched.get_stats()['services']['service-00']['min']) == '-0.0'
+
+    @pytest.mark.parametrize('fast', [False, True])
+    def test_window_and_filter(self, log_file, fast):
+        """时间窗口与过滤器在批处理中同样生效。"""
+        record_filter = RecordFilter(services=['service-01', 'service-02'], levels=['ERROR'])
+        config = {'time_window': 30.0}
+        serial, _ = _serial(log_file, record_filter, **config)
+        batched, _ = _batched(log_file, fast, record_filter, **config)
+        assert batched.total_logs == serial.total_logs > 0
+        assert batched.get_window_stats() == serial.get_window_stats()
+        assert batched.to_state() == serial.to_state()
+
+    def test_sketch_mode(self, log_file):
+        """sketch 模式的状态与逐条处理一致。"""
+        serial, _ = _serial(log_file, mode=MODE_SKETCH)
+        batched, _ = _batched(log_file, True, mode=MODE_SKETCH)
+        assert batched.to_state() == serial.to_state()
+
+    def test_window_requires_time_columns(self):
+        """配置了时间窗口时批次必须包含时间列。"""
+        batch = RecordBatch.from_records([{'service': 'a', 'level': 'INFO', 'latency_ms': 1}])
+        with pytest.raises(ValueError):
+            LogAnalyzer(time_window=60.0).add_batch(batch)
+
+    def test_from_records(self):
+        """from_records 按首次出现顺序编号服务并统计错误数。"""
+        records = [
+            {'service': 'b', 'level': 'ERROR', 'latency_ms': 3},
+            {'service': 'a', 'level': 'INFO', 'latency_ms': 1},
+            {'service': 'b', 'level': 'INFO', 'latency_ms': 2},
+        ]
+        batch = RecordBatch.from_records(records)
+        assert batch.services == ['b', 'a']
+        assert list(batch.service_ids) == [0, 1, 0]
+        assert batch.error_count == 1 and len(batch) == 3
+
+
+def test_stdin_batches(monkeypatch):
+    """标准输入同样可以按批读取。"""
+    data_file = os.path.join(os.path.dirname(__file__), 'data', 'raw_logs.jsonl')
+    with open(data_file, 'rb') as f:
+        monkeypatch.setattr(sys, 'stdin', io.TextIOWrapper(io.BufferedReader(io.BytesIO(f.read()))))
+    total = sum(len(batch) for batch in iter_batches('-', fast=True))
+    assert total == len(list(iter_records(data_file, diagnostics=ParseDiagnostics(stream=None))))
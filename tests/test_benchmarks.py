@@ -0,0 +1,72 @@
+"""
+基准测试工具测试
+"""
+
+import json
+
+import pytest
+
+from benchmarks.generator import generate_lines
+from benchmarks.suite import compare_results, run_suite
+
+
+class TestGenerator:
+    """测试合成日志生成器。"""
+
+    def test_deterministic(self):
+        """相同参数生成相同内容。"""
+        assert list(generate_lines(200, seed=7)) == list(generate_lines(200, seed=7))
+        assert list(generate_lines(200, seed=7)) != list(generate_lines(200, seed=8))
+
+    def test_ratios(self):
+        """损坏行与错误级别比例接近设定值。"""
+        lines = list(generate_lines(5000, error_ratio=0.2, corrupt_ratio=0.1))
+        valid = []
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and 'service' in record:
+                valid.append(record)
+        errors = sum(1 for r in valid if r['level'] == 'ERROR')
+
+        assert 0.85 < len(valid) / len(lines) < 0.95
+        assert 0.15 < errors / len(valid) < 0.25
+
+
+class TestSuite:
+    """测试基准套件与回退比较。"""
+
+    def test_run_suite_results(self):
+        """结果包含吞吐量与峰值内存，且可 JSON 序列化。"""
+        results = run_suite(500, repeat=1, only=['parse_line', 'add_record'])
+        assert set(results['results']) == {'parse_line', 'add_record'}
+        for result in results['results'].values():
+            assert result['records_per_sec'] > 0
+            assert result['peak_memory_bytes'] >= 0
+        json.dumps(results)
+
+    def test_compare_flags_regressions(self):
+        """吞吐量下降或内存上升超过阈值时报告回退。"""
+        baseline = {'results': {
+            'a': {'records_per_sec': 1000.0, 'peak_memory_bytes': 100},
+            'b': {'records_per_sec': 1000.0, 'peak_memory_bytes': 100},
+        }}
+        current = {'results': {
+            'a': {'records_per_sec': 950.0, 'peak_memory_bytes': 105},
+            'b': {'records_per_sec': 800.0, 'peak_memory_bytes': 150},
+            'c': {'records_per_sec': 1.0, 'peak_memory_bytes': 1},
+        }}
+        regressions = compare_results(current, baseline, threshold=0.1)
+        assert [(name, metric) for name, metric, _ in regressions] == [
+            ('b', 'records_per_sec'), ('b', 'peak_memory_bytes')]
+
+    def test_compare_rejects_different_workload(self):
+        """工作负载不同的基线无法比较。"""
+        results = {'version': 2, 'workload': {'lines': 1000, 'seed': 1}, 'results': {}}
+        with pytest.raises(ValueError):
+            compare_results(results, dict(results, workload={'lines': 2000, 'seed': 1}))
+        with pytest.raises(ValueError):
+            compare_results(results, dict(results, version=1))
+        assert compare_results(results, dict(results)) == []
@@ -0,0 +1,129 @@
+"""
+检查点测试
+"""
+
+import json
+import os
+
+from src.analyzer import LogAnalyzer
+from src.checkpoint import (
+    complete_lines_end, load_checkpoint, resume_from_checkpoint, save_checkpoint
+)
+from src.cli import main
+from src.filters import RecordFilter
+from src.parser import iter_records
+
+
+def _lines(start, count):
+    """生成 count 行日志。"""
+    return ''.join(
+        f'{{"timestamp": "2025-01-15T10:00:00", "level": "{"ERROR" if i % 4 == 0 else "INFO"}", '
+        f'"service": "svc{i % 3}", "latency_ms": {i}, "msg": "m"}}\n'
+        for i in range(start, start + count)
+    )
+
+
+def _analyze(path):
+    """全量分析文件。"""
+    analyzer = LogAnalyzer()
+    for record in iter_records(str(path)):
+        analyzer.add_record(record)
+    return analyzer
+
+
+class TestCompleteLinesEnd:
+    """测试 complete_lines_end 函数。"""
+
+    def test_excludes_partial_line(self, tmp_path):
+        """不完整的末尾行不计入。"""
+        path = tmp_path / 'app.jsonl'
+        path.write_bytes(b'{"a": 1}\n{"b": 2}\n{"c"')
+        assert complete_lines_end(str(path)) == 18
+
+    def test_no_newline(self, tmp_path):
+        """没有换行时返回起始偏移。"""
+        path = tmp_path / 'app.jsonl'
+        path.write_bytes(b'{"a"')
+        assert complete_lines_end(str(path)) == 0
+
+
+class TestResume:
+    """测试检查点恢复。"""
+
+    def test_resume_processes_only_new_data(self, tmp_path):
+        """恢复后只处理新增数据，结果与全量分析一致。"""
+        log = tmp_path / 'app.jsonl'
+        checkpoint = tmp_path / 'app.ckpt'
+        output = tmp_path / 'report.html'
+        log.write_text(_lines(0, 50))
+        argv = ['-i', str(log), '-o', str(output), '--checkpoint', str(checkpoint)]
+
+        assert main(argv) == 0
+        assert load_checkpoint(str(checkpoint))['offset'] == os.path.getsize(log)
+
+        with open(log, 'a', encoding='utf-8') as f:
+            f.write(_lines(50, 30))
+        assert main(argv) == 0
+
+        resumed, _, offset, _ = resume_from_checkpoint(
+            str(checkpoint), str(log), LogAnalyzer())
+        assert offset == os.path.getsize(log)
+        assert resumed.get_stats() == _analyze(log).get_stats()
+
+    def test_truncated_file_falls_back(self, tmp_path):
+        """文件被截断时检查点失效。"""
+        log = tmp_path / 'app.jsonl'
+        checkpoint = tmp_path / 'app.ckpt'
+        log.write_text(_lines(0, 20))
+        save_checkpoint(str(checkpoint), str(log), os.path.getsize(log), _analyze(log))
+
+        log.write_text(_lines(0, 5))
+        analyzer, _, offset, reason = resume_from_checkpoint(
+            str(checkpoint), str(log), LogAnalyzer())
+        assert analyzer is None and offset == 0
+        assert '截断' in reason
+
+    def test_replaced_file_falls_back(self, tmp_path):
+        """文件被替换时检查点失效。"""
+        log = tmp_path / 'app.jsonl'
+        checkpoint = tmp_path / 'app.ckpt'
+        log.write_text(_lines(0, 20))
+        save_checkpoint(str(checkpoint), str(log), os.path.getsize(log), _analyze(log))
+
+        replacement = tmp_path / 'new.jsonl'
+        replacement.write_text(_lines(100, 40))
+        os.replace(replacement, log)
+        analyzer, _, offset, _ = resume_from_checkpoint(
+            str(checkpoint), str(log), LogAnalyzer())
+        assert analyzer is None and offset == 0
+
+    def test_mode_mismatch_falls_back(self, tmp_path):
+        """精度模式不同时不使用检查点。"""
+        log = tmp_path / 'app.jsonl'
+        checkpoint = tmp_path / 'app.ckpt'
+        log.write_text(_lines(0, 20))
+        save_checkpoint(str(checkpoint), str(log), os.path.getsize(log), _analyze(log))
+
+        analyzer, _, _, _ = resume_from_checkpoint(str(checkpoint), str(log),
+                                                LogAnalyzer(mode='sketch'))
+        assert analyzer is None
+
+    def test_filter_mismatch_falls_back(self, tmp_path):
+        """过滤条件改变时丢弃检查点并全量扫描，而不是把新旧条件的统计混在一起。"""
+        log = tmp_path / 'app.jsonl'
+        checkpoint = tmp_path / 'app.ckpt'
+        output = tmp_path / 'report.json'
+        log.write_text(_lines(0, 30))
+        base = ['-i', str(log), '-o', str(output), '--format', 'json',
+                '--checkpoint', str(checkpoint)]
+
+        assert main(base + ['--service', 'svc0']) == 0
+        analyzer, _, _, reason = resume_from_checkpoint(
+            str(checkpoint), str(log), LogAnalyzer(), RecordFilter(services=['svc1']))
+        assert analyzer is None and '过滤条件' in reason
+        analyzer, _, _, reason = resume_from_checkpoint(str(checkpoint), str(log), LogAnalyzer())
+        assert analyzer is None and '过滤条件' in reason
+
+        assert main(base + ['--service', 'svc1']) == 0
+        stats = json.loads(output.read_text(encoding='utf-8'))
+        assert set(stats['services']) == {'svc1'} and stats['total_logs'] == 10
@@ -0,0 +1,173 @@
+"""
+CLI 接口测试
+"""
+
+import io
+import json
+import os
+import sys
+
+from src.analyzer import LogAnalyzer
+from src.cli import feed_records, main
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), 'data', 'raw_logs.jsonl')
+
+
+class TestFeedRecords:
+    """测试 feed_records 函数。"""
+
+    def test_window_keeps_last_records(self):
+        """窗口模式只分析最近 N 条记录。"""
+        analyzer = LogAnalyzer()
+        records = ({'level': 'INFO', 'service': 'api', 'latency_ms': i} for i in range(100))
+
+        assert feed_records(records, analyzer, window_size=10) == 10
+        stats = analyzer.get_stats()
+        assert stats['total_logs'] == 10
+        assert stats['services']['api']['min'] == 90
+
+    def test_no_window(self):
+        """不指定窗口时分析全部记录。"""
+        analyzer = LogAnalyzer()
+        records = ({'level': 'INFO', 'service': 'api', 'latency_ms': i} for i in range(100))
+        assert feed_records(records, analyzer) == 100
+
+
+class TestMain:
+    """测试 main 入口。"""
+
+    def test_generates_report(self, tmp_path):
+        """正常运行生成报告并返回 0。"""
+        output = tmp_path / 'report.html'
+        assert main(['--input', DATA_FILE, '--output', str(output)]) == 0
+        assert output.exists()
+
+    def test_missing_input(self, tmp_path):
+        """输入文件不存在返回 1。"""
+        output = tmp_path / 'report.html'
+        assert main(['--input', str(tmp_path / 'missing.jsonl'), '--output', str(output)]) == 1
+
+    def test_invalid_relative_accuracy(self, tmp_path, capsys):
+        """无效的 --relative-accuracy 在读取输入前作为参数错误报告。"""
+        output = tmp_path / 'report.html'
+        argv = ['--input', DATA_FILE, '--output', str(output), '--sketch', '--relative-accuracy', '2']
+        assert main(argv) == 2
+        err = capsys.readouterr().err
+        assert '参数错误' in err and '[PARSER]' not in err
+        assert not output.exists()
+
+    def test_stdin_input(self, tmp_path, monkeypatch):
+        """--input - 从标准输入读取，结果与读取文件相同。"""
+        with open(DATA_FILE, 'rb') as f:
+            stdin = io.TextIOWrapper(io.BufferedReader(io.BytesIO(f.read())))
+        monkeypatch.setattr(sys, 'stdin', stdin)
+        from_stdin = tmp_path / 'stdin.json'
+        from_file = tmp_path / 'file.json'
+        assert main(['--input', '-', '--output', str(from_stdin), '--format', 'json']) == 0
+        assert main(['--input', DATA_FILE, '--output', str(from_file), '--format', 'json']) == 0
+        assert from_stdin.read_text(encoding='utf-8') == from_file.read_text(encoding='utf-8')
+
+    def test_service_and_level_filters(self, tmp_path):
+        """--service 与 --level 只保留匹配的记录。"""
+        output = tmp_path / 'report.json'
+        argv = ['--input', DATA_FILE, '--output', str(output), '--format', 'json',
+                '--service', 'payment', '--level', 'ERROR', 'WARN']
+        assert main(argv) == 0
+        stats = json.loads(output.read_text(encoding='utf-8'))
+        assert stats['total_logs'] > 0
+        assert list(stats['services']) == ['payment']
+
+    def test_top_messages(self, tmp_path):
+        """--top-messages 控制高频消息的数量，单进程与多进程结果一致。"""
+        outputs = []
+        for workers in ('1', '2'):
+            output = tmp_path / f'report{workers}.json'
+            argv = ['--input', DATA_FILE, '--output', str(output), '--format', 'json',
+                    '--top-messages', '3', '--workers', workers]
+            assert main(argv) == 0
+            outputs.append(json.loads(output.read_text(encoding='utf-8')))
+        assert len(outputs[0]['top_messages']) == 3
+        assert outputs[0]['top_messages'] == outputs[1]['top_messages']
+
+        output = tmp_path / 'none.json'
+        assert main(['--input', DATA_FILE, '--output', str(output), '--format', 'json',
+                     '--top-messages', '0']) == 0
+        assert 'top_messages' not in json.loads(output.read_text(encoding='utf-8'))
+
+    def test_series(self, tmp_path):
+        """--series 输出趋势序列，单进程与多进程结果一致；未指定时不输出。"""
+        outputs = []
+        for workers in ('1', '2'):
+            output = tmp_path / f'report{workers}.json'
+            argv = ['--input', DATA_FILE, '--output', str(output), '--format', 'json',
+                    '--series', '2s', '--workers', workers]
+            assert main(argv) == 0
+            outputs.append(json.loads(output.read_text(encoding='utf-8')))
+        series = outputs[0]['series']
+        assert sum(series['count']) == outputs[0]['total_logs'] - series['invalid_timestamps']
+        assert len(series['timestamps']) > 1
+        assert series == outputs[1]['series']
+
+        html = tmp_path / 'report.html'
+        assert main(['--input', DATA_FILE, '--output', str(html), '--series', '2s']) == 0
+        assert '<svg' in html.read_text(encoding='utf-8')
+        output = tmp_path / 'none.json'
+        assert main(['--input', DATA_FILE, '--output', str(output), '--format', 'json']) == 0
+        assert 'series' not in json.loads(output.read_text(encoding='utf-8'))
+
+    def test_time_range_with_index(self, tmp_path):
+        """--since/--until 配合 --index 的结果与全量扫描一致，并生成索引文件。"""
+        data = tmp_path / 'logs.jsonl'
+        data.write_bytes(open(DATA_FILE, 'rb').read())
+        outputs = []
+        for extra in ([], ['--index']):
+            output = tmp_path / f'report{len(outputs)}.json'
+            argv = ['--input', str(data), '--output', str(output), '--format', 'json',
+                    '--since', '2025-01-15T10:23:46', '--until', '2025-01-15T10:23:52'] + extra
+            assert main(argv) == 0
+            outputs.append(json.loads(output.read_text(encoding='utf-8')))
+        assert 0 < outputs[0]['total_logs'] < 20
+        assert outputs[0]['services'] == outputs[1]['services']
+        assert (tmp_path / 'logs.jsonl.idx').exists()
+
+    def test_glob_inputs(self, tmp_path):
+        """通配符展开为多个输入并生成含来源表的报告。"""
+        for name in ('a.jsonl', 'b.jsonl'):
+            (tmp_path / name).write_bytes(open(DATA_FILE, 'rb').read())
+        output = tmp_path / 'report.html'
+        argv = ['--input', str(tmp_path / '*.jsonl'), '--output', str(output), '--per-file']
+        assert main(argv) == 0
+        content = output.read_text(encoding='utf-8')
+        assert 'a.jsonl' in content and 'b.jsonl' in content
+
+    def test_profile(self, tmp_path, capsys):
+        """--profile 输出阶段摘要并写入报告，--profile-output 生成 cProfile 文件。"""
+        output = tmp_path / 'report.html'
+        prof = tmp_path / 'hot.prof'
+        argv = ['--input', DATA_FILE, '--output', str(output), '--profile-output', str(prof)]
+        assert main(argv) == 0
+        out = capsys.readouterr().out
+        assert 'ingest' in out and 'report' in out
+        # 默认的列式批次路径也把读取与解码分开
+        stages = [line.split()[0] for line in out.splitlines() if line.startswith('  ')]
+        assert stages == ['read', 'decode', 'add_batch']
+        assert '阶段剖析' in output.read_text(encoding='utf-8')
+        assert prof.exists()
+
+    def test_multiple_formats(self, tmp_path):
+        """重复 --format 时一次运行写出多种格式。"""
+        output = tmp_path / 'report'
+        argv = ['--input', DATA_FILE, '--output', str(output),
+                '--format', 'json', '--format', 'prom', '--format', 'html']
+        assert main(argv) == 0
+        assert (tmp_path / 'report.json').exists()
+        assert (tmp_path / 'report.prom').exists()
+        assert (tmp_path / 'report.html').exists()
+
+    def test_follow_mode(self, tmp_path):
+        """--follow 模式按次数刷新报告后退出。"""
+        output = tmp_path / 'report.html'
+        argv = ['--input', DATA_FILE, '--output', str(output), '--follow',
+                '--refresh-interval', '0', '--max-refreshes', '1']
+        assert main(argv) == 0
+        assert output.exists()
@@ -0,0 +1,56 @@
+"""
+机器可读输出测试
+"""
+
+import csv
+import io
+import json
+
+from src.analyzer import LogAnalyzer
+from src.exporters import output_paths, render
+
+
+def _stats():
+    """构造包含两个服务的统计结果。"""
+    analyzer = LogAnalyzer()
+    for latency in (10, 20, 30):
+        analyzer.add_record({'level': 'INFO', 'service': 'api', 'latency_ms': latency})
+    analyzer.add_record({'level': 'ERROR', 'service': 'we"ird', 'latency_ms': 5})
+    return analyzer.get_stats(quantiles=[50, 99])
+
+
+class TestRender:
+    """测试各格式的渲染结果。"""
+
+    def test_json_roundtrip(self):
+        """JSON 输出与统计字典一致。"""
+        stats = _stats()
+        assert json.loads(render(stats, 'json')) == json.loads(json.dumps(stats))
+
+    def test_csv_rows(self):
+        """CSV 每个服务一行，列包含所有百分位。"""
+        rows = list(csv.reader(io.StringIO(render(_stats(), 'csv'))))
+        assert rows[0] == ['service', 'count', 'p50', 'p99', 'min', 'max']
+        assert rows[1][:3] == ['api', '3', '20.0']
+        assert rows[2][0] == 'we"ird'
+
+    def test_prometheus_exposition(self):
+        """Prometheus 输出包含全局指标和带转义标签的分位数。"""
+        text = render(_stats(), 'prom')
+        assert 'log_analyzer_logs 4\n' in text
+        assert 'log_analyzer_error_ratio 0.25\n' in text
+        assert 'log_analyzer_service_latency_milliseconds{service="api",quantile="0.5"} 20\n' in text
+        assert 'service="we\\"ird"' in text
+
+
+class TestOutputPaths:
+    """测试 output_paths 函数。"""
+
+    def test_single_format_keeps_path(self):
+        """单一格式直接使用指定路径。"""
+        assert output_paths('out/metrics.txt', ['prom']) == {'prom': 'out/metrics.txt'}
+
+    def test_multiple_formats_replace_extension(self):
+        """多种格式按格式替换扩展名并去重。"""
+        assert output_paths('out/report.html', ['json', 'html', 'json']) == {
+            'json': 'out/report.json', 'html': 'out/report.html'}
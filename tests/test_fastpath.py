@@ -0,0 +1,53 @@
+"""
+快速行解码器测试
+"""
+
+import os
+
+import pytest
+
+from src.fastpath import parse_line_fast
+from src.parser import parse_file, parse_line
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), 'data', 'raw_logs.jsonl')
+
+
+class TestParseLineFast:
+    """测试 parse_line_fast 函数"""
+
+    @pytest.mark.parametrize('line', [
+        b'{"timestamp": "2025-01-15T10:23:45", "level": "ERROR", "service": "payment", '
+        b'"latency_ms": 1250, "msg": "timeout"}\n',
+        b'{"timestamp":"t","level":"INFO","service":"a","latency_ms":1.5,"msg":""}',
+        b'{"timestamp": "t", "level": "INFO", "service": "a", "latency_ms": -2e3, "msg": "x"}',
+        b'{"timestamp": "t", "level": "INFO", "service": "\xe6\x94\xaf\xe4\xbb\x98", '
+        b'"latency_ms": 0, "msg": "x"}',
+        # 以下行需要回退到 json.loads
+        b'{"level": "INFO", "timestamp": "t", "service": "a", "latency_ms": 1, "msg": "x"}',
+        b'{"timestamp": "t", "level": "INFO", "service": "a\\"b", "latency_ms": 1, "msg": "x"}',
+        b'{"timestamp": "t", "level": "INFO", "service": "a", "latency_ms": 1, "msg": "x", "k": 1}',
+        b'{"timestamp": "t", "level": "INFO", "service": "a", "latency_ms": 01, "msg": "x"}',
+        b'{"timestamp": "t", "level": "INFO"}',
+        b'{"timestamp": "broken',
+        b'   ',
+        # \f 与 \v 不是 JSON 空白，只在首尾时被 strip() 去掉
+        b'{"timestamp": "t",\x0c"level": "INFO", "service": "a", "latency_ms": 1, "msg": "x"}',
+        b'{"timestamp": "t", "level": "INFO", "service": "a", "latency_ms":\x0b1, "msg": "x"}',
+        b'\x0c{"timestamp": "t", "level": "INFO", "service": "a", "latency_ms": 1, "msg": "x"}\x0b\n',
+    ])
+    def test_matches_parse_line(self, line):
+        """快速解码结果与 parse_line 完全一致（包括类型）"""
+        fast = parse_line_fast(line)
+        slow = parse_line(line)
+        assert fast == slow
+        if fast is not None:
+            assert type(fast['latency_ms']) is type(slow['latency_ms'])
+
+    def test_text_input_falls_back(self):
+        """字符串输入直接使用 parse_line"""
+        line = '{"timestamp": "t", "level": "INFO", "service": "a", "latency_ms": 1, "msg": "x"}'
+        assert parse_line_fast(line) == parse_line(line)
+
+    def test_file_results_identical(self):
+        """测试数据文件的解析结果一致"""
+        assert parse_file(DATA_FILE, decoder=parse_line_fast) == parse_file(DATA_FILE)
@@ -0,0 +1,66 @@
+"""
+记录过滤测试
+"""
+
+import json
+
+from benchmarks.generator import generate_lines
+from src.diagnostics import ParseDiagnostics
+from src.fastpath import parse_line_fast
+from src.filters import RecordFilter
+from src.parser import parse_line
+
+
+def _line(service, level='INFO', msg='m'):
+    """构造一行测试日志。"""
+    return (json.dumps({'timestamp': '2025-01-15T10:00:00', 'level': level, 'service': service,
+                        'latency_ms': 1, 'msg': msg}, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+class TestRecordFilter:
+    """测试 RecordFilter。"""
+
+    def test_prefilter_rejects_without_decoding(self):
+        """不含候选值的行在解码前被排除，含候选值的行交给精确比较。"""
+        record_filter = RecordFilter(services=['payment'], levels=['ERROR', 'WARN'])
+        assert not record_filter.may_match(_line('auth', 'ERROR'))
+        assert not record_filter.may_match(_line('payment', 'INFO'))
+        assert record_filter.may_match(_line('payment', 'WARN'))
+        # 值出现在其他字段时预筛放过，精确比较排除
+        line = _line('auth', 'ERROR', msg='payment')
+        assert record_filter.may_match(line)
+        assert record_filter.wrap(parse_line)(line) is None
+
+    def test_escaped_values_not_rejected(self):
+        """值可能以转义形式出现的行不会被预筛排除。"""
+        record_filter = RecordFilter(services=['支付'])
+        escaped = (json.dumps({'timestamp': 't', 'level': 'INFO', 'service': '支付',
+                               'latency_ms': 1, 'msg': 'm'}) + '\n').encode('ascii')
+        assert record_filter.wrap(parse_line)(escaped)['service'] == '支付'
+        assert record_filter.wrap(parse_line)(_line('支付'))['service'] == '支付'
+
+    def test_non_string_field(self):
+        """字段值不是字符串时不匹配。"""
+        record = {'service': ['payment'], 'level': 'ERROR'}
+        assert not RecordFilter(services=['payment']).matches(record)
+        assert not RecordFilter(since=0.0).matches({'timestamp': ['t']})
+
+    def test_matches_decode_then_filter(self):
+        """结果与先解码再过滤一致，被预筛排除的行不计入诊断。"""
+        lines = list(generate_lines(3000, corrupt_ratio=0.05))
+        record_filter = RecordFilter(services=['service-01', 'service-02'], levels=['ERROR'])
+        for decoder in (parse_line, parse_line_fast):
+            quiet = ParseDiagnostics(stream=None)
+            expected = [r for r in (decoder(l, quiet) for l in lines)
+                        if r is not None and record_filter.matches(r)]
+            filtered = ParseDiagnostics(stream=None)
+            wrapped = record_filter.wrap(decoder)
+            assert [r for r in (wrapped(l, filtered) for l in lines) if r] == expected
+            assert expected
+            assert filtered.failures <= quiet.failures
+
+    def test_inactive_without_conditions(self):
+        """没有条件时不过滤。"""
+        record_filter = RecordFilter()
+        assert not record_filter.active
+        assert record_filter.may_match(_line('any'))
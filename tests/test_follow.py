@@ -0,0 +1,152 @@
+"""
+跟踪模式测试
+"""
+
+import os
+
+from src.analyzer import LogAnalyzer
+from src.diagnostics import ParseDiagnostics
+from src.follow import FileFollower, follow
+
+
+def _line(service, latency):
+    """生成一行日志。"""
+    return (f'{{"timestamp": "2025-01-15T10:00:00", "level": "INFO", '
+            f'"service": "{service}", "latency_ms": {latency}, "msg": "m"}}\n')
+
+
+class TestFileFollower:
+    """测试 FileFollower 类。"""
+
+    def test_reads_only_appended_data(self, tmp_path):
+        """每次 poll 只返回新追加的记录。"""
+        path = tmp_path / 'app.jsonl'
+        path.write_text(_line('a', 1) + _line('a', 2))
+        follower = FileFollower(str(path))
+
+        assert len(follower.poll()) == 2
+        assert not follower.poll()
+
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(_line('b', 3))
+        records = follower.poll()
+        assert [r['service'] for r in records] == ['b']
+        assert follower.offset == os.path.getsize(path)
+        follower.close()
+
+    def test_partial_trailing_line(self, tmp_path):
+        """不完整的末尾行等补齐后再解析。"""
+        path = tmp_path / 'app.jsonl'
+        full = _line('a', 1)
+        path.write_text(full[:20])
+        diagnostics = ParseDiagnostics(stream=None)
+        follower = FileFollower(str(path), diagnostics=diagnostics)
+
+        assert not follower.poll()
+        assert follower.offset == 0
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(full[20:])
+        assert len(follower.poll()) == 1
+        assert diagnostics.failures == 0
+        follower.close()
+
+    def test_bare_carriage_return_inside_line(self, tmp_path):
+        """行内单独的 \\r（JSON 空白）不切分记录，偏移与文件大小一致。"""
+        path = tmp_path / 'app.jsonl'
+        path.write_bytes(_line('a', 1).replace(', "service"', ',\r"service"').encode()
+                         + _line('b', 2).encode())
+        diagnostics = ParseDiagnostics(stream=None)
+        follower = FileFollower(str(path), diagnostics=diagnostics)
+
+        assert [r['service'] for r in follower.poll()] == ['a', 'b']
+        assert diagnostics.failures == 0
+        assert follower.offset == os.path.getsize(path)
+        follower.close()
+
+    def test_truncation_restarts_from_beginning(self, tmp_path):
+        """文件被截断后从头读取。"""
+        path = tmp_path / 'app.jsonl'
+        path.write_text(_line('a', 1) * 3)
+        follower = FileFollower(str(path))
+        assert len(follower.poll()) == 3
+
+        path.write_text(_line('b', 2))
+        records = follower.poll()
+        assert [r['service'] for r in records] == ['b']
+        assert follower.truncations == 1
+        follower.close()
+
+    def test_rotation_drains_old_file(self, tmp_path):
+        """轮转时先读完旧文件再切换到新文件。"""
+        path = tmp_path / 'app.jsonl'
+        path.write_text(_line('a', 1))
+        follower = FileFollower(str(path))
+        assert len(follower.poll()) == 1
+
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(_line('a', 2))
+        os.rename(path, tmp_path / 'app.jsonl.1')
+        path.write_text(_line('b', 3))
+
+        records = follower.poll()
+        assert [r['service'] for r in records] == ['a', 'b']
+        assert follower.rotations == 1
+        follower.close()
+
+    def test_large_file_in_bounded_batches(self, tmp_path):
+        """已有的大文件按字节上限分批返回，不一次读入内存。"""
+        path = tmp_path / 'app.jsonl'
+        line = _line('a', 1)
+        path.write_text(line * 5000)
+        follower = FileFollower(str(path))
+        max_bytes = 64 * 1024
+
+        batches = []
+        while not follower.caught_up:
+            batches.append(len(follower.poll(max_bytes)))
+        assert sum(batches) == 5000
+        assert len(batches) >= 5000 * len(line) // max_bytes
+        assert max(batches) <= max_bytes // len(line) + 1
+        assert follower.offset == os.path.getsize(path)
+        follower.close()
+
+    def test_rotation_with_backlog(self, tmp_path):
+        """旧文件积压超过上限时分批读完后才切换到新文件。"""
+        path = tmp_path / 'app.jsonl'
+        path.write_text(_line('a', 1))
+        follower = FileFollower(str(path))
+        assert len(follower.poll()) == 1
+
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(_line('a', 2) * 100)
+        os.rename(path, tmp_path / 'app.jsonl.1')
+        path.write_text(_line('b', 3))
+
+        services = []
+        while True:
+            services.extend(r['service'] for r in follower.poll(len(_line('a', 2)) * 30))
+            if follower.caught_up and follower.rotations:
+                break
+        assert services == ['a'] * 100 + ['b']
+        follower.close()
+
+
+class TestFollowLoop:
+    """测试 follow 循环。"""
+
+    def test_refreshes_with_new_data(self, tmp_path):
+        """每次刷新都包含已追加的数据。"""
+        path = tmp_path / 'app.jsonl'
+        path.write_text(_line('a', 1))
+        analyzer = LogAnalyzer()
+        totals = []
+
+        def refresh():
+            totals.append(analyzer.get_stats()['total_logs'])
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(_line('a', 2))
+
+        count = follow(FileFollower(str(path)), analyzer, refresh,
+                       interval=0, max_refreshes=3, sleep=lambda _: None)
+        assert count == 3
+        assert totals == [1, 2, 3]
@@ -0,0 +1,99 @@
+"""
+高频项统计测试
+"""
+
+import json
+import random
+from collections import Counter
+
+import pytest
+
+from src.heavy_hitters import SpaceSaving, message_label
+
+
+def _stream(seed=7, length=20000):
+    """少数高频键混合大量只出现一次的键（类似消息中嵌入的请求 ID）。"""
+    rng = random.Random(seed)
+    for i in range(length):
+        if rng.random() < 0.4:
+            yield f'hot-{rng.randrange(5)}'
+        else:
+            yield f'request {i}'
+
+
+class TestSpaceSaving:
+    """测试 SpaceSaving。"""
+
+    def test_exact_under_capacity(self):
+        """不同键数不超过容量时计数精确。"""
+        keys = ['a', 'b', 'a', 'c', 'a', 'b']
+        summary = SpaceSaving(capacity=3)
+        for key in keys:
+            summary.add(key)
+        assert summary.top(3) == [('a', 3, 0), ('b', 2, 0), ('c', 1, 0)]
+
+    def test_bounded_memory_and_error_bounds(self):
+        """高基数输入下计数器数量有界，高频键被保留且真实次数在误差区间内。"""
+        keys = list(_stream())
+        truth = Counter(keys)
+        summary = SpaceSaving(capacity=50)
+        for key in keys:
+            summary.add(key)
+
+        assert len(summary) == 50
+        assert summary.total == len(keys)
+        top = summary.top(5)
+        assert {key for key, _, _ in top} == {f'hot-{i}' for i in range(5)}
+        for key, count, overcount in summary.top(50):
+            assert count - overcount <= truth[key] <= count
+            assert overcount <= len(keys) / 50
+
+    def test_weighted_add(self):
+        """按次数加入与逐次加入在未满时相同。"""
+        one = SpaceSaving(capacity=10)
+        for key in 'aaabbc':
+            one.add(key)
+        weighted = SpaceSaving(capacity=10)
+        for key, times in Counter('aaabbc').items():
+            weighted.add(key, times)
+        assert weighted.top(10) == one.top(10)
+
+    def test_merge_keeps_bounds(self):
+        """合并后的计数仍是真实次数的上界，高频键仍被保留。"""
+        keys = list(_stream(length=30000))
+        truth = Counter(keys)
+        merged = SpaceSaving(capacity=40)
+        for start in range(0, len(keys), 10000):
+            part = SpaceSaving(capacity=40)
+            for key in keys[start:start + 10000]:
+                part.add(key)
+            merged.merge(part)
+
+        assert len(merged) == 40 and merged.total == len(keys)
+        assert {key for key, _, _ in merged.top(5)} == {f'hot-{i}' for i in range(5)}
+        for key, count, overcount in merged.top(40):
+            assert count - overcount <= truth[key] <= count
+
+    def test_state_round_trip(self):
+        """元组键经 JSON 往返后不变，恢复后可继续计数。"""
+        summary = SpaceSaving(capacity=3)
+        for key in [('api', 'ERROR', 'x'), ('api', 'INFO', 'y'), ('db', 'ERROR', 'x'),
+                    ('db', 'WARN', 'z'), ('api', 'ERROR', 'x')]:
+            summary.add(key)
+        restored = SpaceSaving.from_state(json.loads(json.dumps(summary.to_state())))
+        assert restored.top(3) == summary.top(3)
+        restored.add(('new', 'INFO', 'n'))
+        summary.add(('new', 'INFO', 'n'))
+        assert restored.top(3) == summary.top(3)
+
+    def test_invalid_capacity(self):
+        """容量必须为正数。"""
+        with pytest.raises(ValueError):
+            SpaceSaving(capacity=0)
+
+
+def test_message_label():
+    """非字符串字段值转换为 JSON 表示。"""
+    assert message_label('msg') == 'msg'
+    assert message_label(None) == 'null'
+    assert message_label({'b': 1, 'a': '支付'}) == '{"a": "支付", "b": 1}'
@@ -0,0 +1,97 @@
+"""
+侧车索引测试
+"""
+
+import os
+
+from src.filters import RecordFilter
+from src.index import (
+    build_index, default_index_path, load_index, select_ranges, update_index, validate_index
+)
+from src.parser import iter_records
+from src.window import parse_timestamp
+
+
+def _write_logs(path, start, count, mode='w'):
+    """从第 start 秒开始每秒写入一行，服务按 4 个轮换。"""
+    with open(path, mode, encoding='utf-8') as f:
+        for i in range(start, start + count):
+            f.write(f'{{"timestamp": "2025-01-15T10:{i // 60:02d}:{i % 60:02d}", '
+                    f'"level": "INFO", "service": "svc{i % 4}", "latency_ms": {i % 97}, '
+                    f'"msg": "m"}}\n')
+
+
+def _query(path, index, since=None, until=None, services=None):
+    """按索引选出的范围读取并精确过滤。"""
+    record_filter = RecordFilter(services=services, since=since, until=until)
+    ranges = select_ranges(index, os.path.getsize(path), since, until, services)
+    return [record for start, end in ranges for record in iter_records(path, start, end)
+            if record_filter.matches(record)]
+
+
+class TestIndex:
+    """测试索引建立与范围选择。"""
+
+    def test_selected_ranges_match_full_scan(self, tmp_path):
+        """按索引读取的结果与全量扫描过滤一致，且只读取部分数据。"""
+        path = str(tmp_path / 'logs.jsonl')
+        _write_logs(path, 0, 3000)
+        index = build_index(path, block_bytes=4096)
+        assert len(index['blocks']) > 10
+
+        since = parse_timestamp('2025-01-15T10:20:00')
+        until = parse_timestamp('2025-01-15T10:25:00')
+        record_filter = RecordFilter(services=['svc1'], since=since, until=until)
+        expected = [r for r in iter_records(path) if record_filter.matches(r)]
+        assert len(expected) == 75
+        assert _query(path, index, since, until, ['svc1']) == expected
+
+        ranges = select_ranges(index, os.path.getsize(path), since, until)
+        assert sum(end - start for start, end in ranges) < os.path.getsize(path) / 5
+
+    def test_incremental_update(self, tmp_path):
+        """追加数据后增量索引，已有块保持不变。"""
+        path = str(tmp_path / 'logs.jsonl')
+        _write_logs(path, 0, 1000)
+        index, message = update_index(path, block_bytes=4096)
+        assert message == '建立新索引'
+        assert load_index(default_index_path(path)) == index
+
+        assert update_index(path)[1] == '索引是最新的'
+
+        _write_logs(path, 1000, 500, mode='a')
+        updated, message = update_index(path)
+        assert message.startswith('增量索引')
+        assert updated['blocks'][:len(index['blocks'])] == index['blocks']
+        assert updated['offset'] == os.path.getsize(path)
+
+        since = parse_timestamp('2025-01-15T10:20:00')
+        assert len(_query(path, updated, since)) == 300
+
+    def test_unindexed_tail_is_read(self, tmp_path):
+        """末尾不完整的行不进入索引，但查询时仍会读取。"""
+        path = tmp_path / 'logs.jsonl'
+        _write_logs(str(path), 0, 100)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('{"timestamp": "2025-01-15T11:00:00", "level": "INFO", '
+                    '"service": "late", "latency_ms": 1, "msg": "m"}')
+        index = build_index(str(path))
+        assert index['offset'] < os.path.getsize(path)
+        records = _query(str(path), index, parse_timestamp('2025-01-15T11:00:00'))
+        assert [r['service'] for r in records] == ['late']
+
+    def test_invalidated_when_rewritten(self, tmp_path):
+        """文件被改写或截断时索引失效并重建。"""
+        path = str(tmp_path / 'logs.jsonl')
+        _write_logs(path, 0, 200)
+        index, _ = update_index(path)
+
+        data = open(path, 'rb').read()
+        with open(path, 'r+b') as f:
+            f.seek(len(data) - 20)
+            f.write(data[-20:].replace(b'"m"', b'"x"'))
+        valid, reason = validate_index(index, path)
+        assert not valid and reason == '文件内容已改变'
+
+        _write_logs(path, 0, 50)
+        assert update_index(path)[1].startswith('重建索引')
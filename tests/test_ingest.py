@@ -0,0 +1,131 @@
+"""
+网络接收测试
+"""
+
+import socket
+import threading
+import time
+
+from src.analyzer import LogAnalyzer
+from src.diagnostics import ParseDiagnostics
+from src.ingest import NetworkIngestor, start_in_thread
+
+LINE = (b'{"timestamp": "2025-01-15T10:00:00", "level": "INFO", '
+        b'"service": "api", "latency_ms": 10, "msg": "ok"}\n')
+
+
+def _wait_until(condition, timeout=5.0):
+    """轮询等待条件成立。"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('等待超时')
+        time.sleep(0.01)
+
+
+class TestNetworkIngestor:
+    """测试 TCP/UDP 接收。"""
+
+    def test_tcp_and_udp_loopback(self):
+        """TCP 分块发送和 UDP 多行数据报都被解码，计数器准确。"""
+        received = []
+        ingestor = NetworkIngestor(received.extend, diagnostics=ParseDiagnostics(stream=None))
+        thread = start_in_thread(ingestor, tcp=('127.0.0.1', 0), udp=('127.0.0.1', 0))
+        try:
+            with socket.create_connection(ingestor.addresses['tcp']) as client:
+                payload = LINE * 100 + b'not json\n' + LINE[:-1]
+                # 在行中间切分，验证跨块拼接与末尾无换行的行
+                for i in range(0, len(payload), 777):
+                    client.sendall(payload[i:i + 777])
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp:
+                udp.sendto(LINE * 3, ingestor.addresses['udp'])
+            _wait_until(lambda: len(received) == 104)
+        finally:
+            ingestor.stop()
+            thread.join()
+
+        counters = ingestor.stats()
+        assert counters['connections'] == 1
+        assert counters['lines_received'] == 105
+        assert counters['records_decoded'] == 104
+        assert counters['decode_failures'] == 1
+        assert counters['lines_dropped'] == 0
+        assert all(record['service'] == 'api' for record in received)
+
+    def test_backpressure(self):
+        """队列满时 UDP 丢弃并计数，TCP 等待而不丢数据。"""
+        release = threading.Event()
+        received = []
+
+        def slow_sink(records):
+            release.wait()
+            received.extend(records)
+
+        ingestor = NetworkIngestor(slow_sink, diagnostics=ParseDiagnostics(stream=None),
+                                   queue_size=1)
+        thread = start_in_thread(ingestor, tcp=('127.0.0.1', 0), udp=('127.0.0.1', 0))
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp:
+                for _ in range(20):
+                    udp.sendto(LINE, ingestor.addresses['udp'])
+                    time.sleep(0.005)
+            _wait_until(lambda: ingestor.counters['lines_dropped'] > 0)
+
+            with socket.create_connection(ingestor.addresses['tcp']) as client:
+                client.sendall(LINE * 50)
+            release.set()
+            _wait_until(lambda: ingestor.counters['records_decoded'] ==
+                        ingestor.counters['lines_received'])
+        finally:
+            release.set()
+            ingestor.stop()
+            thread.join()
+
+        counters = ingestor.stats()
+        assert counters['lines_received'] + counters['lines_dropped'] == 70
+        assert len(received) == counters['records_decoded']
+        assert len(received) >= 50
+
+    def test_oversized_line_dropped(self):
+        """超过 max_line_bytes 的行被丢弃，后续行正常处理。"""
+        received = []
+        ingestor = NetworkIngestor(received.extend, diagnostics=ParseDiagnostics(stream=None),
+                                   max_line_bytes=1024)
+        thread = start_in_thread(ingestor, tcp=('127.0.0.1', 0))
+        try:
+            with socket.create_connection(ingestor.addresses['tcp']) as client:
+                client.sendall(b'x' * 100000 + b'\n' + LINE)
+            _wait_until(lambda: ingestor.counters['lines_dropped'] == 1 and received)
+        finally:
+            ingestor.stop()
+            thread.join()
+        assert len(received) == 1
+
+    def test_bad_record_does_not_stop_consumer(self, capsys):
+        """sink 对无效记录抛出异常后解码线程继续处理；空行不计为解码失败。"""
+        analyzer = LogAnalyzer()
+
+        def sink(records):
+            for record in records:
+                analyzer.add_record(record)
+
+        ingestor = NetworkIngestor(sink, diagnostics=ParseDiagnostics(stream=None))
+        thread = start_in_thread(ingestor, tcp=('127.0.0.1', 0), udp=('127.0.0.1', 0))
+        bad = LINE.replace(b'"latency_ms": 10', b'"latency_ms": "abc"')
+        try:
+            with socket.create_connection(ingestor.addresses['tcp']) as client:
+                client.sendall(bad + b'\n  \n')
+                _wait_until(lambda: ingestor.counters['sink_errors'] == 1)
+                client.sendall(LINE * 5 + b'\n')
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp:
+                udp.sendto(LINE * 2, ingestor.addresses['udp'])
+            _wait_until(lambda: analyzer.total_logs == 7)
+        finally:
+            ingestor.stop()
+            thread.join()
+
+        counters = ingestor.stats()
+        assert counters['decode_failures'] == 0
+        assert counters['lines_received'] == 8
+        assert counters['queue_depth'] == 0
+        assert 'abc' in capsys.readouterr().err
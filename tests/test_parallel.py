@@ -0,0 +1,106 @@
+"""
+并行解析测试
+"""
+
+import os
+
+from src.analyzer import LogAnalyzer
+from src.filters import RecordFilter
+from src.parallel import analyze_file_parallel, analyze_files, split_file
+from src.parser import iter_records
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), 'data', 'raw_logs.jsonl')
+
+
+def _write_logs(path, count):
+    """写入 count 行测试日志。"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(count):
+            level = 'ERROR' if i % 5 == 0 else 'INFO'
+            f.write(f'{{"timestamp": "2025-01-15T10:00:00", "level": "{level}", '
+                    f'"service": "svc{i % 4}", "latency_ms": {i % 97}, "msg": "m"}}\n')
+
+
+class TestSplitFile:
+    """测试 split_file 函数。"""
+
+    def test_ranges_are_line_aligned(self):
+        """分块边界位于行首且覆盖整个文件。"""
+        ranges = split_file(DATA_FILE, 4, min_chunk_bytes=1)
+        size = os.path.getsize(DATA_FILE)
+
+        assert ranges[0][0] == 0
+        assert ranges[-1][1] == size
+        with open(DATA_FILE, 'rb') as f:
+            data = f.read()
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            assert end == start
+            assert data[start - 1:start] == b'\n'
+
+    def test_range_records_cover_file(self):
+        """所有分块的记录拼接后与整个文件一致。"""
+        ranges = split_file(DATA_FILE, 3, min_chunk_bytes=1)
+        records = []
+        for start, end in ranges:
+            records.extend(iter_records(DATA_FILE, start, end))
+        assert records == list(iter_records(DATA_FILE))
+
+    def test_empty_file(self, tmp_path):
+        """空文件没有分块。"""
+        path = tmp_path / 'empty.jsonl'
+        path.write_text('')
+        assert not split_file(str(path), 4)
+
+
+class TestAnalyzeFileParallel:
+    """测试 analyze_file_parallel 函数。"""
+
+    def test_identical_to_serial(self, tmp_path):
+        """并行结果与单进程结果完全一致。"""
+        path = tmp_path / 'logs.jsonl'
+        _write_logs(path, 2000)
+
+        serial = LogAnalyzer()
+        for record in iter_records(str(path)):
+            serial.add_record(record)
+        parallel = analyze_file_parallel(str(path), 3, min_chunk_bytes=1)
+
+        assert parallel.get_stats() == serial.get_stats()
+
+    def test_record_filter(self, tmp_path):
+        """过滤器传入工作进程，结果与顺序过滤一致。"""
+        path = tmp_path / 'logs.jsonl'
+        _write_logs(path, 2000)
+        record_filter = RecordFilter(services=['svc1'], levels=['ERROR'])
+
+        serial = LogAnalyzer()
+        for record in iter_records(str(path)):
+            if record_filter.matches(record):
+                serial.add_record(record)
+        parallel = analyze_file_parallel(str(path), 3, min_chunk_bytes=1,
+                                         record_filter=record_filter)
+
+        assert parallel.total_logs == serial.total_logs > 0
+        assert parallel.get_stats() == serial.get_stats()
+
+
+class TestAnalyzeFiles:
+    """测试 analyze_files 函数。"""
+
+    def test_merged_equals_concatenated(self, tmp_path):
+        """多文件合并结果与逐个顺序读取一致，并给出每个文件的统计。"""
+        paths = []
+        for i, count in enumerate((300, 500, 200)):
+            path = tmp_path / f'part{i}.jsonl'
+            _write_logs(path, count)
+            paths.append(str(path))
+
+        serial = LogAnalyzer()
+        for path in paths:
+            for record in iter_records(path):
+                serial.add_record(record)
+        merged, per_file = analyze_files(paths, workers=2, per_file_quantiles=[50.0, 99.0])
+
+        assert merged.get_stats() == serial.get_stats()
+        assert list(per_file) == paths
+        assert [per_file[p]['total_logs'] for p in paths] == [300, 500, 200]
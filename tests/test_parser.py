@@ -2,6 +2,10 @@
 JSONL 解析器测试用例
 """
 
+import bz2
+import gzip
+import io
+import lzma
 import os
 import sys
 import pytest
@@ -9,7 +13,9 @@ import pytest
 # 添加 src 目录到路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from src.parser import parse_line, parse_file
+from src.diagnostics import ParseDiagnostics
+from src.parser import parse_line, parse_file, iter_records
+from src.reader import STDIN, detect_compression, iter_block_lines, iter_stream_blocks, open_lines
 
 
 class TestParseLine:
@@ -91,5 +97,184 @@ class TestParseFile:
         assert records[2]['level'] == 'ERROR'
 
 
+class TestIterRecords:
+    """测试 iter_records 生成器"""
+
+    def test_is_lazy_generator(self):
+        """iter_records 返回惰性迭代器，结果与 parse_file 一致"""
+        test_file = os.path.join(os.path.dirname(__file__), 'data', 'raw_logs.jsonl')
+        iterator = iter_records(test_file)
+        assert iter(iterator) is iterator
+        assert list(iterator) == parse_file(test_file)
+
+    def test_file_not_found_on_iteration(self):
+        """文件不存在时在迭代时抛出 FileNotFoundError"""
+        with pytest.raises(FileNotFoundError):
+            next(iter_records('/nonexistent/path/to/file.jsonl'))
+
+
+class TestOpenLines:
+    """测试 mmap 行读取"""
+
+    def test_lines_match_buffered_read(self):
+        """mmap 读取的行与普通读取一致"""
+        test_file = os.path.join(os.path.dirname(__file__), 'data', 'raw_logs.jsonl')
+        with open(test_file, 'rb') as f:
+            expected = list(f)
+        with open_lines(test_file) as lines:
+            assert list(lines) == expected
+
+    def test_start_offset(self, tmp_path):
+        """从指定偏移开始读取"""
+        path = tmp_path / 'a.jsonl'
+        path.write_bytes(b'one\ntwo\nthree')
+        with open_lines(str(path), 4) as lines:
+            assert list(lines) == [b'two\n', b'three']
+
+    def test_empty_file(self, tmp_path):
+        """空文件不能映射，回退到普通读取"""
+        path = tmp_path / 'empty.jsonl'
+        path.write_bytes(b'')
+        with open_lines(str(path)) as lines:
+            assert not list(lines)
+
+
+class TestCompressedInput:
+    """测试压缩输入"""
+
+    @pytest.mark.parametrize('codec, opener', [
+        ('gzip', gzip.open), ('bz2', bz2.open), ('xz', lzma.open),
+    ])
+    def test_compressed_file_matches_plain(self, tmp_path, codec, opener):
+        """按魔数识别压缩格式，解析结果与未压缩文件一致"""
+        test_file = os.path.join(os.path.dirname(__file__), 'data', 'raw_logs.jsonl')
+        path = tmp_path / 'logs.jsonl.compressed'
+        with open(test_file, 'rb') as src, opener(path, 'wb') as dst:
+            dst.write(src.read())
+
+        assert detect_compression(str(path)) == codec
+        assert parse_file(str(path)) == parse_file(test_file)
+
+    def test_plain_file_not_compressed(self):
+        """未压缩文件返回 None"""
+        test_file = os.path.join(os.path.dirname(__file__), 'data', 'raw_logs.jsonl')
+        assert detect_compression(test_file) is None
+
+    def test_block_lines_rejoin_split_lines(self):
+        """跨块的行被正确拼接"""
+        blocks = [b'ab', b'c\nde', b'f\n\ng', b'h']
+        assert list(iter_block_lines(blocks)) == [b'abc\n', b'def\n', b'\n', b'gh']
+
+    def test_early_close_stops_thread(self, tmp_path):
+        """提前停止读取时后台解压线程退出"""
+        path = tmp_path / 'big.jsonl.gz'
+        line = b'{"timestamp": "t", "level": "INFO", "service": "a", "latency_ms": 1, "msg": "m"}\n'
+        with gzip.open(path, 'wb') as f:
+            f.write(line * 200000)
+
+        with open_lines(str(path)) as lines:
+            assert next(lines) == line
+
+    def test_corrupt_stream_raises(self, tmp_path):
+        """压缩数据损坏时抛出异常"""
+        path = tmp_path / 'bad.jsonl.gz'
+        path.write_bytes(b'\x1f\x8b' + b'garbage' * 10)
+        with pytest.raises(Exception):
+            parse_file(str(path))
+
+
+def _fake_stdin(data: bytes) -> io.TextIOWrapper:
+    """构造 buffer 属性为可 peek 的缓冲流的标准输入替身"""
+    return io.TextIOWrapper(io.BufferedReader(io.BytesIO(data)))
+
+
+class TestStdinInput:
+    """测试从标准输入读取"""
+
+    def test_stdin_matches_file(self, monkeypatch):
+        """"-" 读取标准输入，行与文件读取一致"""
+        test_file = os.path.join(os.path.dirname(__file__), 'data', 'raw_logs.jsonl')
+        with open(test_file, 'rb') as f:
+            data = f.read()
+        monkeypatch.setattr(sys, 'stdin', _fake_stdin(data))
+        with open_lines(STDIN) as lines:
+            assert b''.join(lines) == data
+
+    def test_compressed_stdin(self, monkeypatch):
+        """标准输入中的压缩数据按魔数识别并解压"""
+        test_file = os.path.join(os.path.dirname(__file__), 'data', 'raw_logs.jsonl')
+        monkeypatch.setattr(sys, 'stdin', _fake_stdin(gzip.compress(open(test_file, 'rb').read())))
+        assert detect_compression(STDIN) == 'gzip'
+        assert parse_file(STDIN) == parse_file(test_file)
+
+    def test_stream_blocks(self):
+        """按固定大小分块读取，最后一块可以较短"""
+        blocks = list(iter_stream_blocks(io.BytesIO(b'abcdefg'), block_size=3))
+        assert blocks == [b'abc', b'def', b'g']
+
+    def test_stdin_offset_rejected(self, monkeypatch):
+        """标准输入不支持非零偏移"""
+        monkeypatch.setattr(sys, 'stdin', _fake_stdin(b''))
+        with pytest.raises(ValueError):
+            with open_lines(STDIN, 10):
+                pass
+
+
+class TestParseDiagnostics:
+    """测试解析诊断收集"""
+
+    def test_counts_by_reason(self):
+        """按原因分别统计解码错误和各缺失字段"""
+        diagnostics = ParseDiagnostics(stream=None)
+        parse_line('{"broken', diagnostics)
+        parse_line('{"timestamp": "t", "level": "INFO"}', diagnostics)
+        parse_line('[1, 2]', diagnostics)
+
+        assert diagnostics.failures == 3
+        assert diagnostics.reasons['decode_error'] == 1
+        assert diagnostics.reasons['missing:service'] == 1
+        assert diagnostics.reasons['missing:latency_ms'] == 1
+        assert diagnostics.reasons['not_object'] == 1
+
+    def test_samples_have_line_numbers(self):
+        """样本记录行号和行前缀"""
+        test_file = os.path.join(os.path.dirname(__file__), 'data', 'raw_logs.jsonl')
+        diagnostics = ParseDiagnostics(stream=None)
+        parse_file(test_file, diagnostics=diagnostics)
+
+        assert [sample['line'] for sample in diagnostics.samples] == [3, 8]
+        assert diagnostics.samples[1]['prefix'].startswith('{"timestamp": "broken')
+
+    def test_sample_limit(self):
+        """样本数量有上限"""
+        diagnostics = ParseDiagnostics(stream=None, max_samples=3)
+        for _ in range(100):
+            parse_line('{"broken', diagnostics)
+        assert diagnostics.failures == 100
+        assert len(diagnostics.samples) == 3
+
+    def test_live_output_rate_limited(self):
+        """实时输出被限流，并报告抑制条数"""
+        stream = io.StringIO()
+        diagnostics = ParseDiagnostics(stream=stream, live_limit=5, live_interval=3600)
+        for _ in range(1000):
+            parse_line('{"broken', diagnostics)
+        diagnostics.flush()
+
+        lines = stream.getvalue().splitlines()
+        assert len(lines) == 6
+        assert '995' in lines[-1]
+
+    def test_merge_state(self):
+        """合并其他收集器的状态"""
+        first = ParseDiagnostics(stream=None)
+        second = ParseDiagnostics(stream=None)
+        parse_line('{"broken', first)
+        parse_line('{"broken', second)
+        first.merge_state(second.to_state())
+        assert first.summary()['reasons'] == {'decode_error': 2}
+        assert len(first.samples) == 2
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -0,0 +1,44 @@
+"""
+阶段剖析测试
+"""
+
+from src.profiling import StageProfiler
+
+
+class TestStageProfiler:
+    """测试 StageProfiler 类。"""
+
+    def test_stage_records_throughput_and_calls_hooks(self):
+        """阶段结束时记录结果并调用钩子。"""
+        finished = []
+        profiler = StageProfiler(hooks=[finished.append])
+        with profiler.stage('ingest') as stage:
+            stage.records = 100
+            stage.bytes = 2048
+
+        assert finished == profiler.stages
+        result = profiler.to_stats()['stages'][0]
+        assert result['name'] == 'ingest'
+        assert result['records'] == 100
+        assert result['records_per_sec'] > 0
+        assert result['bytes_per_sec'] > 0
+
+    def test_timed_wrappers_accumulate(self):
+        """timed_calls 和 timed_iter 原样返回结果并累计耗时。"""
+        profiler = StageProfiler()
+        double = profiler.timed_calls(lambda x: x * 2, 'call')
+        items = list(profiler.timed_iter((double(i) for i in range(5)), 'iter'))
+
+        assert items == [0, 2, 4, 6, 8]
+        assert profiler.accumulated['iter'] >= profiler.accumulated['call'] > 0
+
+    def test_hot_stage_writes_cprofile(self, tmp_path):
+        """热点阶段生成 cProfile 输出，子阶段不计入总耗时。"""
+        path = tmp_path / 'hot.prof'
+        profiler = StageProfiler(cprofile_path=str(path))
+        with profiler.stage('ingest', hot=True):
+            sum(range(1000))
+        profiler.add('ingest.decode', 10.0)
+
+        assert path.exists()
+        assert profiler.to_stats()['total_seconds'] < 10.0
@@ -0,0 +1,139 @@
+"""
+HTML 报告生成器测试
+"""
+
+from src.reporter import generate_report
+
+
+def _stats(count):
+    """构造包含 count 个服务的统计结果。"""
+    services = {
+        f'svc{i:03d}': {'count': 1, 'p50': float(i), 'p99': float(i), 'min': 0.0, 'max': float(i)}
+        for i in range(count)
+    }
+    return {'total_logs': count, 'error_rate': 0.0, 'services': services,
+            'quantiles': [50.0, 99.0]}
+
+
+class TestGenerateReport:
+    """测试 generate_report 函数。"""
+
+    def test_lists_all_services_by_name(self, tmp_path):
+        """服务数不超过 top_n 时按名称列出全部服务，不生成折叠区块。"""
+        output = tmp_path / 'report.html'
+        generate_report(_stats(3), str(output), top_n=10)
+        content = output.read_text(encoding='utf-8')
+
+        assert content.index('svc000') < content.index('svc001') < content.index('svc002')
+        assert 'more-services"' not in content
+        assert not (tmp_path / 'report.html.tmp').exists()
+
+    def test_collapses_remainder(self, tmp_path):
+        """超过 top_n 时主表列出 P99 最高的服务，其余放入折叠模板。"""
+        output = tmp_path / 'report.html'
+        generate_report(_stats(20), str(output), top_n=5)
+        content = output.read_text(encoding='utf-8')
+        main_table, remainder = content.split('<template>')
+
+        assert main_table.index('svc019') < main_table.index('svc015')
+        assert 'svc014' not in main_table
+        assert 'svc014' in remainder and 'svc019' not in remainder
+        assert '其余 15 个服务' in content
+
+    def test_escapes_service_names(self, tmp_path):
+        """服务名中的 HTML 特殊字符被转义。"""
+        stats = _stats(0)
+        stats['services'] = {'<script>x</script>': {'count': 1, 'p50': 1.0, 'p99': 1.0,
+                                                    'min': 1.0, 'max': 1.0}}
+        output = tmp_path / 'report.html'
+        generate_report(stats, str(output))
+
+        assert '&lt;script&gt;x&lt;/script&gt;' in output.read_text(encoding='utf-8')
+
+    def test_error_breakdown_and_top_messages(self, tmp_path):
+        """按错误率列出服务，并列出转义后的高频消息。"""
+        stats = _stats(0)
+        stats['services'] = {
+            name: {'count': 10, 'p50': 1.0, 'p99': 1.0, 'min': 1.0, 'max': 1.0,
+                   'error_count': errors, 'error_rate': errors * 10.0,
+                   'warn_count': 1, 'warn_rate': 10.0}
+            for name, errors in (('low', 1), ('high', 6), ('mid', 3))
+        }
+        stats['top_messages'] = [
+            {'service': 'high', 'level': 'ERROR', 'msg': 'timeout <id=1>',
+             'count': 6, 'overcount': 0},
+        ]
+        output = tmp_path / 'report.html'
+        generate_report(stats, str(output), top_n=2)
+        content = output.read_text(encoding='utf-8')
+        section = content.split('各服务错误与警告')[1]
+
+        assert section.index('high') < section.index('mid')
+        assert 'low' not in section.split('高频消息')[0]
+        assert 'timeout &lt;id=1&gt;' in content
+
+    def test_sections_omitted_without_data(self, tmp_path):
+        """统计中没有对应字段时不生成新区块。"""
+        output = tmp_path / 'report.html'
+        generate_report(_stats(3), str(output))
+        content = output.read_text(encoding='utf-8')
+        assert '各服务错误与警告' not in content and '高频消息' not in content
+
+    def test_series_charts_downsampled(self, tmp_path):
+        """趋势图每条折线最多 max_points 个点，报告大小与间隔数无关。"""
+        n = 5000
+        stats = _stats(1)
+        stats['series'] = {
+            'interval_seconds': 10.0, 'start': '2025-01-15T00:00:00', 'end': '2025-01-15T13:53:20',
+            'timestamps': [1736899200.0 + 10 * i for i in range(n)],
+            'count': [10] * n, 'error_rate': [float(i % 7) for i in range(n)],
+            'overall': {'p50': [float(i % 13) for i in range(n)], 'p99': [float(i % 17) for i in range(n)]},
+            'services': {'a<b>': {'p50': [None] * n, 'p99': [float(i % 5) for i in range(n)]}},
+            'invalid_timestamps': 0,
+        }
+        output = tmp_path / 'report.html'
+        generate_report(stats, str(output))
+        content = output.read_text(encoding='utf-8')
+        assert content.count('<svg') == 3 and content.count('<polyline') >= 3
+        assert 'a&lt;b&gt;' in content
+        for polyline in content.split('points="')[1:]:
+            assert len(polyline.split('"')[0].split()) <= 300
+        assert len(content) < 200000
+
+    def test_series_too_short(self, tmp_path):
+        """只有一个间隔时不绘制趋势图。"""
+        stats = _stats(1)
+        stats['series'] = {
+            'interval_seconds': 10.0, 'start': '2025-01-15T00:00:00', 'end': '2025-01-15T00:00:10',
+            'timestamps': [1736899200.0], 'count': [1], 'error_rate': [0.0],
+            'overall': {'p50': [1.0]}, 'services': {}, 'invalid_timestamps': 0,
+        }
+        output = tmp_path / 'report.html'
+        generate_report(stats, str(output))
+        content = output.read_text(encoding='utf-8')
+        assert '<svg' not in content and '时间间隔不足' in content
+
+    def test_tail_card_uses_highest_quantile(self, tmp_path):
+        """汇总卡片与各文件表使用最高的已配置百分位，而不是固定的 P99。"""
+        services = {'a': {'count': 1, 'p50': 1.0, 'p90': 42.0, 'min': 1.0, 'max': 50.0}}
+        stats = {'total_logs': 1, 'error_rate': 0.0, 'services': services,
+                 'quantiles': [90.0, 50.0],
+                 'sources': {'x.jsonl': {'total_logs': 1, 'error_rate': 0.0, 'services': services}}}
+        output = tmp_path / 'report.html'
+        generate_report(stats, str(output))
+        content = output.read_text(encoding='utf-8')
+        assert '全局 P90 延迟' in content and 'P99' not in content
+        assert '最大 P90 延迟' in content
+        assert content.count('42.00') >= 3
+
+    def test_collapse_sorts_by_highest_quantile(self, tmp_path):
+        """百分位未按升序配置时，折叠仍按最高百分位排序。"""
+        stats = _stats(20)
+        stats['quantiles'] = [99.0, 50.0]
+        for i, service_stats in enumerate(stats['services'].values()):
+            service_stats['p50'] = float(100 - i)
+        output = tmp_path / 'report.html'
+        generate_report(stats, str(output), top_n=5)
+        main_table = output.read_text(encoding='utf-8').split('<template>')[0]
+        assert '按 P99 延迟' in main_table
+        assert 'svc019' in main_table and 'svc000' not in main_table
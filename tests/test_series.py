@@ -0,0 +1,128 @@
+"""
+时间序列测试
+"""
+
+import json
+import random
+
+import pytest
+
+from src.series import LatencySeries, downsample_lttb
+
+
+def _records(seed=3, length=5000, span=86400.0):
+    """跨度为 span 秒、带少量无效时间戳的随机记录。"""
+    rng = random.Random(seed)
+    for i in range(length):
+        timestamp = 1736899200 + rng.uniform(0, span) if i % 500 else 'bad'
+        level = 'ERROR' if rng.random() < 0.1 else 'INFO'
+        yield timestamp, level, f'svc{rng.randrange(4)}', rng.lognormvariate(3, 1)
+
+
+def _filled(records, **config):
+    """逐条加入记录得到的序列。"""
+    series = LatencySeries(**config)
+    for record in records:
+        series.add(*record)
+    return series
+
+
+class TestDownsampleLttb:
+    """测试 downsample_lttb。"""
+
+    def test_keeps_endpoints_and_peak(self):
+        """保留首尾两点与孤立尖峰，点数不超过预算。"""
+        points = [(float(x), 1.0) for x in range(1000)]
+        points[437] = (437.0, 100.0)
+        sampled = downsample_lttb(points, 50)
+        assert len(sampled) == 50
+        assert sampled[0] == points[0] and sampled[-1] == points[-1]
+        assert (437.0, 100.0) in sampled
+        assert [x for x, _ in sampled] == sorted(x for x, _ in sampled)
+
+    def test_short_input_unchanged(self):
+        """点数不超过预算时原样返回。"""
+        points = [(0.0, 1.0), (1.0, 2.0)]
+        assert downsample_lttb(points, 3) == points
+
+    def test_threshold_too_small(self):
+        """预算小于 3 时抛出 ValueError。"""
+        with pytest.raises(ValueError):
+            downsample_lttb([(0.0, 0.0)] * 10, 2)
+
+
+class TestLatencySeries:
+    """测试 LatencySeries。"""
+
+    def test_coarsens_within_limit(self):
+        """间隔数超过上限时间隔加倍，总数与错误数保持不变。"""
+        records = list(_records())
+        series = _filled(records, interval=10.0, max_intervals=64)
+        result = series.get_series()
+        assert len(series) <= 64
+        assert series.interval / series.base_interval in (2 ** k for k in range(20))
+        assert sum(result['count']) == len(records) - result['invalid_timestamps']
+        assert result['invalid_timestamps'] == 10
+        errors = sum(1 for r in records if r[1] == 'ERROR' and r[0] != 'bad')
+        assert sum(round(rate * count / 100) for rate, count
+                   in zip(result['error_rate'], result['count'])) == errors
+
+    def test_add_columns_matches_add(self):
+        """按列批量加入与逐条加入的输出一致。"""
+        records = list(_records())
+        expected = _filled(records, interval=60.0, max_intervals=100)
+        services = sorted({r[2] for r in records})
+        batched = LatencySeries(interval=60.0, max_intervals=100)
+        for start in range(0, len(records), 700):
+            chunk = records[start:start + 700]
+            batched.add_columns(services, [services.index(r[2]) for r in chunk],
+                                [r[3] for r in chunk], [r[1] for r in chunk],
+                                [r[0] for r in chunk])
+        quantiles = [0, 50, 99, 100]
+        assert batched.get_series(quantiles) == expected.get_series(quantiles)
+
+    def test_merge_matches_sequential(self):
+        """分片合并与按顺序处理的结果一致，即使各分片的间隔不同。"""
+        records = sorted(_records(), key=lambda r: r[0] if r[0] != 'bad' else 0)
+        config = {'interval': 30.0, 'max_intervals': 50}
+        expected = _filled(records, **config)
+        merged = _filled(records[:4000], **config)
+        tail = _filled(records[4000:], **config)
+        assert merged.interval != tail.interval
+        merged.merge(tail)
+        assert merged.get_series([50, 99]) == expected.get_series([50, 99])
+
+    def test_merge_rejects_different_config(self):
+        """配置不同的序列不能合并。"""
+        with pytest.raises(ValueError):
+            LatencySeries(10.0).merge(LatencySeries(20.0))
+
+    def test_state_round_trip(self):
+        """状态经 JSON 序列化后恢复的序列输出相同。"""
+        series = _filled(_records(length=1000), interval=300.0)
+        restored = LatencySeries.from_state(json.loads(json.dumps(series.to_state())))
+        assert restored.get_series() == series.get_series()
+
+    def test_services_padded_with_none(self):
+        """服务在某个间隔没有数据时对应位置为 None，只输出日志最多的服务。"""
+        series = LatencySeries(interval=10.0)
+        series.add(0, 'INFO', 'a', 1.0)
+        series.add(0, 'INFO', 'a', 2.0)
+        series.add(15, 'ERROR', 'b', 5.0)
+        result = series.get_series([50], top_services=1)
+        assert result['timestamps'] == [0.0, 10.0]
+        assert result['error_rate'] == [0.0, 100.0]
+        assert list(result['services']) == ['a']
+        assert result['services']['a']['p50'][1] is None
+        assert result['start'] == '1970-01-01T00:00:00'
+
+    @pytest.mark.parametrize('timestamp', [[1], float('nan'), 1e300])
+    def test_invalid_timestamps_counted(self, timestamp):
+        """列表、NaN 与超出范围的时间戳计为无效，逐条与按列加入结果相同。"""
+        series = LatencySeries(interval=60.0)
+        series.add(timestamp, 'INFO', 'a', 1.0)
+        series.add(0, 'INFO', 'a', 1.0)
+        batched = LatencySeries(interval=60.0)
+        batched.add_columns(['a'], [0, 0], [1.0, 1.0], ['INFO', 'INFO'], [timestamp, 0])
+        for result in (series.get_series(), batched.get_series()):
+            assert result['invalid_timestamps'] == 1 and result['count'] == [1]
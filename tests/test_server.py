@@ -0,0 +1,187 @@
+"""
+HTTP 服务测试
+"""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src.analyzer import LogAnalyzer
+from src.diagnostics import ParseDiagnostics
+from src.follow import FileFollower
+from src.server import LiveStats, ingest_file, make_server
+
+
+def _record(service, latency, level='INFO'):
+    """构造一条记录。"""
+    return {'level': level, 'service': service, 'latency_ms': latency}
+
+
+class TestLiveStats:
+    """测试 LiveStats 类。"""
+
+    def test_snapshot_cached_until_new_data(self):
+        """没有新数据时重复读取不会重新计算统计。"""
+        live = LiveStats(LogAnalyzer(), clock=lambda: 0.0)
+        live.add_records([_record('api', 10), _record('api', 20)])
+
+        version, body = live.snapshot('json')
+        assert json.loads(body)['total_logs'] == 2
+        assert live.snapshot('json') == (version, body)
+        live.snapshot('prom')
+        assert live.computations == 1
+
+        live.add_records([_record('db', 5, 'ERROR')])
+        new_version, body = live.snapshot('json')
+        assert new_version > version
+        assert json.loads(body)['error_count'] == 1
+        assert live.computations == 2
+
+    def test_idle_snapshot_expires(self):
+        """没有新数据时快照过期后只重新求值附加字段；内容不变时快照编号不变。"""
+        now = [0.0]
+        received = [0]
+        live = LiveStats(LogAnalyzer(), snapshot_ttl=5.0, clock=lambda: now[0])
+        live.providers['ingest'] = lambda: {'received': received[0]}
+        live.add_records([_record('api', 10)])
+
+        tag, body = live.snapshot('json')
+        received[0] = 3
+        now[0] = 4.0
+        assert live.snapshot('json') == (tag, body)
+
+        now[0] = 5.0
+        new_tag, body = live.snapshot('json')
+        assert new_tag > tag and json.loads(body)['ingest'] == {'received': 3}
+        assert json.loads(body)['total_logs'] == 1
+
+        now[0] = 10.0
+        assert live.snapshot('json') == (new_tag, body)
+        # 过期只重新求值 providers，不重新计算统计
+        assert live.computations == 1
+
+    def test_invalid_record_skipped(self, capsys):
+        """分析器拒绝的记录被跳过并计数，同批的其他记录照常加入。"""
+        live = LiveStats(LogAnalyzer())
+        added = live.add_records([_record('api', 'abc'), _record('api', 1), _record('api', 2)])
+        assert added == 2
+        stats = live.stats()[1]
+        assert stats['total_logs'] == 2 and stats['rejected_records'] == 1
+        assert 'abc' in capsys.readouterr().err
+
+    def test_empty_batch_keeps_version(self):
+        """空批次不改变版本号。"""
+        live = LiveStats(LogAnalyzer())
+        assert live.add_records([]) == 0
+        assert live.version == 0
+
+
+class TestServer:
+    """测试 HTTP 接口。"""
+
+    @pytest.fixture
+    def server(self, tmp_path):
+        """启动跟踪临时文件的服务，返回 (基础 URL, 日志路径)。"""
+        path = tmp_path / 'live.jsonl'
+        path.write_text('{"timestamp": "2025-01-15T10:00:00", "level": "INFO", '
+                        '"service": "api", "latency_ms": 10, "msg": "ok"}\n')
+        live = LiveStats(LogAnalyzer())
+        follower = FileFollower(str(path), diagnostics=ParseDiagnostics(stream=None))
+        stop = threading.Event()
+        ingest = threading.Thread(target=ingest_file, args=(follower, live, stop, 0.01))
+        ingest.start()
+        httpd = make_server(live, port=0)
+        thread = threading.Thread(target=httpd.serve_forever)
+        thread.start()
+        yield f'http://127.0.0.1:{httpd.server_address[1]}', path, live
+        httpd.shutdown()
+        httpd.server_close()
+        stop.set()
+        ingest.join()
+        thread.join()
+
+    @staticmethod
+    def _wait_for(live, version):
+        """等待后台线程读入新数据。"""
+        for _ in range(500):
+            if live.version > version:
+                return
+            threading.Event().wait(0.01)
+        raise AssertionError('没有读入新数据')
+
+    def test_endpoints(self, server):
+        """三个端点分别返回 JSON、Prometheus 文本和 HTML，未知路径返回 404。"""
+        base, path, live = server
+        self._wait_for(live, 0)
+
+        with urllib.request.urlopen(base + '/stats') as response:
+            assert json.loads(response.read())['total_logs'] == 1
+            etag = response.headers['ETag']
+        with urllib.request.urlopen(base + '/metrics') as response:
+            assert response.headers['Content-Type'].startswith('text/plain')
+            assert b'log_analyzer_logs 1\n' in response.read()
+        with urllib.request.urlopen(base + '/') as response:
+            assert b'<!DOCTYPE html>' in response.read()
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            urllib.request.urlopen(base + '/missing')
+        assert excinfo.value.code == 404
+
+        request = urllib.request.Request(base + '/stats', headers={'If-None-Match': etag})
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            urllib.request.urlopen(request)
+        assert excinfo.value.code == 304
+
+        version = live.version
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('{"timestamp": "2025-01-15T10:00:01", "level": "ERROR", '
+                    '"service": "db", "latency_ms": 5, "msg": "x"}\n')
+        self._wait_for(live, version)
+        with urllib.request.urlopen(base + '/stats') as response:
+            assert json.loads(response.read())['total_logs'] == 2
+
+    def test_file_ingest_survives_invalid_record(self, server):
+        """跟踪文件中的无效记录不会终止读取线程。"""
+        base, path, live = server
+        self._wait_for(live, 0)
+        version = live.version
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('{"timestamp": "2025-01-15T10:00:01", "level": "INFO", '
+                    '"service": "api", "latency_ms": "abc", "msg": "x"}\n')
+        self._wait_for(live, version)
+        version = live.version
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('{"timestamp": "2025-01-15T10:00:02", "level": "INFO", '
+                    '"service": "api", "latency_ms": 3, "msg": "x"}\n')
+        self._wait_for(live, version)
+        with urllib.request.urlopen(base + '/stats') as response:
+            stats = json.loads(response.read())
+        assert stats['total_logs'] == 2 and stats['rejected_records'] == 1
+
+
+def test_ingest_file_continues_after_error(capsys):
+    """读取出错时报告到 stderr 并继续轮询。"""
+    live = LiveStats(LogAnalyzer())
+    stop = threading.Event()
+
+    class FlakyFollower:
+        """第一次读取抛出异常，之后返回记录并在读完后停止。"""
+        diagnostics = None
+        caught_up = True
+        calls = 0
+
+        def poll(self):
+            self.calls += 1
+            if self.calls == 1:
+                raise OSError('disk gone')
+            stop.set()
+            return [_record('api', 1)]
+
+        def close(self):
+            pass
+
+    ingest_file(FlakyFollower(), live, stop, poll_interval=0)
+    assert live.analyzer.total_logs == 1
+    assert 'disk gone' in capsys.readouterr().err
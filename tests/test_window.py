@@ -0,0 +1,142 @@
+"""
+时间窗口测试
+"""
+
+import json
+
+import pytest
+
+from src.analyzer import LogAnalyzer
+from src.cli import main
+from src.window import TimeWindow, parse_duration, parse_timestamp, timestamp_seconds
+
+
+def _record(second, level='INFO', service='api', latency=10):
+    """生成指定秒数的记录（2025-01-15T10:00:00 起）。"""
+    minute, sec = divmod(second, 60)
+    return {
+        'timestamp': f'2025-01-15T10:{minute:02d}:{sec:02d}',
+        'level': level,
+        'service': service,
+        'latency_ms': latency,
+        'msg': 'm',
+    }
+
+
+class TestParsing:
+    """测试时长与时间戳解析。"""
+
+    @pytest.mark.parametrize('value, seconds', [
+        ('30s', 30), ('5m', 300), ('1h', 3600), ('1d', 86400), ('90', 90), ('1.5m', 90),
+    ])
+    def test_parse_duration(self, value, seconds):
+        """支持 s/m/h/d 单位。"""
+        assert parse_duration(value) == seconds
+
+    @pytest.mark.parametrize('value', ['', 'abc', '5x', '0s'])
+    def test_parse_duration_invalid(self, value):
+        """非法时长抛出 ValueError。"""
+        with pytest.raises(ValueError):
+            parse_duration(value)
+
+    def test_parse_timestamp(self):
+        """无时区按 UTC，支持 Z 后缀。"""
+        assert parse_timestamp('1970-01-01T00:01:00') == 60
+        assert parse_timestamp('1970-01-01T00:01:00Z') == 60
+        assert parse_timestamp('not a time') is None
+        assert parse_timestamp([1]) is None
+
+    @pytest.mark.parametrize('value', [
+        [1], {'t': 1}, float('nan'), float('inf'), 1e300, -1e300, 10 ** 400,
+    ])
+    def test_timestamp_seconds_invalid(self, value):
+        """不可哈希、非有限或超出范围的时间戳视为无效而不抛出异常。"""
+        assert timestamp_seconds(value) is None
+
+    def test_timestamp_seconds_valid(self):
+        """字符串与数值时间戳都被转换。"""
+        assert timestamp_seconds('1970-01-01T00:01:00Z') == 60
+        assert timestamp_seconds(1736899200) == 1736899200
+
+
+class TestTimeWindow:
+    """测试 TimeWindow 类。"""
+
+    def test_old_buckets_expire(self):
+        """超出窗口的桶被丢弃。"""
+        analyzer = LogAnalyzer(time_window=60, window_bucket_seconds=10)
+        for second in range(0, 180):
+            level = 'ERROR' if second < 120 else 'INFO'
+            analyzer.add_record(_record(second, level=level, latency=second))
+
+        stats = analyzer.get_window_stats()
+        assert stats['total_logs'] == 60
+        assert stats['error_count'] == 0
+        assert stats['services']['api']['min'] == 120
+        assert stats['window']['start'] == '2025-01-15T10:02:00'
+        assert stats['window']['end'] == '2025-01-15T10:03:00'
+        # 全量统计不受窗口影响
+        assert analyzer.get_stats()['total_logs'] == 180
+
+    def test_late_records_dropped(self):
+        """早于窗口的迟到记录被丢弃并计数。"""
+        window = TimeWindow(60, 10)
+        window.add('2025-01-15T11:00:00', 'INFO', 'api', 1)
+        window.add('2025-01-15T10:00:00', 'INFO', 'api', 1)
+        window.add('garbage', 'INFO', 'api', 1)
+        stats = window.get_stats()
+        assert stats['total_logs'] == 1
+        assert stats['window']['late_records'] == 1
+        assert stats['window']['invalid_timestamps'] == 1
+
+    @pytest.mark.parametrize('timestamp', [[1], float('nan'), 1e300])
+    def test_invalid_timestamps_counted(self, timestamp):
+        """列表、NaN 与超出范围的时间戳计为无效，不影响其他记录。"""
+        window = TimeWindow(60, 10)
+        window.add(timestamp, 'INFO', 'api', 1)
+        window.add('2025-01-15T11:00:00', 'INFO', 'api', 1)
+        stats = window.get_stats()
+        assert stats['total_logs'] == 1
+        assert stats['window']['invalid_timestamps'] == 1
+
+    def test_cli_invalid_timestamps(self, tmp_path):
+        """--window 运行遇到无效时间戳时正常完成。"""
+        data = tmp_path / 'logs.jsonl'
+        lines = [{'timestamp': value, 'level': 'INFO', 'service': 'api',
+                  'latency_ms': 1, 'msg': 'm'}
+                 for value in ([1], 1e300, '2025-01-15T10:00:00')]
+        data.write_text('\n'.join(json.dumps(line) for line in lines)
+                        + '\n{"timestamp": NaN, "level": "INFO", "service": "api", '
+                        '"latency_ms": 1, "msg": "m"}\n')
+        output = tmp_path / 'report.json'
+        assert main(['--input', str(data), '--output', str(output), '--format', 'json',
+                     '--window', '5m']) == 0
+        window = json.loads(output.read_text(encoding='utf-8'))['window']
+        assert window['invalid_timestamps'] == 3
+
+    def test_ring_size_bounded(self):
+        """环形桶数量固定。"""
+        window = TimeWindow(300, 5)
+        for second in range(0, 3600, 3):
+            window.add(float(second), 'INFO', 'api', 1)
+        assert len(window.live_buckets()) == window.num_buckets == 60
+
+    def test_merge_and_state(self):
+        """窗口可以合并并经 JSON 往返恢复。"""
+        first = LogAnalyzer(time_window=60, window_bucket_seconds=10)
+        second = LogAnalyzer(time_window=60, window_bucket_seconds=10)
+        combined = LogAnalyzer(time_window=60, window_bucket_seconds=10)
+        for s in range(100):
+            (first if s < 50 else second).add_record(_record(s, latency=s))
+            combined.add_record(_record(s, latency=s))
+
+        first.merge(second)
+        assert first.get_window_stats() == combined.get_window_stats()
+
+        state = json.loads(json.dumps(first.to_state()))
+        assert LogAnalyzer.from_state(state).get_window_stats() == combined.get_window_stats()
+
+    def test_window_required(self):
+        """未配置窗口时 get_window_stats 抛出 ValueError。"""
+        with pytest.raises(ValueError):
+            LogAnalyzer().get_window_stats()